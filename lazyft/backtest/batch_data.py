@@ -0,0 +1,95 @@
+"""
+Shares loaded candle data between the backtests of a batch.
+"""
+from __future__ import annotations
+
+from copy import copy
+from typing import Any, Hashable
+
+from freqtrade.optimize.backtesting import Backtesting
+from loguru import logger
+
+
+class BatchDataLoader:
+    """
+    Caches the candle data that `Backtesting` loads, so backtests that use the same exchange,
+    pairs, timeframe, timerange and startup candles only load it from disk once.
+
+    The loader is attached to each `Backtesting` instance before it starts. Backtests that run in
+    forked worker processes share the cache of the worker they run in.
+    """
+
+    def __init__(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        self._data: dict[Hashable, tuple[dict, Any]] = {}
+        self._detail_data: dict[Hashable, tuple[dict, dict]] = {}
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def attach(self, bt: Backtesting) -> None:
+        """
+        Make a Backtesting instance load its candle data through this loader.
+
+        :param bt: The Backtesting instance
+        """
+        load_bt_data = bt.load_bt_data
+        load_bt_data_detail = bt.load_bt_data_detail
+
+        def cached_load_bt_data():
+            key = self.key(bt)
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                data, timerange = load_bt_data()
+                entry = self._data[key] = (data, copy(timerange))
+            else:
+                self.hits += 1
+                logger.info("Using already loaded candle data of {} pairs", len(entry[0]))
+            data, timerange = entry
+            # load_bt_data adjusts the start of the timerange to the available data
+            bt.timerange = copy(timerange)
+            # the dictionary is shared, the frames are not modified by Backtesting
+            return dict(data), bt.timerange
+
+        def cached_load_bt_data_detail():
+            key = (self.key(bt), bt.timeframe_detail, str(bt.trading_mode))
+            entry = self._detail_data.get(key)
+            if entry is None:
+                load_bt_data_detail()
+                entry = self._detail_data[key] = (
+                    bt.detail_data,
+                    getattr(bt, "futures_data", {}),
+                )
+            bt.detail_data, bt.futures_data = dict(entry[0]), dict(entry[1])
+
+        bt.load_bt_data = cached_load_bt_data
+        bt.load_bt_data_detail = cached_load_bt_data_detail
+
+    @staticmethod
+    def key(bt: Backtesting) -> tuple:
+        """
+        :param bt: A Backtesting instance
+        :return: The key of the candle data the instance will load.
+        """
+        timerange = bt.timerange
+        return (
+            bt.config["exchange"]["name"],
+            str(bt.config["datadir"]),
+            tuple(sorted(bt.pairlists.whitelist)),
+            bt.timeframe,
+            timerange.starttype,
+            timerange.startts,
+            timerange.stoptype,
+            timerange.stopts,
+            bt.required_startup,
+            str(bt.config.get("candle_type_def", "")),
+        )
+
+    def clear(self) -> None:
+        """
+        Release all loaded data.
+        """
+        self._data.clear()
+        self._detail_data.clear()
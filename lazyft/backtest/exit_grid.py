@@ -0,0 +1,449 @@
+"""
+Scores grids of ROI tables, stoplosses and trailing stop settings over stored signals.
+
+The entry and exit signals of a strategy do not depend on its exit settings, so the signals of a
+single backtest are enough to score every combination of ROI table, stoploss and trailing stop.
+For each entry, the highs, lows and opens of the following candles are collected into one matrix
+and every exit setting is applied to the whole matrix at once.
+
+The simulation follows the rules freqtrade uses in backtesting:
+
+* trades are entered at the open of the candle after the entry signal,
+* the stoploss is checked before the ROI table and the ROI table before the exit signal,
+* a pair has at most one open trade, entries are checked before exits on every candle, so a new
+  trade can only be entered on the candle after the last one exited.
+
+It does not limit the number of open trades across pairs, the stake is the same for every trade
+and protections and custom exit callbacks are not applied. Scores are meant to rank exit settings,
+the final candidates should be confirmed with a regular backtest.
+"""
+from __future__ import annotations
+
+import datetime
+import inspect
+import itertools
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Iterable, Optional, Union
+
+import numpy as np
+import pandas as pd
+import rapidjson
+from freqtrade.exchange import timeframe_to_minutes
+from loguru import logger
+from numpy.lib.stride_tricks import sliding_window_view
+
+from lazyft import paths
+from lazyft.backtest.signal_cache import SignalEntry, signal_cache
+from lazyft.loss_functions import win_ratio_and_profit_ratio_loss
+from lazyft.strategy import get_file_name
+
+if TYPE_CHECKING:
+    from lazyft.backtest.runner import BacktestRunner
+
+RoiTable = dict[Union[int, str], float]
+TRAILING_KEYS = (
+    "trailing_stop",
+    "trailing_stop_positive",
+    "trailing_stop_positive_offset",
+    "trailing_only_offset_is_reached",
+)
+# Exit reasons by priority, the first one that happens on a candle is used
+EXIT_REASONS = ("stop_loss", "trailing_stop_loss", "roi", "exit_signal", "force_exit")
+
+
+class ExitGridEvaluator:
+    """
+    Scores exit settings over the stored signals of a strategy.
+    """
+
+    def __init__(
+        self,
+        frames: dict[str, pd.DataFrame],
+        timeframe: str,
+        fee: float = 0.001,
+        use_exit_signal: bool = True,
+        max_candles: int = 2000,
+        strategy: str = None,
+    ) -> None:
+        """
+        :param frames: Analyzed dataframes by pair. They need the candles and the entry and exit
+            signal columns.
+        :param timeframe: The timeframe of the dataframes
+        :param fee: The fee for entering and for exiting a trade
+        :param use_exit_signal: Whether trades exit on the exit signal
+        :param max_candles: Trades that are still open after this many candles are exited at the
+            close of the last candle.
+        :param strategy: The name of the strategy. Used when exporting parameters.
+        """
+        self.timeframe = timeframe
+        self.timeframe_minutes = timeframe_to_minutes(timeframe)
+        self.fee = fee or 0.0
+        self.use_exit_signal = use_exit_signal
+        self.max_candles = max_candles
+        self.strategy = strategy
+        self._prepare(frames)
+
+    # region Constructors
+    @classmethod
+    def from_signals(cls, entry: SignalEntry, **kwargs) -> "ExitGridEvaluator":
+        """
+        :param entry: Signals stored by the signal cache
+        :param kwargs: Passed to the constructor
+        :return: An evaluator over the stored signals
+        """
+        kwargs.setdefault("fee", entry.fee)
+        return cls(entry.trimmed, entry.timeframe, **kwargs)
+
+    @classmethod
+    def from_runner(cls, runner: "BacktestRunner", **kwargs) -> "ExitGridEvaluator":
+        """
+        Create an evaluator from the signals of a backtest. The backtest is executed if its
+        signals are not stored yet.
+
+        :param runner: A BacktestRunner
+        :param kwargs: Passed to the constructor
+        :return: An evaluator over the signals of the backtest
+        """
+        entry = signal_cache.get(runner.signal_hash, runner.strategy)
+        if entry is None:
+            runner.reuse_signals = True
+            runner.load_from_hash = False
+            runner.execute()
+            entry = signal_cache.get(runner.signal_hash, runner.strategy)
+        if entry is None:
+            raise ValueError(f"No signals were stored for {runner.strategy}")
+        kwargs.setdefault("strategy", runner.strategy)
+        return cls.from_signals(entry, **kwargs)
+
+    # endregion
+
+    def _prepare(self, frames: dict[str, pd.DataFrame]) -> None:
+        """Collect the candles that follow each entry into (entries, candles) matrices"""
+        width = self.max_candles
+        high, low, open_, close, exit_signal = [], [], [], [], []
+        pairs, entry_candles, open_dates, dates, last = [], [], [], [], []
+        for pair_index, (pair, df) in enumerate(frames.items()):
+            if df.empty:
+                continue
+            enter_column = "enter_long" if "enter_long" in df.columns else "buy"
+            exit_column = "exit_long" if "exit_long" in df.columns else "sell"
+            # signals act on the candle after the one they were generated on
+            enter = _shifted_signal(df, enter_column)
+            exit_ = _shifted_signal(df, exit_column)
+            entries = np.flatnonzero(enter & ~exit_)
+            if not len(entries):
+                continue
+            n = len(df)
+            windows = {
+                name: sliding_window_view(_pad(df[name].to_numpy(float), width), width)[entries]
+                for name in ("open", "high", "low", "close")
+            }
+            open_rate = windows["open"][:, :1]
+            open_.append(windows["open"] / open_rate - 1)
+            high.append(windows["high"] / open_rate - 1)
+            low.append(windows["low"] / open_rate - 1)
+            close.append(windows["close"] / open_rate - 1)
+            exit_signal.append(
+                sliding_window_view(_pad(exit_.astype(float), width, 0.0), width)[entries] > 0
+            )
+            pairs.append(np.full(len(entries), pair_index))
+            entry_candles.append(entries)
+            last.append(np.minimum(n - entries, width) - 1)
+            pair_dates = _utc_dates(df)
+            dates.append(pair_dates)
+            open_dates.append(pair_dates[entries])
+        self.pairs = list(frames)
+        self.n_entries = sum(len(e) for e in entry_candles)
+        if not self.n_entries:
+            logger.warning("No entry signals found")
+            self._empty = True
+            return
+        self._empty = False
+        self._open = np.concatenate(open_)
+        self._high = np.concatenate(high)
+        self._low = np.concatenate(low)
+        self._close = np.concatenate(close)
+        self._pair = np.concatenate(pairs)
+        self._entry = np.concatenate(entry_candles)
+        self._last = np.concatenate(last)
+        self._open_date = np.concatenate(open_dates)
+        self._dates = np.concatenate(dates)
+        offsets = np.cumsum([0] + [len(d) for d in dates])[:-1]
+        self._date_offset = np.repeat(offsets, [len(e) for e in entry_candles])
+        # the exit signal can not exit the trade on the candle it was entered on
+        signal = np.concatenate(exit_signal)
+        signal[:, 0] = False
+        self._signal_k = _first(signal)
+        self._max_high = np.fmax.accumulate(self._high, axis=1)
+        self._rows = np.arange(self.n_entries)
+        # sorting key of the entries of all pairs, used to find the next entry after an exit
+        self._span = int(max(e.max() for e in entry_candles)) + width + 1
+        self._keys = self._pair * self._span + self._entry
+        all_dates = np.concatenate([d[[0, -1]] for d in dates])
+        self.days = max((all_dates.max() - all_dates.min()) / np.timedelta64(1, "D"), 1)
+
+    # region Exits
+    def _stop_exits(self, stoploss: float, trailing: Optional[dict]) -> tuple:
+        """
+        :return: The candle of the stoploss exit of each entry, its rate and whether it was a
+            trailing stop.
+        """
+        if trailing and trailing.get("trailing_stop"):
+            max_high = self._max_high
+            positive = trailing.get("trailing_stop_positive")
+            offset = trailing.get("trailing_stop_positive_offset") or 0.0
+            if trailing.get("trailing_only_offset_is_reached"):
+                base = np.full_like(max_high, stoploss)
+            else:
+                base = (1 + max_high) * (1 + stoploss) - 1
+            if positive is not None:
+                level = np.where(max_high > offset, (1 + max_high) * (1 - positive) - 1, base)
+            else:
+                level = base
+            level = np.fmax(level, stoploss)
+        else:
+            level = np.full_like(self._low, stoploss)
+        k = _first(self._low <= level)
+        rate = np.minimum(_take(level, k), _take(self._open, k))
+        trailing_hit = _take(level, k) > stoploss
+        return k, rate, trailing_hit
+
+    def _roi_exits(self, roi: RoiTable) -> tuple:
+        """
+        :return: The candle of the ROI exit of each entry and its rate.
+        """
+        table = sorted((int(minutes), value) for minutes, value in roi.items())
+        minutes = np.arange(self.max_candles) * self.timeframe_minutes
+        keys = np.array([m for m, _ in table])
+        values = np.array([v for _, v in table], dtype=float)
+        position = np.searchsorted(keys, minutes, side="right") - 1
+        required = np.where(position >= 0, values[np.maximum(position, 0)], np.inf)
+        # the rate at which the profit after fees reaches the required ROI
+        threshold = (1 + self.fee + required) / (1 - self.fee) - 1
+        k = _first(self._high >= threshold)
+        rate = _take(np.broadcast_to(threshold, self._high.shape), k)
+        rate = np.where(k > 0, np.maximum(rate, _take(self._open, k)), rate)
+        return k, rate
+
+    # endregion
+
+    def _simulate(self, stop: tuple, roi: tuple) -> pd.DataFrame:
+        """Combine the exits of an exit setting into the list of trades it results in"""
+        stop_k, stop_rate, trailing_hit = stop
+        roi_k, roi_rate = roi
+        if self.use_exit_signal:
+            signal_k = self._signal_k
+        else:
+            signal_k = np.full_like(stop_k, np.iinfo(int).max)
+        candidates = np.vstack([stop_k, roi_k, signal_k, self._last])
+        exit_type = np.argmin(candidates, axis=0)
+        k = candidates[exit_type, self._rows]
+        rate = np.choose(
+            exit_type, [stop_rate, roi_rate, _take(self._open, k), _take(self._close, k)]
+        )
+        reason_index = np.choose(exit_type, [np.where(trailing_hit, 1, 0), 2, 3, 4])
+        taken = _chain(self._keys, self._keys + k)
+
+        open_value = 1 + self.fee
+        close_value = (1 + rate[taken]) * (1 - self.fee)
+        exit_candle = self._entry[taken] + k[taken]
+        close_dates = self._dates[self._date_offset[taken] + exit_candle]
+        reasons = np.array(EXIT_REASONS)[reason_index[taken]]
+        return pd.DataFrame(
+            {
+                "pair": np.array(self.pairs, dtype=object)[self._pair[taken]],
+                "open_date": pd.to_datetime(self._open_date[taken], utc=True),
+                "close_date": pd.to_datetime(close_dates, utc=True),
+                "profit_ratio": close_value / open_value - 1,
+                "exit_reason": reasons,
+                "sell_reason": reasons,
+                "trade_duration": k[taken] * self.timeframe_minutes,
+            }
+        )
+
+    def trades(
+        self, roi: RoiTable, stoploss: float, trailing: Optional[dict] = None
+    ) -> pd.DataFrame:
+        """
+        :param roi: A ROI table
+        :param stoploss: A stoploss
+        :param trailing: The trailing stop settings
+        :return: The trades the exit settings result in
+        """
+        if self._empty:
+            return pd.DataFrame()
+        return self._simulate(self._stop_exits(stoploss, trailing), self._roi_exits(roi))
+
+    def evaluate(
+        self,
+        roi_tables: Iterable[RoiTable],
+        stoplosses: Iterable[float],
+        trailing: Iterable[Optional[dict]] = None,
+        loss: Callable = win_ratio_and_profit_ratio_loss,
+        min_trades: int = 1,
+    ) -> pd.DataFrame:
+        """
+        Score every combination of the passed ROI tables, stoplosses and trailing stop settings.
+
+        :param roi_tables: ROI tables, as in the `minimal_roi` of a strategy
+        :param stoplosses: Stoploss values
+        :param trailing: Trailing stop settings with the keys of the trailing space. Defaults to
+            no trailing stop.
+        :param loss: A function from `lazyft.loss_functions`. Smaller values are better.
+        :param min_trades: Combinations with fewer trades get an infinite loss
+        :return: A dataframe with one row per combination, sorted by the loss.
+        """
+        roi_tables = list(roi_tables)
+        trailing = list(trailing or [None])
+        if self._empty:
+            roi_exits = [None] * len(roi_tables)
+        else:
+            roi_exits = [self._roi_exits(r) for r in roi_tables]
+        rows = []
+        for stoploss, trailing_settings in itertools.product(stoplosses, trailing):
+            stop_exits = None if self._empty else self._stop_exits(stoploss, trailing_settings)
+            for roi, roi_exit in zip(roi_tables, roi_exits):
+                if self._empty:
+                    results = pd.DataFrame(columns=["profit_ratio", "trade_duration"])
+                else:
+                    results = self._simulate(stop_exits, roi_exit)
+                rows.append(
+                    self._summary(results, roi, stoploss, trailing_settings, loss, min_trades)
+                )
+        logger.info("Scored {} exit settings over {} entries", len(rows), self.n_entries)
+        return pd.DataFrame(rows).sort_values("loss", kind="stable").reset_index(drop=True)
+
+    def _summary(
+        self,
+        results: pd.DataFrame,
+        roi: RoiTable,
+        stoploss: float,
+        trailing: Optional[dict],
+        loss: Callable,
+        min_trades: int,
+    ) -> dict:
+        trade_count = len(results)
+        if trade_count and trade_count >= min_trades:
+            loss_value = _call_loss(loss, results.copy(), trade_count, self.days)
+        else:
+            loss_value = np.inf
+        trailing = {"trailing_stop": False, **(trailing or {})}
+        return {
+            "roi": {str(int(m)): v for m, v in roi.items()},
+            "stoploss": stoploss,
+            **{key: trailing.get(key) for key in TRAILING_KEYS},
+            "trades": trade_count,
+            "wins": int((results["profit_ratio"] > 0).sum()) if trade_count else 0,
+            "profit_mean": results["profit_ratio"].mean() if trade_count else 0.0,
+            "profit_sum": results["profit_ratio"].sum() if trade_count else 0.0,
+            "duration_avg": results["trade_duration"].mean() if trade_count else 0.0,
+            "loss": loss_value,
+        }
+
+    # region Export
+    def to_parameters(self, point: Union[pd.Series, dict], base_parameters: dict = None) -> dict:
+        """
+        Convert a scored combination to a parameter set in the format of
+        `HyperoptReport.parameters`.
+
+        :param point: A row of the dataframe returned by `evaluate`
+        :param base_parameters: Parameters to add the exit settings to, like the parameters of a
+            HyperoptReport. The exit settings replace the ROI, stoploss and trailing spaces.
+        :return: The parameter set
+        """
+        point = dict(point)
+        parameters = dict(base_parameters or {})
+        params = dict(parameters.get("params", {}))
+        params["roi"] = dict(point["roi"])
+        params["stoploss"] = {"stoploss": point["stoploss"]}
+        if point.get("trailing_stop"):
+            params["trailing"] = {key: point[key] for key in TRAILING_KEYS}
+        else:
+            params.pop("trailing", None)
+        parameters.update(
+            {
+                "strategy_name": parameters.get("strategy_name", self.strategy),
+                "params": params,
+                "ft_stratparam_v": 1,
+                "export_time": datetime.datetime.now().strftime("%x %X"),
+            }
+        )
+        return parameters
+
+    def export_parameters(
+        self, point: Union[pd.Series, dict], base_parameters: dict = None, path: Path = None
+    ) -> Path:
+        """
+        Write a scored combination to a strategy parameter file.
+
+        :param point: A row of the dataframe returned by `evaluate`
+        :param base_parameters: Parameters to add the exit settings to
+        :param path: The file to write to. Defaults to the parameter file of the strategy.
+        :return: The path of the written file
+        """
+        parameters = self.to_parameters(point, base_parameters)
+        if not path:
+            file_name = get_file_name(parameters["strategy_name"])
+            path = paths.STRATEGY_DIR.joinpath(file_name.replace(".py", "") + ".json")
+        Path(path).write_text(rapidjson.dumps(parameters))
+        logger.info("Exported exit parameters to {}", path)
+        return Path(path)
+
+    # endregion
+
+
+def _shifted_signal(df: pd.DataFrame, column: str) -> np.ndarray:
+    if column not in df.columns:
+        return np.zeros(len(df), dtype=bool)
+    signal = df[column].fillna(0).to_numpy() == 1
+    return np.concatenate([[False], signal[:-1]])
+
+
+def _utc_dates(df: pd.DataFrame) -> np.ndarray:
+    """The dates of a dataframe as naive UTC datetime64 values"""
+    return pd.to_datetime(df["date"], utc=True).dt.tz_localize(None).to_numpy()
+
+
+def _pad(values: np.ndarray, width: int, fill=np.nan) -> np.ndarray:
+    return np.concatenate([values, np.full(width - 1, fill)])
+
+
+def _first(mask: np.ndarray) -> np.ndarray:
+    """
+    :return: The index of the first True value of each row or a value larger than any index.
+    """
+    k = mask.argmax(axis=1)
+    return np.where(mask[np.arange(len(mask)), k], k, np.iinfo(int).max)
+
+
+def _take(matrix: np.ndarray, k: np.ndarray) -> np.ndarray:
+    """Take one value of each row, rows without a valid index return NaN"""
+    valid = k < matrix.shape[1]
+    values = matrix[np.arange(len(matrix)), np.where(valid, k, 0)]
+    return np.where(valid, values, np.nan)
+
+
+def _chain(keys: np.ndarray, exit_keys: np.ndarray) -> np.ndarray:
+    """
+    :param keys: The sorted keys of all entries
+    :param exit_keys: The key of the candle each entry would exit on
+    :return: The entries that are taken when an entry is skipped while a trade of the same pair
+        is open. An entry on the exit candle is skipped, freqtrade checks entries before exits.
+    """
+    following = np.maximum(
+        np.searchsorted(keys, exit_keys, side="right"), np.arange(1, len(keys) + 1)
+    )
+    taken = []
+    i = 0
+    while i < len(keys):
+        taken.append(i)
+        i = following[i]
+    return np.array(taken, dtype=int)
+
+
+def _call_loss(loss: Callable, results: pd.DataFrame, trade_count: int, days: float) -> float:
+    """Call a loss function with the arguments it accepts"""
+    parameters = inspect.signature(loss).parameters
+    accepts_any = any(p.kind == p.VAR_KEYWORD for p in parameters.values())
+    kwargs = {"days": days} if "days" in parameters or accepts_any else {}
+    return float(loss(results, trade_count, **kwargs))
@@ -0,0 +1,187 @@
+"""
+Extends saved backtests to a later end date.
+
+A backtest that is extended keeps every trade that was closed before the resume point and only
+simulates the time after it. The resume point is the open date of the first trade that was still
+open at the end of the saved backtest, moved back until no kept trade is open at that point. The
+simulation of the extension starts with free slots and with the starting balance plus the profit of
+the kept trades. Freqtrade loads the required startup candles before the resume point, so the
+indicators are only populated for the new part of the timerange.
+
+The kept trades and the trades of the extension are combined into one result with the statistics
+of a regular backtest. Protections and the counters of rejected signals and timed out orders only
+cover the extension and the market change is combined from the saved backtest and the extension.
+"""
+from __future__ import annotations
+
+import datetime
+from typing import Iterable, Optional, Union
+
+import attr
+import pandas as pd
+from freqtrade.optimize.optimize_reports import generate_backtest_stats
+from loguru import logger
+
+from lazyft import strategy, util
+from lazyft.backtest.commands import BacktestCommand
+from lazyft.backtest.runner import BacktestRunner
+from lazyft.command_parameters import BacktestParameters
+from lazyft.config import Config
+from lazyft.models.backtest import BacktestReport
+from lazyft.reports import BacktestExplorer
+
+# Older freqtrade versions do not store is_open, trades open at the end were force exited
+FORCE_EXIT_REASONS = ("force_exit", "force_sell")
+# The columns of the trades that are used to extend a backtest
+TRADE_COLUMNS = ("open_date", "close_date", "is_open", "profit_abs")
+
+
+def saved_trades(report: BacktestReport) -> pd.DataFrame:
+    """
+    :param report: A backtest report
+    :return: The trades of the report as freqtrade stores them, with parsed dates.
+    """
+    trades = pd.DataFrame(report.backtest_data["trades"])
+    if trades.empty:
+        # a backtest without trades has no columns
+        trades = pd.DataFrame(columns=TRADE_COLUMNS)
+    for column in ("open_date", "close_date"):
+        trades[column] = pd.to_datetime(trades[column], utc=True)
+    if "is_open" not in trades.columns:
+        reason = trades.get("exit_reason", trades.get("sell_reason"))
+        trades["is_open"] = reason.isin(FORCE_EXIT_REASONS)
+    trades["is_open"] = trades["is_open"].fillna(False).astype(bool)
+    return trades
+
+
+def resume_point(trades: pd.DataFrame, end: datetime.datetime) -> datetime.datetime:
+    """
+    Find the date from which a backtest has to be simulated again.
+
+    :param trades: The trades of the backtest, see `saved_trades`
+    :param end: The end of the backtest
+    :return: The resume point. Every closed trade either closes before it or opens after it.
+    """
+    open_trades = trades[trades["is_open"]]
+    point = open_trades["open_date"].min() if len(open_trades) else pd.Timestamp(end)
+    closed = trades[~trades["is_open"]]
+    while True:
+        spanning = closed[(closed["open_date"] < point) & (closed["close_date"] > point)]
+        if spanning.empty:
+            return point.to_pydatetime()
+        point = spanning["open_date"].min()
+
+
+def extend_backtest(
+    report: BacktestReport,
+    end_date: Union[datetime.datetime, str] = None,
+    config: Union[str, Config] = None,
+    save: bool = True,
+) -> BacktestReport:
+    """
+    Extend a saved backtest to a later end date.
+
+    :param report: The saved backtest report
+    :param end_date: The new end date. Defaults to now.
+    :param config: The config to backtest with. Defaults to the default config.
+    :param save: Whether to save the extended report
+    :return: The extended report. An extension of the same report to the same end date that was
+        already saved is returned instead of being run again.
+    """
+    end = _as_utc(end_date) if end_date else datetime.datetime.now(datetime.timezone.utc)
+    original_start = _from_ms(report.backtest_data["backtest_start_ts"])
+    original_end = _from_ms(report.backtest_data["backtest_end_ts"])
+    if end <= original_end:
+        raise ValueError(f"Backtest {report.id} already ends at {original_end}")
+
+    trades = saved_trades(report)
+    point = resume_point(trades, original_end)
+    kept = trades[~trades["is_open"] & (trades["close_date"] <= point)]
+    logger.info(
+        "Extending backtest {} to {}: keeping {} of {} trades, resuming at {}",
+        report.id,
+        end,
+        len(kept),
+        len(trades),
+        point,
+    )
+
+    params = report.get_backtest_parameters(
+        config or attr.fields(BacktestParameters).config_path.default
+    )
+    params.timerange = f"{int(point.timestamp())}-{int(end.timestamp())}"
+    params.starting_balance = report.starting_balance + float(kept["profit_abs"].sum())
+    params.stake_amount = report.stake_amount
+    params.tag = report.tag
+    runner = BacktestRunner(
+        BacktestCommand(report.strategy, params=params, id=report.hyperopt_id),
+        load_from_hash=False,
+        isolated=True,
+    )
+    runner._hash = util.hash(f"{report.hash}-extended-{int(end.timestamp())}")
+    existing = BacktestExplorer.get_by_hash(runner.hash)
+    if existing:
+        logger.info("Backtest {} was already extended to {}", report.id, end)
+        return existing
+
+    bt = runner.pre_execute()
+    try:
+        data, timerange = bt.load_bt_data()
+        bt.load_bt_data_detail()
+        ft_strategy = bt.strategylist[0]
+        _, max_date = bt.backtest_one_strategy(ft_strategy, data, timerange)
+        name = ft_strategy.get_strategy_name()
+        content = bt.all_results[name]
+        content["results"] = pd.concat([kept, content["results"]], ignore_index=True)
+        content["config"] = {**content["config"], "dry_run_wallet": report.starting_balance}
+        stats = generate_backtest_stats(
+            data, {name: content}, min_date=original_start, max_date=max_date
+        )
+        strategy_stats = stats["strategy"][name]
+        strategy_stats["market_change"] = (1 + report.backtest_data.get("market_change", 0)) * (
+            1 + strategy_stats.get("market_change", 0)
+        ) - 1
+        runner.result_path = util.store_backtest_stats(
+            bt.config["exportfilename"], stats, suffix=runner.report_id[:8]
+        )
+    finally:
+        strategy.delete_temporary_strategy_backup_dir(runner.tmp_strategy_path)
+    runner.report = runner.generate_report()
+    if save:
+        return runner.save()
+    return runner.report
+
+
+def extend_backtests(
+    reports: Iterable[BacktestReport],
+    end_date: Union[datetime.datetime, str] = None,
+    config: Union[str, Config] = None,
+) -> list[Optional[BacktestReport]]:
+    """
+    Extend and save multiple backtests. Failed extensions are logged and return None.
+
+    :param reports: The saved backtest reports
+    :param end_date: The new end date. Defaults to now.
+    :param config: The config to backtest with
+    :return: The extended reports in the order of the passed reports
+    """
+    extended = []
+    for report in reports:
+        try:
+            extended.append(extend_backtest(report, end_date, config))
+        except Exception as e:
+            logger.exception(e)
+            logger.error("Could not extend backtest {}", report.id)
+            extended.append(None)
+    return extended
+
+
+def _as_utc(value: Union[datetime.datetime, str]) -> datetime.datetime:
+    value = pd.Timestamp(value)
+    if value.tzinfo is None:
+        value = value.tz_localize("UTC")
+    return value.to_pydatetime()
+
+
+def _from_ms(timestamp: int) -> datetime.datetime:
+    return datetime.datetime.fromtimestamp(timestamp / 1000, tz=datetime.timezone.utc)
@@ -4,9 +4,12 @@ Contains logic for running backtests.
 
 from __future__ import annotations
 
+import multiprocessing
 import pathlib
+import pickle
 import time
 import uuid
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from typing import Optional
 
 import pandas as pd
@@ -17,14 +20,17 @@ from freqtrade.exceptions import OperationalException
 from freqtrade.optimize import backtesting, optimize_reports
 from sqlmodel import Session
 
-from lazyft import downloader, logger, parameter_tools, paths, strategy, util
+from lazyft import downloader, logger, parameter_tools, paths, strategy, trades_store, util
+from lazyft.backtest.batch_data import BatchDataLoader
 from lazyft.backtest.commands import BacktestCommand
+from lazyft.backtest.signal_cache import signal_cache, strip_wallet_args
 from lazyft.database import engine
+from lazyft.indicator_cache import indicator_cache
 from lazyft.models.backtest import BacktestReport
-from lazyft.reports import get_backtest_repo, get_hyperopt_repo
+from lazyft.reports import BacktestExplorer, get_hyperopt_repo
 from lazyft.runner import Runner
 from lazyft.space_handler import SpaceHandler
-from lazyft.util import get_latest_backtest_filename, store_backtest_stats
+from lazyft.util import store_backtest_stats
 
 logger_exec = logger.bind(type="backtest")
 
@@ -36,33 +42,90 @@ class BacktestMultiRunner:
 
         :param commands: list of BacktestCommand objects
         """
+        self.data_loader = BatchDataLoader()
         self.runners: list[BacktestRunner] = []
         for c in commands:
-            self.runners.append(BacktestRunner(c))
+            runner = BacktestRunner(c)
+            runner.data_loader = self.data_loader
+            self.runners.append(runner)
         self.errors = []
         self.session_id = str(uuid.uuid4())
         self.current_runner: Optional[BacktestRunner] = None
 
-    def execute(self) -> None:
+    def execute(self, workers: int = 1) -> None:
         """
         Executes all runners in the queue.
+
+        :param workers: The number of backtests to run at the same time. Each backtest runs in its
+            own process and in an isolated copy of its strategy folder. Defaults to 1, which runs
+            the backtests one after another in this process.
         """
         self.errors.clear()
-        for r in self.runners:
-            self.current_runner = r
-            try:
-                r.execute()
-            except Exception as e:
-                logger.exception(e)
-                logger.info("Continuing onto next execution")
-            finally:
-                if r.error:
-                    self.errors.append((r, r.strategy, r.exception))
-                    logger.error("Output:\n{}", "\n".join(r.output_list[-10:]))
-
+        if workers > 1:
+            self._execute_parallel(workers)
+        else:
+            for r in self.runners:
+                self.current_runner = r
+                try:
+                    r.execute()
+                except Exception as e:
+                    logger.exception(e)
+                    logger.info("Continuing onto next execution")
+                finally:
+                    self._check_for_error(r)
+
+        # the candle data is only shared within one session
+        self.data_loader.clear()
         if any(self.errors):
             logger.info("Completed with {} errors", len(self.errors))
 
+    def _execute_parallel(self, workers: int) -> None:
+        """
+        Executes the runners in a process pool. The workers are forked from this process, run the
+        backtests and send back the generated reports. Nothing is saved by the workers.
+        """
+        global _worker_runners
+        # downloading in the workers would write the same data files at the same time
+        for r in self.runners:
+            r.download_data()
+        _worker_runners = self.runners
+        context = multiprocessing.get_context("fork")
+        total = len(self.runners)
+        logger.info("Running {} backtests with {} workers", total, workers)
+        try:
+            with ProcessPoolExecutor(
+                max_workers=min(workers, total),
+                mp_context=context,
+                initializer=_init_worker,
+            ) as executor:
+                futures = {
+                    executor.submit(_execute_in_worker, index): r
+                    for index, r in enumerate(self.runners)
+                }
+                for finished, future in enumerate(as_completed(futures), start=1):
+                    r = futures[future]
+                    try:
+                        r.apply_worker_result(future.result())
+                    except Exception as e:
+                        logger.exception(e)
+                        r.error = True
+                        r.exception = e
+                    self._check_for_error(r)
+                    logger.info(
+                        "Finished {}/{}: {} {}",
+                        finished,
+                        total,
+                        r.strategy,
+                        "with errors" if r.error else "successfully",
+                    )
+        finally:
+            _worker_runners = []
+
+    def _check_for_error(self, r: BacktestRunner) -> None:
+        if r.error:
+            self.errors.append((r, r.strategy, r.exception))
+            logger.error("Output:\n{}", "\n".join(r.output_list[-10:]))
+
     def get_totals(self) -> pd.DataFrame:
         """
         Returns a DataFrame with all of the performances.
@@ -73,11 +136,24 @@ class BacktestMultiRunner:
 
     def save(self):
         """
-        Saves all reports to the database.
+        Saves all reports to the database in a single transaction.
         """
+        pending: dict[str, tuple[BacktestRunner, BacktestReport]] = {}
         for r in [r for r in self.runners if r.report]:
             r.report.session_id = self.session_id
-            r.save()
+            report = r.prepare_save()
+            if report and r.hash not in pending:
+                pending[r.hash] = (r, report)
+        if not pending:
+            return
+        with Session(engine) as session:
+            saved = {h: _add_or_update(session, report) for h, (_, report) in pending.items()}
+            session.commit()
+            for report in saved.values():
+                session.refresh(report)
+        for h, (r, _) in pending.items():
+            r.report = saved[h]
+            r.on_saved(saved[h])
 
     @property
     def reports(self) -> list[BacktestReport]:
@@ -95,7 +171,12 @@ class BacktestMultiRunner:
 
 class BacktestRunner(Runner):
     def __init__(
-        self, command: BacktestCommand, verbose: bool = False, load_from_hash=True
+        self,
+        command: BacktestCommand,
+        verbose: bool = False,
+        load_from_hash=True,
+        isolated: bool = False,
+        reuse_signals: bool = False,
     ) -> None:
         """
         Executes a backtest using the passed commands.
@@ -103,9 +184,18 @@ class BacktestRunner(Runner):
         :param command: A BacktestCommand with the arguments to pass to freqtrade
         :param verbose: If True, will print extra output of the command
         :param load_from_hash: If True, will load the report from the database if it exists
+        :param isolated: If True, the backtest runs in a temporary copy of the strategy folder so
+            it can run at the same time as other backtests.
+        :param reuse_signals: If True, the signals of an earlier backtest that only differed in
+            the starting balance, stake amount or max open trades are replayed instead of being
+            generated again.
         """
         super().__init__(command, verbose)
         self.load_from_hash = load_from_hash
+        self.isolated = isolated
+        self.reuse_signals = reuse_signals
+        self.data_downloaded = False
+        self.data_loader: Optional[BatchDataLoader] = None
         self.verbose = verbose or command.verbose
         self._hash = None
 
@@ -119,9 +209,24 @@ class BacktestRunner(Runner):
         """To help avoid running the same backtest"""
         if self._hash:
             return self._hash
+        self._hash = self._hash_command(self.command.command_string)
+        logger.debug("Command hash: {}", self._hash)
+        return self._hash
+
+    @property
+    def signal_hash(self) -> str:
+        """
+        Backtests with the same signal hash generate the same signals. The wallet settings are not
+        part of the hash.
+        """
+        return self._hash_command(
+            strip_wallet_args(self.command.command_string)
+        ) + util.hash(self.params.custom_settings)
+
+    def _hash_command(self, command: str) -> str:
         try:
             command_string = (
-                "".join(sorted(self.command.command_string.split()))
+                "".join(sorted(command.split()))
                 + str(self.hyperopt_id)
                 + self.config["exchange"]["name"]
                 + self.params.tag
@@ -138,10 +243,7 @@ class BacktestRunner(Runner):
         if self.params.ensemble:
             command_string += ",".join([str(s) for s in self.params.ensemble])
         # logger.debug('Hashing "{}"', command_string)
-
-        self._hash = util.hash(command_string)
-        logger.debug("Command hash: {}", self._hash)
-        return self._hash
+        return util.hash(command_string)
 
     def pre_execute(self) -> backtesting.Backtesting:
         """
@@ -152,27 +254,39 @@ class BacktestRunner(Runner):
             assert (
                 get_hyperopt_repo().get(self.command.id).strategy == self.strategy
             ), f"Hyperopt id {self.command.id} does not match strategy {self.strategy}"
-            parameter_tools.set_params_file(self.command.id)
+        if self.isolated:
+            self.create_isolated_workspace()
+            if not self.hyperopt_id:
+                strategy.save_strategy_text_to_database(self.strategy)
         else:
-            parameter_tools.remove_params_file(self.strategy, self.config.path)
-        # Initialize backtesting object
+            if self.command.id:
+                parameter_tools.set_params_file(self.command.id)
+            else:
+                parameter_tools.remove_params_file(self.strategy, self.config.path)
+            # Initialize backtesting object
 
-        # save copy of strategy
-        if not self.hyperopt_id:
-            strategy.save_strategy_text_to_database(self.strategy)
-        else:
-            # check to see if the report with hyperopt id has a strategy hash
-            report = get_hyperopt_repo().get(self.hyperopt_id)
-            self.export_backup_strategy(report)
+            # save copy of strategy
+            if not self.hyperopt_id:
+                strategy.save_strategy_text_to_database(self.strategy)
+            else:
+                # check to see if the report with hyperopt id has a strategy hash
+                report = get_hyperopt_repo().get(self.hyperopt_id)
+                self.export_backup_strategy(report)
 
         optimize_reports.print = self.log
         if self.params.custom_settings:
             self.update_spaces()
-        if self.params.download_data:
-            downloader.download_data_for_strategy(self.strategy, self.config, self.params)
+        self.download_data()
         pargs = Arguments(self.command.command_string.split()).get_parsed_arg()
         config = setup_optimize_configuration(pargs, RunMode.BACKTEST)
         bt = backtesting.Backtesting(config)
+        if self.data_loader:
+            self.data_loader.attach(bt)
+        if self.params.cache_indicators:
+            for s in bt.strategylist:
+                indicator_cache.attach(s)
+        if self.reuse_signals:
+            signal_cache.attach(bt, self.signal_hash)
         config["export"] = None
 
         logger.info('Running command: "freqtrade {}"', self.command.command_string)
@@ -186,6 +300,15 @@ class BacktestRunner(Runner):
         )
         return bt
 
+    def download_data(self) -> None:
+        """
+        Downloads the data needed by the backtest if `download_data` is enabled. The data is only
+        downloaded once per runner.
+        """
+        if self.params.download_data and not self.data_downloaded:
+            downloader.download_data_for_strategy(self.strategy, self.config, self.params)
+        self.data_downloaded = True
+
     @logger.catch(reraise=True)
     def execute(self) -> None:
         """
@@ -210,7 +333,7 @@ class BacktestRunner(Runner):
             success = False
         else:
             self.result_path = store_backtest_stats(
-                backtest.config["exportfilename"], backtest.results
+                backtest.config["exportfilename"], backtest.results, suffix=self.report_id[:8]
             )
             success = True
         self.write_worker.start()
@@ -220,11 +343,13 @@ class BacktestRunner(Runner):
         try:
             self.running = False
             logger.info("Elapsed time: {:.2f}", time.time() - self.start_time)
-            parameter_tools.remove_params_file(self.strategy, self.command.config.path)
+            if not self.isolated:
+                parameter_tools.remove_params_file(self.strategy, self.command.config.path)
             if success:
                 self.report = self.generate_report()
                 logger.success(f"Backtest {self.strategy} finished successfully")
             else:
+                self.error = True
                 logger.error("{} backtest failed with errors", self.strategy)
                 raise self.exception
         finally:
@@ -236,9 +361,7 @@ class BacktestRunner(Runner):
         If the backtest has a hash and the hash exists in the backtest repo, return True
         :return: A boolean value.
         """
-        if self.load_from_hash and self.hash in get_backtest_repo().get_hashes():
-            return True
-        return False
+        return self.load_from_hash and BacktestExplorer.exists(self.hash)
 
     def generate_report(self) -> BacktestReport:
         """
@@ -248,7 +371,7 @@ class BacktestRunner(Runner):
         """
         return BacktestReport(
             # _backtest_data=BacktestData(text=self.result_path.read_text()),
-            backtest_file_str=get_latest_backtest_filename(),
+            backtest_file_str=self.result_path.name,
             hyperopt_id=self.command.id,
             hash=self.hash,
             exchange=self.command.config["exchange"]["name"],
@@ -298,31 +421,77 @@ class BacktestRunner(Runner):
         """
         Saves the report to the database.
         """
-        if self.hash_exists():
+        report = self.prepare_save(tag)
+        if not report:
+            return self.report
+        with Session(engine) as session:
+            report = _add_or_update(session, report)
+            # session.add(report._backtest_data)
+            session.commit()
+            session.refresh(report)
+            # session.refresh(report._backtest_data)
+        self.report = report
+        self.on_saved(report)
+        return report
+
+    def prepare_save(self, tag: str = None) -> BacktestReport | None:
+        """
+        Prepares the report to be added to the database.
+
+        :param tag: An optional tag to save
+        :return: The report to add or to update, or None if there is nothing to save. When the
+            runner loads reports by hash and the backtest is already saved, `self.report` is set
+            to the saved report instead. A backtest that was run again updates the saved report
+            with the same hash.
+        """
+        existing = BacktestExplorer.get_by_hash(self.hash)
+        if existing and self.load_from_hash:
             logger.info("Skipping save... backtest already exists in the database")
+            self.report = existing
             print(self.report.report_text)
-            return self.report
+            return
         if not self.report:
             logger.info("Skipping save... no report generated")
             return
+        if existing:
+            logger.info("Updating the saved report {} with the same hash", existing.id)
+            self.report.id = existing.id
         try:
             self.report.trades
         except AttributeError:
             raise ValueError("No trades found in report, save can not continue.")
         if tag:
             self.report.tag = tag
-        with Session(engine) as session:
-            report = self.report
-            session.add(report)
-            # session.add(report._backtest_data)
-            session.commit()
-            session.refresh(report)
-            # session.refresh(report._backtest_data)
-            logger.info("Created report id {}: {}".format(report.id, report.performance.dict()))
-            if self.log_path.exists():
-                self.log_path.rename(paths.BACKTEST_LOG_PATH.joinpath(str(report.id) + ".log"))
-                self.report_id = report.id
-        return report
+        self.report.update_summary()
+        return self.report
+
+    def on_saved(self, report: BacktestReport) -> None:
+        """
+        Stores the trades and moves the log file of a report that was just added to the database.
+
+        :param report: The saved report
+        """
+        logger.info("Created report id {}: {}".format(report.id, report.performance.dict()))
+        try:
+            trades_store.write_report(report)
+        except Exception as e:
+            logger.warning("Could not store the trades of report {}: {}", report.id, repr(e))
+        if self.log_path.exists():
+            self.log_path.rename(paths.BACKTEST_LOG_PATH.joinpath(str(report.id) + ".log"))
+            self.report_id = report.id
+
+    def apply_worker_result(self, result: dict) -> None:
+        """
+        Applies the result of a backtest that was executed in a worker process.
+
+        :param result: The dictionary returned by the worker
+        """
+        self.report = BacktestReport(**result["report"]) if result["report"] else None
+        self.result_path = result["result_path"]
+        self.error = result["error"]
+        self.exception = result["exception"]
+        self.output_list = result["output"]
+        self.error_list = result["errors"]
 
     def performance_df(self) -> pd.DataFrame:
         """
@@ -339,7 +508,7 @@ class BacktestRunner(Runner):
         """
         It uses the hash to load the report from the database.
         """
-        self.report = get_backtest_repo().get_using_hash(self.hash)
+        self.report = BacktestExplorer.get_using_hash(self.hash)
         logger.info("Loaded report with same hash - {}", self.hash)
 
     def update_spaces(self) -> None:
@@ -359,3 +528,55 @@ class BacktestRunner(Runner):
             logger.debug(f"Setting space-setting: {s} to {v}")
             sh.add_setting(s, v)
         sh.save()
+
+
+def _add_or_update(session: Session, report: BacktestReport) -> BacktestReport:
+    """
+    Add a new report to the session, or copy a report with the id of a saved report onto the
+    saved row.
+
+    :return: The report that is saved when the session commits
+    """
+    if report.id is None:
+        session.add(report)
+        return report
+    return session.merge(report)
+
+
+# The runners of the parallel BacktestMultiRunner. Forked workers inherit this list, so only the
+# index of a runner has to be sent to a worker.
+_worker_runners: list[BacktestRunner] = []
+
+
+def _init_worker() -> None:
+    """Makes sure forked workers do not share the database connections of the parent"""
+    engine.dispose(close=False)
+
+
+def _execute_in_worker(index: int) -> dict:
+    """
+    Executes a runner of `_worker_runners` in an isolated workspace.
+
+    :param index: The index of the runner
+    :return: The results of the runner. See `BacktestRunner.apply_worker_result`.
+    """
+    runner = _worker_runners[index]
+    runner.isolated = True
+    try:
+        runner.execute()
+    except Exception as e:
+        runner.error = True
+        runner.exception = runner.exception or e
+    exception = runner.exception
+    try:
+        pickle.dumps(exception)
+    except Exception:
+        exception = RuntimeError(repr(exception))
+    return dict(
+        report=runner.report.dict() if runner.report else None,
+        result_path=runner.result_path,
+        error=runner.error,
+        exception=exception,
+        output=runner.output_list,
+        errors=runner.error_list,
+    )
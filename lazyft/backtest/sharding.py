@@ -0,0 +1,312 @@
+"""
+Runs the pairs of a backtest in shards in parallel worker processes.
+
+The pairs of a strategy that does not use the data of other pairs and that may have a trade open on
+every pair at the same time are simulated independently of each other. The pairs are split into
+shards, every shard is simulated in a forked worker process and the trades and counters of the
+shards are merged into the statistics of one backtest.
+
+The results are only identical to a regular backtest if the pairs are independent:
+
+* `max_open_trades` has to be unlimited or at least the number of pairs
+* the stake amount has to be fixed, an unlimited stake depends on the open trades of all pairs
+* the starting balance has to cover the stakes of all trades that can be open at the same time
+* protections may only lock single pairs
+
+Only the first two conditions are checked. `ShardedBacktestRunner.validate` runs the same backtest
+without shards and compares the results.
+"""
+from __future__ import annotations
+
+import math
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+import pandas as pd
+from freqtrade.data.metrics import calculate_market_change
+from freqtrade.optimize import backtesting
+from freqtrade.optimize.optimize_reports import (
+    generate_strategy_comparison,
+    generate_strategy_stats,
+)
+from loguru import logger
+
+from lazyft.backtest.commands import BacktestCommand
+from lazyft.backtest.runner import BacktestRunner, _init_worker
+from lazyft.errors import ShardingMismatchError
+from lazyft.models.backtest import BacktestReport
+from lazyft.util import store_backtest_stats
+
+# The counters of a backtest result that are summed up over the shards
+COUNTERS = (
+    "rejected_signals",
+    "timedout_entry_orders",
+    "timedout_exit_orders",
+    "canceled_trade_entries",
+    "canceled_entry_orders",
+    "replaced_entry_orders",
+)
+# The columns of the trades that have to be equal in sharded and unsharded backtests
+TRADE_COLUMNS = (
+    "pair",
+    "open_date",
+    "close_date",
+    "open_rate",
+    "close_rate",
+    "amount",
+    "profit_abs",
+    "exit_reason",
+)
+# The summary statistics that have to be equal in sharded and unsharded backtests
+SUMMARY_KEYS = (
+    "total_trades",
+    "wins",
+    "draws",
+    "losses",
+    "profit_total_abs",
+    "profit_total",
+    "final_balance",
+    "max_drawdown_abs",
+    "market_change",
+)
+
+
+def split_pairs(pairs: list[str], shards: int) -> list[list[str]]:
+    """
+    :param pairs: The pairs of the backtest
+    :param shards: The number of shards
+    :return: The pairs split into at most `shards` shards of similar size. The pairs are dealt out
+        in turn, so pairs that are listed next to each other end up in different shards.
+    """
+    shards = max(1, min(shards, len(pairs)))
+    return [pairs[i::shards] for i in range(shards)]
+
+
+class _Lock:
+    """A pair lock of a worker that was sent back as json"""
+
+    def __init__(self, data: dict) -> None:
+        self.data = data
+
+    def to_json(self) -> dict:
+        return self.data
+
+
+class ShardedBacktestRunner(BacktestRunner):
+    """
+    Runs a backtest with its pairs split into shards that are simulated in parallel.
+    """
+
+    def __init__(
+        self,
+        command: BacktestCommand,
+        shards: int = None,
+        verbose: bool = False,
+        load_from_hash: bool = True,
+        validate: bool = False,
+    ) -> None:
+        """
+        :param command: The backtest command
+        :param shards: The number of shards and worker processes. Defaults to the number of CPUs.
+        :param verbose: Print the output of the backtest
+        :param load_from_hash: Load the report of an identical earlier backtest if it exists
+        :param validate: Run the backtest without shards as well and raise a
+            `ShardingMismatchError` if the results differ
+        """
+        super().__init__(command, verbose=verbose, load_from_hash=load_from_hash, isolated=True)
+        self.shards = shards or os.cpu_count() or 1
+        self.validate_results = validate
+
+    @logger.catch(reraise=True)
+    def execute(self) -> None:
+        """
+        Executes the backtest in shards.
+        """
+        if self.hash_exists():
+            self.load_hashed()
+            return
+        success = False
+        bt = self.pre_execute()
+        self.start_time = time.time()
+        self.running = True
+        try:
+            check_shardable(bt)
+            stats = self._run_shards(bt)
+        except Exception as e:
+            self.exception = e
+        else:
+            self.result_path = store_backtest_stats(
+                bt.config["exportfilename"], stats, suffix=self.report_id[:8]
+            )
+            success = True
+        self.write_worker.start()
+        self.on_finished(success)
+        if self.validate_results:
+            self.validate()
+
+    def _run_shards(self, bt: backtesting.Backtesting) -> dict:
+        """
+        Simulates the shards in forked workers and merges their results.
+
+        :param bt: The Backtesting instance with all pairs
+        :return: The backtest statistics as freqtrade stores them
+        """
+        global _shard_backtesting
+        pair_shards = split_pairs(list(bt.pairlists.whitelist), self.shards)
+        logger.info(
+            "Backtesting {} pairs in {} shards", len(bt.pairlists.whitelist), len(pair_shards)
+        )
+        _shard_backtesting = bt
+        try:
+            with ProcessPoolExecutor(
+                max_workers=len(pair_shards),
+                mp_context=multiprocessing.get_context("fork"),
+                initializer=_init_worker,
+            ) as executor:
+                results = list(executor.map(_backtest_shard, pair_shards))
+        finally:
+            _shard_backtesting = None
+        return merge_shards(bt, results)
+
+    def validate(self) -> None:
+        """
+        Run the backtest without shards and compare the results.
+
+        :raises ShardingMismatchError: If the trades or the summary statistics differ
+        """
+        if not self.report:
+            raise ValueError("The sharded backtest has no report to validate")
+        runner = BacktestRunner(self.command, load_from_hash=False, isolated=True)
+        runner.execute()
+        compare_reports(self.report, runner.report)
+        logger.success("Sharded backtest of {} matches the unsharded backtest", self.strategy)
+
+
+def check_shardable(bt: backtesting.Backtesting) -> None:
+    """
+    :param bt: The Backtesting instance
+    :raises ValueError: If the configuration makes the pairs of the backtest depend on each other
+    """
+    pairs = len(bt.pairlists.whitelist)
+    max_open_trades = bt.config["max_open_trades"]
+    if max_open_trades != -1 and max_open_trades < pairs:
+        raise ValueError(
+            f"Sharded backtests need unlimited max_open_trades or at least one per pair, "
+            f"got {max_open_trades} for {pairs} pairs"
+        )
+    if bt.config["stake_amount"] == "unlimited":
+        raise ValueError("Sharded backtests need a fixed stake amount")
+
+
+def merge_shards(bt: backtesting.Backtesting, results: list[dict]) -> dict:
+    """
+    Merge the results of the shards into the statistics of one backtest.
+
+    :param bt: The Backtesting instance with all pairs
+    :param results: The results of `_backtest_shard`
+    :return: The backtest statistics as freqtrade stores them
+    """
+    ft_strategy = bt.strategylist[0]
+    name = ft_strategy.get_strategy_name()
+    contents = [r["content"] for r in results]
+    trades = pd.concat([c["results"] for c in contents], ignore_index=True)
+    trades = trades.sort_values(["open_date", "pair"]).reset_index(drop=True)
+    # every shard starts with the full balance
+    starting_balance = contents[0]["final_balance"] - contents[0]["results"]["profit_abs"].sum()
+    content = {
+        "results": trades,
+        "config": ft_strategy.config,
+        "locks": [_Lock(lock) for c in contents for lock in c["locks"]],
+        "final_balance": starting_balance + trades["profit_abs"].sum(),
+        "backtest_start_time": min(c["backtest_start_time"] for c in contents),
+        "backtest_end_time": max(c["backtest_end_time"] for c in contents),
+        "run_id": contents[0]["run_id"],
+    }
+    for counter in COUNTERS:
+        content[counter] = sum(c.get(counter, 0) for c in contents)
+    pair_count = sum(r["pairs"] for r in results)
+    market_change = sum(r["market_change"] * r["pairs"] for r in results) / max(pair_count, 1)
+    min_date = min(r["min_date"] for r in results)
+    max_date = max(r["max_date"] for r in results)
+    strategy_stats = generate_strategy_stats(
+        list(bt.pairlists.whitelist), name, content, min_date, max_date, market_change
+    )
+    metadata = {"run_id": content["run_id"], "backtest_start_time": content["backtest_start_time"]}
+    return {
+        "metadata": {name: metadata},
+        "strategy": {name: strategy_stats},
+        "strategy_comparison": generate_strategy_comparison(bt_stats={name: strategy_stats}),
+    }
+
+
+def compare_reports(sharded: BacktestReport, unsharded: BacktestReport) -> None:
+    """
+    Compare the trades and the summary statistics of a sharded and an unsharded backtest.
+
+    :param sharded: The report of the sharded backtest
+    :param unsharded: The report of the unsharded backtest
+    :raises ShardingMismatchError: If the results differ
+    """
+    differences = []
+    for key in SUMMARY_KEYS:
+        a, b = sharded.backtest_data.get(key), unsharded.backtest_data.get(key)
+        if not _equal(a, b):
+            differences.append(f"{key}: {a} != {b}")
+    a = _trade_frame(sharded)
+    b = _trade_frame(unsharded)
+    try:
+        pd.testing.assert_frame_equal(a, b, check_exact=False, rtol=1e-9, check_dtype=False)
+    except AssertionError as e:
+        differences.append(f"trades: {e}")
+    if differences:
+        raise ShardingMismatchError(
+            "Sharded and unsharded backtests differ:\n" + "\n".join(differences)
+        )
+
+
+def _equal(a, b) -> bool:
+    if isinstance(a, (int, float)) and isinstance(b, (int, float)):
+        return math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-12)
+    return a == b
+
+
+def _trade_frame(report: BacktestReport) -> pd.DataFrame:
+    trades = pd.DataFrame(report.backtest_data["trades"])
+    if trades.empty:
+        return trades
+    columns = [c for c in TRADE_COLUMNS if c in trades.columns]
+    return trades[columns].sort_values(["pair", "open_date"]).reset_index(drop=True)
+
+
+# The Backtesting instance of the parent process. Forked workers inherit it with the loaded config
+# and strategy, so only the pairs of a shard have to be sent to a worker.
+_shard_backtesting: Optional[backtesting.Backtesting] = None
+
+
+def _backtest_shard(pairs: list[str]) -> dict:
+    """
+    Simulates the pairs of a shard with the Backtesting instance of the parent process.
+
+    :param pairs: The pairs of the shard
+    :return: The result content of the strategy, the market change and the dates of the shard
+    """
+    bt = _shard_backtesting
+    bt.pairlists._whitelist = pairs
+    data, timerange = bt.load_bt_data()
+    bt.load_bt_data_detail()
+    ft_strategy = bt.strategylist[0]
+    min_date, max_date = bt.backtest_one_strategy(ft_strategy, data, timerange)
+    content = dict(bt.all_results[ft_strategy.get_strategy_name()])
+    # the parent has the config, the locks are database models
+    content.pop("config", None)
+    content["locks"] = [lock.to_json() for lock in content["locks"]]
+    return dict(
+        content=content,
+        market_change=calculate_market_change(data, "close"),
+        pairs=len(data),
+        min_date=min_date,
+        max_date=max_date,
+    )
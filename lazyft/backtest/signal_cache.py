@@ -0,0 +1,178 @@
+"""
+Replays the analyzed signals of earlier backtests.
+
+Backtests that only differ in their wallet settings (the starting balance, the stake amount and the
+number of open trades) generate the same entry and exit signals. The signals of the first backtest
+are kept in memory and later backtests skip populating the indicators and the signals and only run
+the trade simulation.
+"""
+from __future__ import annotations
+
+from typing import Any, Optional
+
+import attr
+import pandas as pd
+from freqtrade.optimize.backtesting import Backtesting
+from loguru import logger
+
+from lazyft import settings
+from lazyft.command_parameters import BacktestParameters
+from lazyft.result_cache import ResultCache
+
+# The arguments that only change the trade simulation
+WALLET_ARGS = tuple(
+    attr.fields_dict(BacktestParameters)[name].metadata["arg"]
+    for name in ("starting_balance", "stake_amount", "max_open_trades")
+)
+
+
+def strip_wallet_args(command_string: str) -> str:
+    """
+    :param command_string: A freqtrade backtesting command string
+    :return: The command string without the wallet arguments.
+    """
+    args = command_string.split()
+    kept = []
+    skip = False
+    for arg in args:
+        if skip:
+            skip = False
+            continue
+        if arg in WALLET_ARGS:
+            skip = True
+            continue
+        kept.append(arg)
+    return " ".join(kept)
+
+
+class SignalEntry:
+    """
+    The analyzed signals of one strategy.
+    """
+
+    def __init__(
+        self,
+        rows: dict[str, list],
+        analyzed: dict[str, pd.DataFrame],
+        trimmed: dict,
+        timeframe: str = None,
+        fee: float = None,
+    ) -> None:
+        """
+        :param rows: The rows the simulation loop iterates over, by pair
+        :param analyzed: The analyzed dataframes the data provider returns to callbacks, by pair
+        :param trimmed: The analyzed dataframes without the startup candles, by pair
+        :param timeframe: The timeframe of the dataframes
+        :param fee: The fee the backtest used
+        """
+        self.rows = rows
+        self.analyzed = analyzed
+        self.trimmed = trimmed
+        self.timeframe = timeframe
+        self.fee = fee
+
+    @property
+    def cost(self) -> int:
+        """
+        :return: The approximate memory usage of the entry in bytes.
+        """
+        frames = [*self.analyzed.values(), *self.trimmed.values()]
+        frame_bytes = sum(int(df.memory_usage(index=True).sum()) for df in frames)
+        row_bytes = sum(len(rows) * len(rows[0]) * 8 for rows in self.rows.values() if rows)
+        return frame_bytes + row_bytes
+
+
+class SignalCache:
+    """
+    Keeps the analyzed signals of backtests in memory.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        """
+        :param max_bytes: The maximum memory usage of the stored signals
+        """
+        self._cache = ResultCache(max_bytes=max_bytes)
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def get(self, key: str, strategy_name: str) -> Optional[SignalEntry]:
+        """
+        :param key: The key the signals were stored with
+        :param strategy_name: The name of the strategy
+        :return: The stored signals of the strategy or None.
+        """
+        return self._cache.get((key, strategy_name))
+
+    def attach(self, bt: Backtesting, key: str) -> None:
+        """
+        Make a Backtesting instance replay stored signals or store the signals it generates.
+
+        :param bt: The Backtesting instance
+        :param key: The key of the signals. Backtests with the same key must generate the same
+            signals.
+        """
+        state: dict[str, Optional[SignalEntry]] = {"entry": None}
+
+        for strategy in bt.strategylist:
+            self._wrap_strategy(strategy, key, state)
+
+        get_ohlcv_as_lists = bt._get_ohlcv_as_lists
+
+        def cached_get_ohlcv_as_lists(processed: dict[str, pd.DataFrame]) -> dict[str, list]:
+            entry = state["entry"]
+            if entry is not None:
+                return self._replay(bt, entry, processed)
+            entry = self._record(bt, get_ohlcv_as_lists, processed)
+            self._cache.put((key, bt.strategy.get_strategy_name()), entry, entry.cost)
+            return dict(entry.rows)
+
+        bt._get_ohlcv_as_lists = cached_get_ohlcv_as_lists
+
+    def _wrap_strategy(self, strategy: Any, key: str, state: dict) -> None:
+        advise_all_indicators = strategy.advise_all_indicators
+
+        def cached_advise_all_indicators(data: dict[str, pd.DataFrame]) -> dict:
+            state["entry"] = self.get(key, strategy.get_strategy_name())
+            if state["entry"] is None:
+                return advise_all_indicators(data)
+            logger.info("Replaying stored signals of {}", strategy.get_strategy_name())
+            # the candles are only used to find the backtest timerange
+            return dict(data)
+
+        strategy.advise_all_indicators = cached_advise_all_indicators
+
+    @staticmethod
+    def _record(bt: Backtesting, get_ohlcv_as_lists, processed: dict) -> SignalEntry:
+        analyzed = {}
+        set_cached_df = bt.dataprovider._set_cached_df
+
+        def recording_set_cached_df(pair, timeframe, dataframe, candle_type):
+            analyzed[pair] = dataframe
+            set_cached_df(pair, timeframe, dataframe, candle_type)
+
+        bt.dataprovider._set_cached_df = recording_set_cached_df
+        try:
+            rows = get_ohlcv_as_lists(processed)
+        finally:
+            bt.dataprovider._set_cached_df = set_cached_df
+        return SignalEntry(rows, analyzed, dict(processed), timeframe=bt.timeframe, fee=bt.fee)
+
+    @staticmethod
+    def _replay(bt: Backtesting, entry: SignalEntry, processed: dict) -> dict[str, list]:
+        for pair, dataframe in entry.analyzed.items():
+            bt.dataprovider._set_cached_df(
+                pair, bt.timeframe, dataframe, bt.config["candle_type_def"]
+            )
+        processed.clear()
+        processed.update(entry.trimmed)
+        return dict(entry.rows)
+
+    def clear(self) -> None:
+        """
+        Release all stored signals.
+        """
+        self._cache.clear()
+
+
+signal_cache = SignalCache(max_bytes=settings.signal_cache_max_bytes)
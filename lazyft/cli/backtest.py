@@ -25,7 +25,7 @@ def get_backtests_with_hid(h_id: int = typer.Argument(..., help="Hyperopt ID")):
     :param h_id: int = typer.Argument(..., help="Hyperopt ID")
     :type h_id: int
     """
-    reports = get_backtest_repo().filter(lambda x: x.hyperopt_id == str(h_id))
+    reports = get_backtest_repo().filter_by_hyperopt_id(h_id)
     print(reports.df().to_markdown(), width=1000)
 
 
@@ -138,3 +138,29 @@ def run_from_backtest(
         else:
             typer.echo(f"{runner.err_output}", color=True)
         raise typer.Exit(1)
+
+
+@app.command("worker")
+def worker(
+    store: str = typer.Argument(..., help="Directory of the distributed hyperopt store"),
+    run_id: str = typer.Argument(..., help="ID of the distributed hyperopt run"),
+    config: str = typer.Option(None, "-c", "--config", help="Config file to use on this host"),
+    secrets_config: str = typer.Option(
+        None, "--secrets-config", help="Secrets config file to use on this host"
+    ),
+    lease: float = typer.Option(
+        600, "--lease", help="Seconds after which unfinished points go to other workers"
+    ),
+    idle_timeout: float = typer.Option(
+        None, "--idle-timeout", help="Leave the run after this many seconds without work"
+    ),
+):
+    """
+    Evaluates the epochs of a distributed hyperopt on this host.
+    """
+    from lazyft.hyperopt.distributed import HyperoptWorker
+
+    evaluated = HyperoptWorker(
+        store, run_id, config=config, lease=lease, secrets_config=secrets_config
+    ).run(idle_timeout)
+    typer.echo(f"Evaluated {evaluated} epochs")
@@ -4,7 +4,7 @@ import datetime
 import logging
 import sys
 from pathlib import Path
-from typing import Any, Union
+from typing import Any, Iterable, Union
 
 import attr
 from freqtrade.commands import Arguments
@@ -136,6 +136,9 @@ class BacktestParameters(GlobalParameters):
     tag: str = attr.ib(default="")
     custom_spaces: str = attr.ib(default="")
     custom_settings: dict = attr.ib(factory=dict)
+    # load populated indicators from the indicator cache. Opt-in, the cache does not notice changes
+    # to modules the strategy imports or to its informative data, see lazyft.indicator_cache.
+    cache_indicators: bool = attr.ib(default=False)
 
     def __attrs_post_init__(self):
         if not self.timerange:
@@ -161,7 +164,23 @@ class BacktestParameters(GlobalParameters):
         load_from_hash=False,
         verbose=False,
         stdout=False,
+        reuse_signals=False,
+        shards=0,
     ):
+        """
+        Run a backtest of a strategy with these parameters.
+
+        :param strategy: The strategy to backtest. A hyperopt id can be appended with a dash.
+        :param load_from_hash: Load the report of an identical earlier backtest if it exists
+        :param verbose: Print the output of the backtest
+        :param stdout: Enable freqtrade logging
+        :param reuse_signals: Replay the signals of an earlier backtest in this process that only
+            differed in `starting_balance`, `stake_amount` or `max_open_trades`. Only the trade
+            simulation runs again.
+        :param shards: Split the pairs into this many shards that are simulated in parallel. Only
+            for strategies whose pairs do not depend on each other, see `lazyft.backtest.sharding`.
+        :return: The BacktestRunner
+        """
         from lazyft.backtest import commands
         from lazyft.backtest.runner import BacktestRunner
 
@@ -191,7 +210,14 @@ class BacktestParameters(GlobalParameters):
                 verbose=verbose,
                 id=strategy.id,
             )
-            runner = BacktestRunner(command, load_from_hash=load_from_hash)
+            if shards:
+                from lazyft.backtest.sharding import ShardedBacktestRunner
+
+                runner = ShardedBacktestRunner(command, shards, load_from_hash=load_from_hash)
+            else:
+                runner = BacktestRunner(
+                    command, load_from_hash=load_from_hash, reuse_signals=reuse_signals
+                )
         except Exception:
             raise StrategyNotFoundError(f'Strategy "{strategy.name}" not found')
         try:
@@ -216,9 +242,22 @@ class HyperoptParameters(BacktestParameters):
     disable_param_export: bool = attr.ib(default=True, metadata={"arg": "--disable-param-export"})
     print_all: bool = attr.ib(default=False, metadata={"arg": "--print-all"})
     ignore_missing_spaces: bool = attr.ib(default=True, metadata={"arg": "--ignore-missing-spaces"})
+    # EarlyStoppingPolicy objects, see lazyft.hyperopt.early_stopping. Runs the hyperopt in process.
+    early_stopping: list = attr.ib(factory=list)
+    # Reuse epochs evaluated by earlier hyperopts, see lazyft.hyperopt.evaluation_cache. Runs the
+    # hyperopt in process.
+    evaluation_cache: bool = attr.ib(default=False)
+    # The fractions of the timerange of a successive halving hyperopt, e.g. [0.25, 0.5, 1], see
+    # lazyft.hyperopt.multi_fidelity. The epochs are the candidates of the first fraction.
+    multi_fidelity: list[float] = attr.ib(factory=list)
+    # The best 1 / halving_rate candidates of a fraction are promoted to the next one
+    halving_rate: int = attr.ib(default=3)
     cache: str = None
 
     def __attrs_post_init__(self):
+        if self.multi_fidelity and self.early_stopping:
+            # the epochs of a successive halving hyperopt are only reported at the end
+            raise ValueError("Early stopping can not be combined with multi_fidelity")
         if not self.timerange:
             self.timerange = get_timerange(days=self.days)[0]
         if not self.tag:
@@ -235,9 +274,33 @@ class HyperoptParameters(BacktestParameters):
         verbose=False,
         background=False,
         load_hashed_strategy=False,
+        in_process=False,
+        epoch_callbacks=(),
+        warm_start: Iterable[int] = (),
+        warm_start_top_k: int = None,
+        warm_start_same_timerange=False,
     ):
+        """
+        Run a hyperopt of a strategy with these parameters.
+
+        :param strategy: The strategy to hyperopt. A hyperopt id can be appended with a dash.
+        :param autosave: Save the report when the hyperopt finished
+        :param notify: Send a notification when the hyperopt finished
+        :param verbose: Print the output of the hyperopt
+        :param background: Return while the hyperopt is running
+        :param load_hashed_strategy: Load the strategy of the hyperopt id from the database
+        :param in_process: Run freqtrade's Hyperopt in this process
+        :param epoch_callbacks: Functions called with the `EpochEvent` of every epoch. Requires
+            `in_process`.
+        :param warm_start: Ids of earlier hyperopt reports. The optimizer is told their epochs
+            before it starts. Implies `in_process`.
+        :param warm_start_top_k: Only warm start with the k epochs with the lowest loss
+        :param warm_start_same_timerange: Only warm start with reports of the same timerange
+        :return: The HyperoptRunner
+        """
         from lazyft.hyperopt import commands
         from lazyft.hyperopt.runner import HyperoptRunner
+        from lazyft.hyperopt.warm_start import warm_start_epochs
 
         if isinstance(strategy, str):
             try:
@@ -245,13 +308,29 @@ class HyperoptParameters(BacktestParameters):
             except ValueError:
                 s, id = strategy, ""
             strategy = Strategy(s, id)
+        seed_epochs = []
+        if warm_start:
+            in_process = True
+            seed_epochs = warm_start_epochs(
+                warm_start,
+                top_k=warm_start_top_k,
+                timerange=self.timerange if warm_start_same_timerange else None,
+            )
         command = commands.HyperoptCommand(
             strategy.name,
             params=self,
             id=strategy.id,
             verbose=verbose,
         )
-        runner = HyperoptRunner(command, autosave=autosave, notify=notify, verbose=verbose)
+        runner = HyperoptRunner(
+            command,
+            autosave=autosave,
+            notify=notify,
+            verbose=verbose,
+            in_process=in_process,
+            epoch_callbacks=epoch_callbacks,
+            seed_epochs=seed_epochs,
+        )
 
         try:
             runner.execute(background=background, load_strategy=load_hashed_strategy)
@@ -9,6 +9,7 @@ from freqtrade.strategy import merge_informative_pair
 from lazyft import logger, paths
 from lazyft.config import Config
 from lazyft.downloader import download_pair
+from lazyft.indicator_cache import indicator_cache
 from lazyft.paths import PAIR_DATA_DIR
 from lazyft.strategy import load_strategy
 
@@ -54,7 +55,12 @@ def load_pair_data(
 
 
 def load_and_populate_pair_data(
-    strategy_name: str, pair: str, timeframe: str, config: Config, timerange=None
+    strategy_name: str,
+    pair: str,
+    timeframe: str,
+    config: Config,
+    timerange=None,
+    cache_indicators=False,
 ) -> pd.DataFrame:
     """
     Loads pair data, populates indicators, and returns the dataframe
@@ -64,12 +70,16 @@ def load_and_populate_pair_data(
     :param timeframe: The timeframe to load data for
     :param config: The config object
     :param timerange: A TimeRange object
+    :param cache_indicators: Load the populated indicators from the indicator cache if possible.
+        Only safe while the helper modules and informative data of the strategy do not change.
     :return: A dataframe with the populated data
     """
     data = load_pair_data(pair, timeframe, config, timerange=timerange)
     from lazyft import BASIC_CONFIG
 
     strategy = load_strategy(strategy_name, BASIC_CONFIG)
+    if cache_indicators:
+        indicator_cache.attach(strategy)
     populated = strategy.advise_all_indicators({pair: data})
     return populated[pair]
 
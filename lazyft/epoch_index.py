@@ -0,0 +1,223 @@
+"""
+A sidecar index for hyperopt result files.
+
+Freqtrade writes one JSON encoded epoch per line to a `.fthypt` file. The index stores the byte
+offset of every line together with the loss, total profit and trade count of each epoch, so a
+single epoch can be read with one seek and the number of epochs or the best epoch can be looked up
+without parsing the results file.
+
+The index is saved next to the results file as `<name>.fthypt.idx` and is rebuilt when the size or
+modification time of the results file no longer matches. Results files that only grew, like the
+file of a running hyperopt, are indexed incrementally from the last indexed line.
+"""
+from __future__ import annotations
+
+import os
+import threading
+from pathlib import Path
+from typing import Optional, Union
+
+import rapidjson
+from loguru import logger
+
+INDEX_SUFFIX = ".idx"
+INDEX_VERSION = 1
+
+
+class EpochIndex:
+    """
+    Byte offsets and key metrics of every epoch in a hyperopt results file.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        size: int = 0,
+        mtime_ns: int = 0,
+        offsets: list[int] = None,
+        loss: list[float] = None,
+        profit: list[float] = None,
+        trades: list[int] = None,
+    ) -> None:
+        """
+        :param path: The path to the results file
+        :param size: The size of the results file when it was indexed
+        :param mtime_ns: The modification time of the results file when it was indexed
+        :param offsets: The byte offset of each epoch
+        :param loss: The loss of each epoch
+        :param profit: The total profit ratio of each epoch
+        :param trades: The trade count of each epoch
+        """
+        self.path = Path(path)
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.offsets = offsets or []
+        self.loss = loss or []
+        self.profit = profit or []
+        self.trades = trades or []
+
+    @property
+    def index_path(self) -> Path:
+        """
+        :return: The path of the sidecar index file.
+        """
+        return self.path.with_name(self.path.name + INDEX_SUFFIX)
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def is_current(self, stat: os.stat_result = None) -> bool:
+        """
+        :param stat: The stat result of the results file. Will be read if not provided.
+        :return: True if the index matches the results file on disk.
+        """
+        stat = stat or self.path.stat()
+        return stat.st_size == self.size and stat.st_mtime_ns == self.mtime_ns
+
+    def read(self, epoch: int) -> dict:
+        """
+        Read a single epoch from the results file.
+
+        :param epoch: The zero based epoch number. Negative numbers count from the end.
+        :raises IndexError: If the epoch does not exist.
+        :return: The epoch as it is stored in the results file.
+        """
+        offset = self.offsets[epoch]
+        with self.path.open("rb") as f:
+            f.seek(offset)
+            return rapidjson.loads(f.readline())
+
+    def best_epoch(self) -> int:
+        """
+        :raises ValueError: If the results file contains no epochs.
+        :return: The zero based number of the epoch with the lowest loss.
+        """
+        if not self.loss:
+            raise ValueError(f"No epochs found in {self.path}")
+        return min(range(len(self.loss)), key=self.loss.__getitem__)
+
+    def update(self) -> "EpochIndex":
+        """
+        Bring the index up to date with the results file. Lines appended since the last update are
+        indexed incrementally, any other change rebuilds the index.
+
+        :return: self
+        """
+        stat = self.path.stat()
+        if self.is_current(stat):
+            return self
+        start = self.size if self._only_appended(stat) else 0
+        if not start:
+            self.offsets, self.loss, self.profit, self.trades = [], [], [], []
+        self.size = self._scan(start)
+        self.mtime_ns = stat.st_mtime_ns
+        self.save()
+        return self
+
+    def save(self) -> None:
+        """
+        Write the index next to the results file.
+        """
+        data = {
+            "version": INDEX_VERSION,
+            "size": self.size,
+            "mtime_ns": self.mtime_ns,
+            "offsets": self.offsets,
+            "loss": self.loss,
+            "profit": self.profit,
+            "trades": self.trades,
+        }
+        tmp_path = self.index_path.with_name(self.index_path.name + ".tmp")
+        try:
+            tmp_path.write_text(rapidjson.dumps(data))
+            tmp_path.replace(self.index_path)
+        except OSError as e:
+            logger.warning("Could not save epoch index {}: {}", self.index_path, e)
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "EpochIndex":
+        """
+        Load the index of a results file, building or updating it if necessary.
+
+        :param path: The path to the results file
+        :return: An EpochIndex that matches the results file
+        """
+        path = Path(path)
+        index = cls._read_sidecar(path) or cls(path)
+        return index.update()
+
+    @classmethod
+    def _read_sidecar(cls, path: Path) -> Optional["EpochIndex"]:
+        index_path = path.with_name(path.name + INDEX_SUFFIX)
+        if not index_path.exists():
+            return None
+        try:
+            data = rapidjson.loads(index_path.read_text())
+        except (ValueError, OSError) as e:
+            logger.warning("Could not read epoch index {}: {}", index_path, e)
+            return None
+        if data.get("version") != INDEX_VERSION:
+            return None
+        return cls(
+            path,
+            size=data["size"],
+            mtime_ns=data["mtime_ns"],
+            offsets=data["offsets"],
+            loss=data["loss"],
+            profit=data["profit"],
+            trades=data["trades"],
+        )
+
+    def _only_appended(self, stat: os.stat_result) -> bool:
+        """Whether the results file only grew since it was indexed"""
+        if not self.size or stat.st_size < self.size:
+            return False
+        with self.path.open("rb") as f:
+            f.seek(self.size - 1)
+            return f.read(1) == b"\n"
+
+    def _scan(self, start: int) -> int:
+        """
+        Index the lines of the results file after `start`.
+
+        :return: The offset after the last complete line. A partially written last line is left for
+            the next update.
+        """
+        logger.debug("Indexing {} from byte {}", self.path, start)
+        with self.path.open("rb") as f:
+            f.seek(start)
+            offset = start
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                if line.strip():
+                    epoch = rapidjson.loads(line)
+                    metrics = epoch.get("results_metrics", {})
+                    self.offsets.append(offset)
+                    self.loss.append(epoch.get("loss"))
+                    self.profit.append(metrics.get("profit_total"))
+                    self.trades.append(metrics.get("total_trades"))
+                offset += len(line)
+        return offset
+
+
+_indexes: dict[str, EpochIndex] = {}
+_lock = threading.Lock()
+
+
+def get_epoch_index(path: Union[str, Path]) -> EpochIndex:
+    """
+    Return the up-to-date index of a hyperopt results file. Indexes are kept in memory for the
+    lifetime of the process.
+
+    :param path: The path to the results file
+    :return: The EpochIndex of the file
+    """
+    key = str(Path(path).resolve())
+    with _lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = _indexes[key] = EpochIndex.load(key)
+        else:
+            index.update()
+        return index
@@ -0,0 +1,144 @@
+"""
+A columnar copy of the epochs in a hyperopt results file.
+
+Every epoch of a `.fthypt` file is flattened into one row of a Parquet file that is saved next to
+the results file as `<name>.fthypt.parquet`. Top level values are stored under their own name,
+`results_metrics` and `params_dict` values are stored as `results_metrics.<key>` and
+`params_dict.<key>`. Durations are stored as seconds so they can be used without parsing.
+
+Only scalar values are exported. Nested values like the trades or the per pair results stay in the
+results file and are still available through `HyperoptReport.result_dict`.
+"""
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Iterable, Optional, Union
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import rapidjson
+from loguru import logger
+
+from lazyft import util
+
+STORE_SUFFIX = ".parquet"
+FLATTENED_KEYS = ("results_metrics", "params_dict")
+SOURCE_SIZE_KEY = b"lazyft.source_size"
+SOURCE_MTIME_KEY = b"lazyft.source_mtime_ns"
+
+
+def store_path(results_file: Union[str, Path]) -> Path:
+    """
+    :param results_file: The path to a hyperopt results file
+    :return: The path of the columnar store of the results file.
+    """
+    results_file = Path(results_file)
+    return results_file.with_name(results_file.name + STORE_SUFFIX)
+
+
+def flatten_epoch(epoch: dict) -> dict:
+    """
+    Flatten the scalar values of an epoch into a single row.
+
+    :param epoch: An epoch as it is stored in a hyperopt results file
+    :return: A dictionary of column names and scalar values
+    """
+    row = {}
+    for key, value in epoch.items():
+        if key in FLATTENED_KEYS and isinstance(value, dict):
+            for sub_key, sub_value in value.items():
+                if _is_scalar(sub_value):
+                    row[f"{key}.{sub_key}"] = sub_value
+        elif _is_scalar(value):
+            row[key] = value
+    if "results_metrics.holding_avg_s" not in row and "results_metrics.holding_avg" in row:
+        row["results_metrics.holding_avg_s"] = util.duration_string_to_timedelta(
+            row["results_metrics.holding_avg"]
+        ).total_seconds()
+    return row
+
+
+def export_epochs(results_file: Union[str, Path]) -> Path:
+    """
+    Write the columnar store of a hyperopt results file.
+
+    :param results_file: The path to the hyperopt results file
+    :return: The path of the written store
+    """
+    results_file = Path(results_file)
+    stat = results_file.stat()
+    rows = []
+    with results_file.open("rb") as f:
+        for line in f:
+            if line.strip():
+                rows.append(flatten_epoch(rapidjson.loads(line)))
+    df = pd.DataFrame(rows)
+    for column in df.columns[df.dtypes == object]:
+        df[column] = _normalize_object_column(df[column])
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata(
+        {
+            **(table.schema.metadata or {}),
+            SOURCE_SIZE_KEY: str(stat.st_size).encode(),
+            SOURCE_MTIME_KEY: str(stat.st_mtime_ns).encode(),
+        }
+    )
+    path = store_path(results_file)
+    tmp_path = path.with_name(path.name + ".tmp")
+    pq.write_table(table, tmp_path)
+    tmp_path.replace(path)
+    logger.debug("Exported {} epochs of {} to {}", len(df), results_file.name, path)
+    return path
+
+
+def is_current(results_file: Union[str, Path]) -> bool:
+    """
+    :param results_file: The path to the hyperopt results file
+    :return: True if the columnar store exists and matches the results file.
+    """
+    results_file = Path(results_file)
+    path = store_path(results_file)
+    if not path.exists():
+        return False
+    stat = results_file.stat()
+    try:
+        metadata = pq.read_schema(path).metadata or {}
+    except (OSError, pa.ArrowException):
+        return False
+    return metadata.get(SOURCE_SIZE_KEY) == str(stat.st_size).encode() and metadata.get(
+        SOURCE_MTIME_KEY
+    ) == str(stat.st_mtime_ns).encode()
+
+
+def read_epochs(
+    results_file: Union[str, Path], columns: Optional[Iterable[str]] = None
+) -> pd.DataFrame:
+    """
+    Read the epochs of a hyperopt results file from its columnar store. The store is written first
+    if it does not exist or is out of date.
+
+    :param results_file: The path to the hyperopt results file
+    :param columns: The columns to load. Columns that do not exist in the store are skipped.
+        Loads all columns if None.
+    :return: A dataframe with one row per epoch
+    """
+    if not is_current(results_file):
+        export_epochs(results_file)
+    path = store_path(results_file)
+    if columns is not None:
+        available = set(pq.read_schema(path).names)
+        columns = [c for c in columns if c in available]
+    return pd.read_parquet(path, columns=columns, memory_map=True)
+
+
+def _is_scalar(value) -> bool:
+    return value is None or isinstance(value, (str, int, float, bool))
+
+
+def _normalize_object_column(column: pd.Series) -> pd.Series:
+    """Store columns that mix value types as strings"""
+    types = {type(v) for v in column if v is not None and v == v}
+    if len(types) <= 1:
+        return column
+    return column.map(lambda v: v if v is None else str(v))
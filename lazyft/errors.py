@@ -8,3 +8,11 @@ class HashAlreadyExistsError(Exception):
 
 class StrategyNotFoundError(Exception):
     pass
+
+
+class ShardingMismatchError(Exception):
+    pass
+
+
+class HyperoptStoppedError(Exception):
+    pass
@@ -1,4 +1,13 @@
 from .commands import HyperoptCommand
+from .in_process import EpochEvent, InProcessHyperopt
+from .multi_fidelity import SuccessiveHalvingHyperopt
 from .runner import HyperoptManager, HyperoptRunner
 
-__all__ = ["HyperoptCommand", "HyperoptManager", "HyperoptRunner"]
+__all__ = [
+    "EpochEvent",
+    "HyperoptCommand",
+    "HyperoptManager",
+    "HyperoptRunner",
+    "InProcessHyperopt",
+    "SuccessiveHalvingHyperopt",
+]
@@ -0,0 +1,516 @@
+"""
+Spreads the epochs of one hyperopt over workers on multiple hosts.
+
+A coordinator runs the optimizer of freqtrade's Hyperopt and proposes parameter points. Workers
+evaluate the points against their own copy of the pair data and write the results back. Both sides
+only talk through an `EpochStore`, a directory on a shared file system:
+
+* ``run.json``: the strategy and the freqtrade command of the run
+* ``strategy/``: the strategy file, its parameters and its space settings
+* ``points/<id>.json``: the proposed points
+* ``claims/<id>``: the points a worker is evaluating
+* ``epochs/<id>.json``: the evaluated points
+* ``finished``: created when the coordinator stops proposing points
+
+Workers can join and leave at any time. A claim that was not completed within the lease of the
+worker is taken over by another worker, so the points of a worker that left are evaluated again.
+The coordinator saves the epochs in the order they arrive into a regular hyperopt results file, so
+the run becomes one `HyperoptReport`.
+"""
+from __future__ import annotations
+
+import multiprocessing
+import os
+import pathlib
+import shutil
+import socket
+import tempfile
+import time
+import uuid
+from typing import Any, Optional, Union
+
+import rapidjson
+from freqtrade.commands import Arguments
+from freqtrade.commands.optimize_commands import setup_optimize_configuration
+from freqtrade.enums import RunMode
+from freqtrade.optimize.hyperopt import INITIAL_POINTS, Hyperopt
+from freqtrade.optimize.hyperopt_tools import HyperoptTools, hyperopt_serializer
+
+from lazyft import logger, paths
+from lazyft.hyperopt.commands import HyperoptCommand
+from lazyft.hyperopt.runner import HyperoptRunner
+from lazyft.models.hyperopt import HyperoptReport
+
+NUMBER_MODE = rapidjson.NM_NATIVE | rapidjson.NM_NAN
+
+
+class EpochStore:
+    """
+    A directory that holds the points and epochs of distributed hyperopt runs.
+    """
+
+    def __init__(self, path: Union[str, pathlib.Path]) -> None:
+        """
+        :param path: The directory. It has to be reachable by the coordinator and all workers.
+        """
+        self.path = pathlib.Path(path)
+        # The number of proposed points and the lowest point that may still need a result, by run
+        self._proposed: dict[str, int] = {}
+        self._claim_cursors: dict[str, int] = {}
+
+    def run_dir(self, run_id: str) -> pathlib.Path:
+        return self.path / run_id
+
+    def strategy_dir(self, run_id: str) -> pathlib.Path:
+        return self.run_dir(run_id) / "strategy"
+
+    def create_run(self, spec: dict, strategy_files: list[pathlib.Path]) -> str:
+        """
+        :param spec: The strategy and the command of the run
+        :param strategy_files: The strategy file, its parameters and its space settings
+        :return: The id of the new run
+        """
+        run_id = uuid.uuid4().hex[:12]
+        run_dir = self.run_dir(run_id)
+        for name in ("strategy", "points", "claims", "epochs"):
+            (run_dir / name).mkdir(parents=True)
+        for path in strategy_files:
+            shutil.copy2(path, self.strategy_dir(run_id) / path.name)
+        _write_atomic(run_dir / "run.json", spec)
+        return run_id
+
+    def spec(self, run_id: str) -> dict:
+        return rapidjson.loads((self.run_dir(run_id) / "run.json").read_text())
+
+    def propose(self, run_id: str, points: list[list], is_random: list[bool]) -> list[str]:
+        """
+        :param run_id: The id of the run
+        :param points: The points to evaluate
+        :param is_random: Whether the points were sampled randomly
+        :return: The ids of the points
+        """
+        points_dir = self.run_dir(run_id) / "points"
+        if run_id not in self._proposed:
+            self._proposed[run_id] = len(list(points_dir.glob("*.json")))
+        ids = []
+        for point, random in zip(points, is_random):
+            point_id = _point_id(self._proposed[run_id])
+            _write_atomic(points_dir / f"{point_id}.json", {"point": point, "is_random": random})
+            self._proposed[run_id] += 1
+            ids.append(point_id)
+        return ids
+
+    def claim(self, run_id: str, worker_id: str, lease: float) -> Optional[tuple[str, list]]:
+        """
+        Claim a point that has no result and no active claim. The points are numbered, the search
+        starts at the lowest point of this store that had no result at the last claim.
+
+        :param run_id: The id of the run
+        :param worker_id: The id of the claiming worker
+        :param lease: The seconds after which the claim of another worker expires
+        :return: The id and the values of the claimed point or None
+        """
+        run_dir = self.run_dir(run_id)
+        index = self._claim_cursors.get(run_id, 0)
+        leading = True
+        while True:
+            point_id = _point_id(index)
+            path = run_dir / "points" / f"{point_id}.json"
+            if not path.exists():
+                return None
+            index += 1
+            if (run_dir / "epochs" / f"{point_id}.json").exists():
+                if leading:
+                    self._claim_cursors[run_id] = index
+                continue
+            leading = False
+            claim = run_dir / "claims" / point_id
+            if claim.exists() and time.time() - _mtime(claim) < lease:
+                continue
+            if claim.exists():
+                # only one worker can move an expired claim out of the way
+                try:
+                    os.rename(claim, claim.with_name(f"{point_id}.expired-{uuid.uuid4().hex}"))
+                except FileNotFoundError:
+                    continue
+            try:
+                fd = os.open(claim, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                continue
+            with os.fdopen(fd, "w") as f:
+                f.write(worker_id)
+            return point_id, rapidjson.loads(path.read_text())["point"]
+
+    def release(self, run_id: str, point_id: str) -> None:
+        """
+        Give up the claim of a point so that another worker can evaluate it.
+        """
+        (self.run_dir(run_id) / "claims" / point_id).unlink(missing_ok=True)
+
+    def put_result(self, run_id: str, point_id: str, result: dict) -> None:
+        """
+        :param run_id: The id of the run
+        :param point_id: The id of the evaluated point
+        :param result: The epoch as freqtrade's Hyperopt generates it
+        """
+        _write_atomic(self.run_dir(run_id) / "epochs" / f"{point_id}.json", result)
+
+    def results(self, run_id: str, point_ids: list[str]) -> dict[str, dict]:
+        """
+        :param run_id: The id of the run
+        :param point_ids: The ids of the points to look up
+        :return: The epochs of the points that were evaluated
+        """
+        epochs_dir = self.run_dir(run_id) / "epochs"
+        found = {}
+        for point_id in point_ids:
+            path = epochs_dir / f"{point_id}.json"
+            if path.exists():
+                found[point_id] = rapidjson.loads(path.read_text(), number_mode=NUMBER_MODE)
+        return found
+
+    def finish(self, run_id: str) -> None:
+        (self.run_dir(run_id) / "finished").touch()
+
+    def is_finished(self, run_id: str) -> bool:
+        return (self.run_dir(run_id) / "finished").exists()
+
+
+class DistributedHyperopt:
+    """
+    Coordinates a hyperopt whose epochs are evaluated by `HyperoptWorker`s.
+    """
+
+    def __init__(
+        self,
+        command: HyperoptCommand,
+        store: Union[EpochStore, str, pathlib.Path],
+        batch_size: int = 8,
+        poll_interval: float = 1.0,
+        autosave: bool = True,
+    ) -> None:
+        """
+        :param command: The hyperopt command. `epochs` is the number of epochs of the run.
+        :param store: The store the workers read the points from
+        :param batch_size: The number of points that are waiting for workers at any time. Should
+            be at least the number of workers.
+        :param poll_interval: The seconds between looking for new epochs
+        :param autosave: Save the report when the run finished
+        """
+        self.store = store if isinstance(store, EpochStore) else EpochStore(store)
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.runner = HyperoptRunner(command, autosave=autosave, notify=False, isolated=True)
+        self.run_id: Optional[str] = None
+        self.stop_requested = False
+
+    @property
+    def report(self) -> Optional[HyperoptReport]:
+        return self.runner.report
+
+    def execute(self, local_workers: int = 0) -> Optional[HyperoptReport]:
+        """
+        Run the hyperopt until all epochs were evaluated.
+
+        :param local_workers: The number of workers to start as processes on this host
+        :return: The report of the run
+        """
+        runner = self.runner
+        runner.pre_execute()
+        runner.running = True
+        runner.write_worker.start()
+        success = True
+        processes = []
+        try:
+            hyperopt = self._load_hyperopt()
+            self.run_id = self.store.create_run(
+                {"strategy": runner.strategy, "command": runner.command.command_string},
+                [
+                    p
+                    for p in runner.tmp_strategy_path.iterdir()
+                    if p.is_file() and not p.is_symlink()
+                ],
+            )
+            logger.info("Started distributed hyperopt {} in {}", self.run_id, self.store.path)
+            processes = start_local_workers(self.store, self.run_id, local_workers)
+            self._optimize(hyperopt)
+        except Exception as e:
+            logger.exception(e)
+            runner.exception = e
+            success = False
+        finally:
+            if self.run_id:
+                self.store.finish(self.run_id)
+            for p in processes:
+                p.join()
+        runner.on_finished(None, success, None)
+        return runner.report
+
+    def stop(self) -> None:
+        """
+        Stop proposing points. The run finishes with the epochs evaluated so far, the points that
+        were not evaluated yet are dropped.
+        """
+        self.stop_requested = True
+
+    def _load_hyperopt(self) -> Hyperopt:
+        args = Arguments(self.runner.command.command_string.split()).get_parsed_arg()
+        config = setup_optimize_configuration(args, RunMode.HYPEROPT)
+        hyperopt = Hyperopt(config)
+        hyperopt.init_spaces()
+        hyperopt.random_state = hyperopt._set_random_state(config.get("hyperopt_random_state"))
+        hyperopt.opt = hyperopt.get_optimizer(hyperopt.dimensions, self.batch_size)
+        return hyperopt
+
+    def _optimize(self, hyperopt: Hyperopt) -> None:
+        """
+        Propose points and save the arriving epochs until the run has all its epochs.
+        """
+        epochs = hyperopt.total_epochs
+        outstanding: dict[str, tuple[list, bool]] = {}
+        proposed = 0
+        saved = 0
+        while saved < epochs:
+            stopping = self.stop_requested
+            free = min(self.batch_size - len(outstanding), epochs - proposed)
+            if free > 0 and not stopping:
+                asked, is_random = hyperopt.get_asked_points(n_points=free)
+                ids = self.store.propose(self.run_id, asked, is_random)
+                outstanding.update(zip(ids, zip(asked, is_random)))
+                proposed += len(ids)
+            results = self.store.results(self.run_id, list(outstanding))
+            if not results:
+                if stopping:
+                    break
+                time.sleep(self.poll_interval)
+                continue
+            hyperopt.opt.tell(
+                [outstanding[i][0] for i in results], [r["loss"] for r in results.values()]
+            )
+            for point_id, result in results.items():
+                saved += 1
+                result["current_epoch"] = saved
+                result["is_initial_point"] = saved <= INITIAL_POINTS
+                result["is_random"] = outstanding.pop(point_id)[1]
+                result["is_best"] = HyperoptTools.is_best_loss(result, hyperopt.current_best_loss)
+                if result["is_best"]:
+                    hyperopt.current_best_loss = result["loss"]
+                hyperopt._save_result(result)
+            logger.info(
+                "Distributed hyperopt {}: {}/{} epochs, best loss {:.5f}",
+                self.run_id,
+                saved,
+                epochs,
+                hyperopt.current_best_loss,
+            )
+            if stopping:
+                break
+        if outstanding:
+            # the workers may have left, waiting for these points could take forever
+            logger.info("Stopped with {} points that were not evaluated", len(outstanding))
+
+
+class HyperoptWorker:
+    """
+    Evaluates the points of a distributed hyperopt.
+    """
+
+    def __init__(
+        self,
+        store: Union[EpochStore, str, pathlib.Path],
+        run_id: str,
+        config: str = None,
+        worker_id: str = None,
+        lease: float = 600,
+        poll_interval: float = 1.0,
+        secrets_config: str = None,
+    ) -> None:
+        """
+        :param store: The store of the coordinator
+        :param run_id: The id of the run
+        :param config: The config to use instead of the config of the coordinator. The secrets
+            config of the coordinator is kept.
+        :param worker_id: The id of the worker. Defaults to the host name and the process id.
+        :param lease: The seconds after which the points this worker claimed are given to other
+            workers. Has to be longer than the evaluation of one point.
+        :param poll_interval: The seconds between looking for new points
+        :param secrets_config: The secrets config to use instead of the one of the coordinator
+        """
+        self.store = store if isinstance(store, EpochStore) else EpochStore(store)
+        self.run_id = run_id
+        self.config = config
+        self.secrets_config = secrets_config
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.lease = lease
+        self.poll_interval = poll_interval
+        self.evaluated = 0
+        self.stop_requested = False
+
+    def run(self, idle_timeout: float = None) -> int:
+        """
+        Evaluate points until the run is finished or the worker is stopped.
+
+        :param idle_timeout: Leave the run after this many seconds without a point to evaluate
+        :return: The number of evaluated points
+        """
+        spec = self.store.spec(self.run_id)
+        workspace = self._create_workspace()
+        try:
+            hyperopt = self._load_hyperopt(spec["command"], workspace)
+            logger.info("Worker {} joined hyperopt {}", self.worker_id, self.run_id)
+            idle_since = time.time()
+            while not self.stop_requested and not self.store.is_finished(self.run_id):
+                claimed = self.store.claim(self.run_id, self.worker_id, self.lease)
+                if not claimed:
+                    if idle_timeout is not None and time.time() - idle_since > idle_timeout:
+                        break
+                    time.sleep(self.poll_interval)
+                    continue
+                self._evaluate(hyperopt, *claimed)
+                idle_since = time.time()
+        finally:
+            shutil.rmtree(workspace, ignore_errors=True)
+        logger.info(
+            "Worker {} left hyperopt {} after {} epochs",
+            self.worker_id,
+            self.run_id,
+            self.evaluated,
+        )
+        return self.evaluated
+
+    def stop(self) -> None:
+        """
+        Leave the run after the current point.
+        """
+        self.stop_requested = True
+
+    def _evaluate(self, hyperopt: Hyperopt, point_id: str, point: list) -> None:
+        try:
+            result = hyperopt.generate_optimizer(point)
+        except BaseException:
+            self.store.release(self.run_id, point_id)
+            raise
+        # round trip through json, the coordinator reads the epoch from a file
+        result = rapidjson.loads(
+            rapidjson.dumps(result, default=hyperopt_serializer, number_mode=NUMBER_MODE),
+            number_mode=NUMBER_MODE,
+        )
+        self.store.put_result(self.run_id, point_id, result)
+        self.evaluated += 1
+
+    def _create_workspace(self) -> pathlib.Path:
+        """
+        Create a folder with the strategy files of the run, the other files of the local strategy
+        folder and the local pair data.
+        """
+        workspace = pathlib.Path(tempfile.mkdtemp(prefix=f"lazyft-worker-{self.run_id}_"))
+        run_files = list(self.store.strategy_dir(self.run_id).iterdir())
+        names = {p.name for p in run_files}
+        if paths.STRATEGY_DIR.exists():
+            for path in paths.STRATEGY_DIR.iterdir():
+                if path.name not in names:
+                    os.symlink(str(path.resolve()), str(workspace / path.name))
+        for path in run_files:
+            shutil.copy2(path, workspace / path.name)
+        for name in ("data", "hyperopt_results"):
+            link = workspace / name
+            if link.exists() or link.is_symlink():
+                link.unlink()
+        os.symlink(str(paths.USER_DATA_DIR.joinpath("data").resolve()), str(workspace / "data"))
+        # freqtrade keeps the prepared data in the results folder
+        (workspace / "hyperopt_results").mkdir()
+        return workspace
+
+    def _load_hyperopt(self, command: str, workspace: pathlib.Path) -> Hyperopt:
+        args = command.split()
+        for flag in ("--user-data-dir", "--strategy-path"):
+            args = _set_arg(args, flag, str(workspace))
+        args = _set_arg(args, "--logfile", None)
+        # the config comes first, the secrets config second
+        if self.config:
+            args = _replace_arg(args, "-c", self.config)
+        if self.secrets_config:
+            args = _replace_arg(args, "-c", self.secrets_config, occurrence=1)
+        config = setup_optimize_configuration(Arguments(args).get_parsed_arg(), RunMode.HYPEROPT)
+        hyperopt = Hyperopt(config)
+        hyperopt.init_spaces()
+        hyperopt.prepare_hyperopt_data()
+        return hyperopt
+
+
+def start_local_workers(
+    store: EpochStore, run_id: str, count: int, **kwargs: Any
+) -> list[multiprocessing.Process]:
+    """
+    Start workers as processes on this host.
+
+    :param store: The store of the run
+    :param run_id: The id of the run
+    :param count: The number of workers
+    :param kwargs: Passed to `HyperoptWorker`
+    :return: The started processes
+    """
+    context = multiprocessing.get_context("fork")
+    processes = []
+    for _ in range(count):
+        process = context.Process(
+            target=_run_worker, args=(str(store.path), run_id), kwargs=kwargs, daemon=True
+        )
+        process.start()
+        processes.append(process)
+    return processes
+
+
+def _run_worker(store_path: str, run_id: str, **kwargs: Any) -> None:
+    HyperoptWorker(store_path, run_id, **kwargs).run()
+
+
+def _set_arg(args: list[str], flag: str, value: Optional[str]) -> list[str]:
+    """
+    :return: The arguments without any occurrence of `flag`, followed by `flag value` unless the
+        value is None.
+    """
+    kept = []
+    skip = False
+    for arg in args:
+        if skip:
+            skip = False
+            continue
+        if arg == flag:
+            skip = True
+            continue
+        kept.append(arg)
+    if value is not None:
+        kept += [flag, value]
+    return kept
+
+
+def _replace_arg(args: list[str], flag: str, value: str, occurrence: int = 0) -> list[str]:
+    """
+    :return: The arguments with the value of the `occurrence`th `flag` replaced. `flag value` is
+        appended if the flag occurs fewer times.
+    """
+    args = list(args)
+    positions = [i for i, arg in enumerate(args[:-1]) if arg == flag]
+    if occurrence < len(positions):
+        args[positions[occurrence] + 1] = value
+    else:
+        args += [flag, value]
+    return args
+
+
+def _point_id(index: int) -> str:
+    return f"{index:07d}"
+
+
+def _write_atomic(path: pathlib.Path, data: Any) -> None:
+    tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex}")
+    tmp.write_text(rapidjson.dumps(data, default=hyperopt_serializer, number_mode=NUMBER_MODE))
+    os.replace(tmp, path)
+
+
+def _mtime(path: pathlib.Path) -> float:
+    try:
+        return path.stat().st_mtime
+    except FileNotFoundError:
+        return 0
@@ -0,0 +1,120 @@
+"""
+Policies that stop a hyperopt before all of its epochs ran.
+
+The policies are checked with every epoch of an in-process hyperopt. When a policy triggers, the
+hyperopt stops before the next batch of epochs and finishes like a complete run, so its report is
+generated and saved as usual.
+
+Example::
+
+    params = HyperoptParameters(
+        epochs=2000,
+        early_stopping=[NoImprovement(300), TimeBudget(3 * 3600)],
+        ...
+    )
+"""
+from __future__ import annotations
+
+import abc
+import math
+import time
+from collections import deque
+
+from lazyft.hyperopt.in_process import EpochEvent
+
+
+class EarlyStoppingPolicy(abc.ABC):
+    """
+    Decides after every epoch whether a hyperopt should stop.
+    """
+
+    def reset(self) -> None:
+        """
+        Forget the epochs of an earlier run. Called when a hyperopt starts.
+        """
+
+    @abc.abstractmethod
+    def update(self, event: EpochEvent) -> bool:
+        """
+        :param event: The latest epoch
+        :return: True if the hyperopt should stop.
+        """
+
+
+class NoImprovement(EarlyStoppingPolicy):
+    """
+    Stops when the best loss did not improve for a number of epochs.
+    """
+
+    def __init__(self, patience: int) -> None:
+        """
+        :param patience: The number of epochs without a new best loss
+        """
+        self.patience = patience
+        self.reset()
+
+    def reset(self) -> None:
+        self.best = math.inf
+        self.best_epoch = 0
+
+    def update(self, event: EpochEvent) -> bool:
+        if event.loss < self.best:
+            self.best = event.loss
+            self.best_epoch = event.epoch
+        return event.epoch - self.best_epoch >= self.patience
+
+    def __repr__(self) -> str:
+        return f"NoImprovement(patience={self.patience})"
+
+
+class RelativeImprovement(EarlyStoppingPolicy):
+    """
+    Stops when the best loss improved by less than a fraction over a window of epochs.
+    """
+
+    def __init__(self, window: int, epsilon: float) -> None:
+        """
+        :param window: The number of epochs to compare the best loss over
+        :param epsilon: The minimum relative improvement of the best loss within the window
+        """
+        self.window = window
+        self.epsilon = epsilon
+        self.reset()
+
+    def reset(self) -> None:
+        self.best = math.inf
+        self.history: deque[float] = deque(maxlen=self.window + 1)
+
+    def update(self, event: EpochEvent) -> bool:
+        self.best = min(self.best, event.loss)
+        self.history.append(self.best)
+        if len(self.history) <= self.window or math.isinf(self.history[0]):
+            return False
+        previous = self.history[0]
+        improvement = (previous - self.best) / max(abs(previous), 1e-12)
+        return improvement < self.epsilon
+
+    def __repr__(self) -> str:
+        return f"RelativeImprovement(window={self.window}, epsilon={self.epsilon})"
+
+
+class TimeBudget(EarlyStoppingPolicy):
+    """
+    Stops when the hyperopt ran for a number of seconds.
+    """
+
+    def __init__(self, seconds: float) -> None:
+        """
+        :param seconds: The wall clock budget of the hyperopt
+        """
+        self.seconds = seconds
+        self.reset()
+
+    def reset(self) -> None:
+        self.start = time.monotonic()
+
+    def update(self, event: EpochEvent) -> bool:
+        return time.monotonic() - self.start >= self.seconds
+
+    def __repr__(self) -> str:
+        return f"TimeBudget(seconds={self.seconds})"
@@ -0,0 +1,226 @@
+"""
+A persistent cache of evaluated hyperopt epochs.
+
+The optimizer regularly proposes parameter sets that were already evaluated, in the same run or in
+an earlier run over the same data. An epoch only depends on the parameter values and the context
+of the run, so the result of an earlier evaluation can be returned instead of running the backtest
+again. The key of an epoch is a hash of:
+
+* the source of the strategy file, its space handler settings and its parameter values,
+* the parameter values of the epoch,
+* the timerange and the pairs of the hyperopt,
+* the settings of the config that change the simulation or the loss,
+* a fingerprint of the candles of every pair.
+
+The epochs are stored with diskcache in `CACHE_DIR/evaluations` and the least recently used
+epochs are removed once the cache exceeds its size budget.
+"""
+from __future__ import annotations
+
+from typing import Any, Optional
+
+import attr
+import diskcache
+import pandas as pd
+import rapidjson
+from freqtrade.optimize.hyperopt import Hyperopt
+from loguru import logger
+
+from lazyft import paths, settings, util
+from lazyft.indicator_cache import candle_fingerprint, parameter_values, strategy_source_hash
+
+CACHE_VERSION = 1
+# The config settings that change the result or the loss of an epoch
+CONFIG_KEYS = (
+    "stake_currency",
+    "stake_amount",
+    "max_open_trades",
+    "dry_run_wallet",
+    "fee",
+    "timeframe",
+    "timeframe_detail",
+    "trading_mode",
+    "margin_mode",
+    "hyperopt_loss",
+    "hyperopt_min_trades",
+    "minimal_roi",
+    "stoploss",
+    "trailing_stop",
+    "trailing_stop_positive",
+    "trailing_stop_positive_offset",
+    "trailing_only_offset_is_reached",
+    "use_exit_signal",
+    "exit_profit_only",
+    "exit_profit_offset",
+    "ignore_roi_if_entry_signal",
+    "order_types",
+    "unfilledtimeout",
+    "position_adjustment_enable",
+    "max_entry_position_adjustment",
+    "enable_protections",
+    "protections",
+    "entry_pricing",
+    "exit_pricing",
+    "spaces",
+)
+
+
+@attr.s(auto_attribs=True)
+class EvaluationStats:
+    """
+    The lookups of one hyperopt run.
+    """
+
+    hits: int = 0
+    misses: int = 0
+
+    @property
+    def lookups(self) -> int:
+        return self.hits + self.misses
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.lookups if self.lookups else 0.0
+
+    def __str__(self) -> str:
+        return f"{self.hits}/{self.lookups} cached epochs ({self.hit_rate:.1%})"
+
+
+def config_fingerprint(config: dict) -> str:
+    """
+    :param config: A freqtrade config
+    :return: A hash of the settings of the config that change the result of an epoch.
+    """
+    relevant = {key: config.get(key) for key in CONFIG_KEYS}
+    relevant["exchange"] = config.get("exchange", {}).get("name")
+    return util.hash(rapidjson.dumps(relevant, sort_keys=True, default=str))
+
+
+def data_fingerprint(data: dict[str, pd.DataFrame]) -> str:
+    """
+    :param data: The candles of the hyperopt by pair
+    :return: A hash of the pairs and their candles.
+    """
+    return util.hash(sorted((pair, candle_fingerprint(df)) for pair, df in data.items()))
+
+
+class EvaluationCache:
+    """
+    Stores the evaluated epochs of hyperopts on disk.
+    """
+
+    def __init__(self, directory: Any, max_bytes: int) -> None:
+        """
+        :param directory: The directory of the cache
+        :param max_bytes: The maximum size of the stored epochs
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._cache: Optional[diskcache.Cache] = None
+
+    @property
+    def cache(self) -> diskcache.Cache:
+        if self._cache is None:
+            self._cache = diskcache.Cache(
+                str(self.directory),
+                size_limit=self.max_bytes,
+                eviction_policy="least-recently-used",
+            )
+        return self._cache
+
+    def context(self, hyperopt: Hyperopt, data: dict[str, pd.DataFrame]) -> Optional[str]:
+        """
+        :param hyperopt: The Hyperopt instance
+        :param data: The candles of the hyperopt by pair
+        :return: A hash of everything besides the parameters that an epoch depends on or None if
+            the source of the strategy can not be found.
+        """
+        strategy = hyperopt.backtesting.strategy
+        source_hash = strategy_source_hash(strategy)
+        if source_hash is None:
+            return None
+        return util.hash(
+            [
+                CACHE_VERSION,
+                source_hash,
+                sorted(parameter_values(strategy).items()),
+                hyperopt.config.get("timerange"),
+                config_fingerprint(hyperopt.config),
+                data_fingerprint(data),
+            ]
+        )
+
+    @staticmethod
+    def key(context: str, dimensions: list, point: list) -> str:
+        """
+        :param context: The context of the hyperopt, see `context`
+        :param dimensions: The dimensions of the hyperopt
+        :param point: The parameter values of the epoch
+        :return: The key of the epoch.
+        """
+        params = {d.name: _plain(value) for d, value in zip(dimensions, point)}
+        return util.hash(f"{context}-{rapidjson.dumps(params, sort_keys=True)}")
+
+    def get(self, key: str) -> Optional[dict]:
+        return self.cache.get(key)
+
+    def put(self, key: str, result: dict) -> None:
+        self.cache.set(key, result)
+
+    def attach(self, hyperopt: Hyperopt) -> EvaluationStats:
+        """
+        Make a Hyperopt instance look up its epochs in this cache and store the epochs it
+        evaluates.
+
+        :param hyperopt: The Hyperopt instance
+        :return: The statistics of the lookups of the hyperopt
+        """
+        stats = EvaluationStats()
+        state: dict[str, Optional[str]] = {"context": None}
+        load_bt_data = hyperopt.backtesting.load_bt_data
+        run_optimizer_parallel = hyperopt.run_optimizer_parallel
+
+        def fingerprinting_load_bt_data():
+            # the data is loaded once, the Backtesting instance is pickled to the job workers
+            del hyperopt.backtesting.load_bt_data
+            data, timerange = load_bt_data()
+            state["context"] = self.context(hyperopt, data)
+            if state["context"] is None:
+                logger.warning("Strategy source not found, not caching the epochs")
+            return data, timerange
+
+        def cached_run_optimizer_parallel(parallel, asked: list) -> list:
+            context = state["context"]
+            if context is None:
+                return run_optimizer_parallel(parallel, asked)
+            keys = [self.key(context, hyperopt.dimensions, point) for point in asked]
+            results = [self.get(key) for key in keys]
+            missing = [i for i, result in enumerate(results) if result is None]
+            stats.hits += len(asked) - len(missing)
+            stats.misses += len(missing)
+            if missing:
+                evaluated = run_optimizer_parallel(parallel, [asked[i] for i in missing])
+                for i, result in zip(missing, evaluated):
+                    self.put(keys[i], result)
+                    results[i] = result
+            return results
+
+        hyperopt.backtesting.load_bt_data = fingerprinting_load_bt_data
+        hyperopt.run_optimizer_parallel = cached_run_optimizer_parallel
+        return stats
+
+    def clear(self) -> None:
+        """
+        Remove all stored epochs.
+        """
+        self.cache.clear()
+
+
+def _plain(value: Any) -> Any:
+    """Converts numpy scalars to python values"""
+    return value.item() if hasattr(value, "item") else value
+
+
+evaluation_cache = EvaluationCache(
+    paths.CACHE_DIR / "evaluations", max_bytes=settings.evaluation_cache_max_bytes
+)
@@ -0,0 +1,213 @@
+"""
+Runs freqtrade's hyperopt in the current process.
+
+The hyperopt is driven through freqtrade's `Hyperopt` class instead of a `freqtrade hyperopt`
+subprocess. Every evaluated epoch is sent to the registered callbacks as an `EpochEvent` right after
+freqtrade saved it to the results file, so nothing has to be parsed from the output.
+
+The epochs are evaluated by job workers that get the `Hyperopt` instance pickled. The hooks of the
+driver capture its callbacks, which can hold threads and locks, so `HookedHyperopt` leaves them out
+of the pickled state. The workers only evaluate epochs and never call the hooks.
+"""
+from __future__ import annotations
+
+import pathlib
+from typing import Any, Callable, Iterable, Optional
+
+import attr
+from freqtrade.commands import Arguments
+from freqtrade.commands.optimize_commands import setup_optimize_configuration
+from freqtrade.enums import RunMode
+from freqtrade.optimize.hyperopt import Hyperopt
+
+from lazyft import logger
+from lazyft.hyperopt.evaluation_cache import EvaluationCache, EvaluationStats
+from lazyft.hyperopt.warm_start import seed_points
+
+
+@attr.s(frozen=True, auto_attribs=True)
+class EpochEvent:
+    """
+    An evaluated hyperopt epoch.
+    """
+
+    epoch: int
+    total_epochs: int
+    params: dict[str, Any]
+    metrics: dict[str, Any]
+    loss: float
+    is_best: bool
+    is_initial_point: bool = False
+    is_random: bool = False
+
+    @classmethod
+    def from_result(cls, result: dict, total_epochs: int) -> "EpochEvent":
+        """
+        :param result: An epoch as freqtrade's Hyperopt saves it
+        :param total_epochs: The number of epochs of the hyperopt
+        :return: The event of the epoch
+        """
+        return cls(
+            epoch=result["current_epoch"],
+            total_epochs=total_epochs,
+            params=result["params_dict"],
+            metrics=result["results_metrics"],
+            loss=result["loss"],
+            is_best=result.get("is_best", False),
+            is_initial_point=result.get("is_initial_point", False),
+            is_random=result.get("is_random", False),
+        )
+
+    def as_row(self) -> tuple[str, ...]:
+        """
+        :return: The epoch formatted like a row of freqtrade's epoch table.
+        """
+        m = self.metrics
+        currency = m.get("stake_currency", "")
+        profit = f"{m.get('profit_total_abs', 0):.8f} {currency}"
+        drawdown = "--"
+        if m.get("max_drawdown_abs") is not None:
+            drawdown = (
+                f"{m['max_drawdown_abs']:.8f} {currency} "
+                f"({m.get('max_drawdown_account', 0) * 100:.2f}%)"
+            )
+        return (
+            f"{self.epoch}/{self.total_epochs}",
+            str(m.get("total_trades", 0)),
+            f"{m.get('wins', 0)} {m.get('draws', 0)} {m.get('losses', 0)}",
+            f"{m.get('profit_mean', 0) * 100:.2f}%",
+            f"{profit} ({m.get('profit_total', 0) * 100:.2f}%)",
+            str(m.get("holding_avg", "")),
+            drawdown,
+            f"{self.loss:.5f}",
+        )
+
+
+EpochCallback = Callable[[EpochEvent], None]
+
+
+class HookedHyperopt(Hyperopt):
+    """
+    freqtrade's Hyperopt class that can be pickled to the job workers while its methods are
+    wrapped by hooks of the main process.
+    """
+
+    # The methods that are wrapped by instance attributes in the main process
+    HOOKS = ("_save_result", "run_optimizer_parallel", "get_optimizer")
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        for name in self.HOOKS:
+            state.pop(name, None)
+        return state
+
+
+def release_exchange(hyperopt: Hyperopt) -> None:
+    """
+    Close the exchange of a Hyperopt instance after its data is prepared, like `Hyperopt.start`
+    does. The epochs are evaluated by pickling the instance to the job workers, the live exchange
+    with its event loop and locks must not be sent along.
+
+    :param hyperopt: The Hyperopt instance
+    """
+    exchange = hyperopt.backtesting.exchange
+    exchange.close()
+    exchange._api = None
+    exchange._api_async = None
+    exchange.loop = None
+    exchange._loop_lock = None
+    exchange._cache_lock = None
+    hyperopt.backtesting.pairlists = None
+
+
+class InProcessHyperopt:
+    """
+    Drives freqtrade's Hyperopt class and emits an `EpochEvent` per epoch.
+    """
+
+    def __init__(
+        self,
+        command_string: str,
+        callbacks: Iterable[EpochCallback] = (),
+        seed_epochs: Iterable[dict] = (),
+        evaluation_cache: EvaluationCache = None,
+    ) -> None:
+        """
+        :param command_string: The freqtrade hyperopt command string
+        :param callbacks: Functions that are called with every evaluated epoch
+        :param seed_epochs: Epochs of earlier hyperopts the optimizer is told before it starts.
+            See `lazyft.hyperopt.warm_start`.
+        :param evaluation_cache: A cache to look up the epochs in before evaluating them
+        """
+        self.command_string = command_string
+        self.callbacks: list[EpochCallback] = list(callbacks)
+        self.seed_epochs = list(seed_epochs)
+        self.evaluation_cache = evaluation_cache
+        self.evaluation_stats: Optional[EvaluationStats] = None
+        self.stop_requested = False
+        self.hyperopt: Optional[Hyperopt] = None
+
+    def add_callback(self, callback: EpochCallback) -> None:
+        """
+        :param callback: A function that is called with every evaluated epoch
+        """
+        self.callbacks.append(callback)
+
+    def run(self) -> pathlib.Path:
+        """
+        Run the hyperopt.
+
+        :return: The results file of the hyperopt
+        """
+        args = Arguments(self.command_string.split()).get_parsed_arg()
+        config = setup_optimize_configuration(args, RunMode.HYPEROPT)
+        self.hyperopt = HookedHyperopt(config)
+        if self.evaluation_cache:
+            self.evaluation_stats = self.evaluation_cache.attach(self.hyperopt)
+        self._attach(self.hyperopt)
+        self.hyperopt.start()
+        if self.evaluation_stats:
+            logger.info("Evaluation cache: {}", self.evaluation_stats)
+        return self.hyperopt.results_file
+
+    def stop(self) -> None:
+        """
+        Stop the hyperopt before the next batch of epochs. The evaluated epochs stay saved.
+        """
+        self.stop_requested = True
+
+    def _attach(self, hyperopt: Hyperopt) -> None:
+        save_result = hyperopt._save_result
+        run_optimizer_parallel = hyperopt.run_optimizer_parallel
+        get_optimizer = hyperopt.get_optimizer
+
+        def emitting_save_result(result: dict) -> None:
+            save_result(result)
+            self._emit(EpochEvent.from_result(result, hyperopt.total_epochs))
+
+        def stoppable_run_optimizer_parallel(parallel, asked) -> list:
+            if self.stop_requested:
+                # freqtrade handles an interrupt by finishing the run with the saved epochs
+                raise KeyboardInterrupt
+            return run_optimizer_parallel(parallel, asked)
+
+        def seeded_get_optimizer(dimensions: list, cpu_count: int):
+            opt = get_optimizer(dimensions, cpu_count)
+            points, losses = seed_points(dimensions, self.seed_epochs)
+            if points:
+                logger.info("Warm starting the optimizer with {} epochs", len(points))
+                opt.tell(points, losses)
+            return opt
+
+        hyperopt._save_result = emitting_save_result
+        hyperopt.run_optimizer_parallel = stoppable_run_optimizer_parallel
+        if self.seed_epochs:
+            hyperopt.get_optimizer = seeded_get_optimizer
+
+    def _emit(self, event: EpochEvent) -> None:
+        for callback in self.callbacks:
+            try:
+                callback(event)
+            except Exception as e:
+                logger.exception(e)
+                logger.error("Epoch callback {} failed", callback)
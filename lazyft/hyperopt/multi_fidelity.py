@@ -0,0 +1,241 @@
+"""
+Multi-fidelity hyperopt with successive halving over slices of the timerange.
+
+The candidates are sampled at random from the search space, asking the optimizer for them would
+refit its estimator for every candidate. They are evaluated on the most recent part of the
+timerange first. Only the best `1 / eta` of them are promoted to the next, longer slice, until the
+remaining candidates are evaluated on the full timerange. Bad candidates are discarded after a
+short backtest instead of a backtest over the full timerange.
+
+The indicators are populated once for the full timerange and every slice reuses them, so a
+candidate gets the same result on the full timerange as in a regular hyperopt. Only the epochs of
+the full timerange are saved to the results file, each with the metrics of all slices it was
+evaluated on under the "fidelities" key. A hyperopt that is stopped before the full timerange
+saves nothing, the losses of a slice can not be ranked with those of the full timerange.
+"""
+from __future__ import annotations
+
+import math
+import pathlib
+from typing import Iterable, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from freqtrade.commands import Arguments
+from freqtrade.commands.optimize_commands import setup_optimize_configuration
+from freqtrade.enums import RunMode
+from freqtrade.optimize.hyperopt import Hyperopt
+from freqtrade.optimize.hyperopt_tools import HyperoptTools
+from joblib import Parallel, dump, load
+
+from lazyft import logger
+from lazyft.errors import HyperoptStoppedError
+from lazyft.hyperopt.in_process import (
+    EpochCallback,
+    HookedHyperopt,
+    InProcessHyperopt,
+    release_exchange,
+)
+
+# The metrics of an epoch that are kept for every slice it was evaluated on
+FIDELITY_METRICS = (
+    "total_trades",
+    "wins",
+    "draws",
+    "losses",
+    "profit_mean",
+    "profit_total",
+    "profit_total_abs",
+    "max_drawdown_account",
+)
+
+
+def promoted_count(candidates: int, eta: int) -> int:
+    """
+    :param candidates: The number of candidates of a rung
+    :param eta: The halving rate
+    :return: The number of candidates promoted to the next rung.
+    """
+    return max(1, math.ceil(candidates / eta))
+
+
+def random_candidates(space, count: int, random_state: int) -> list[list]:
+    """
+    :param space: The skopt search space of the hyperopt
+    :param count: The number of candidates
+    :param random_state: The seed of the sampling
+    :return: Up to `count` distinct random points of the space. Small spaces can have fewer.
+    """
+    rng = np.random.RandomState(random_state)
+    candidates = []
+    seen = set()
+    for _ in range(10):
+        added = 0
+        for point in space.rvs(n_samples=count - len(candidates), random_state=rng):
+            key = tuple(point)
+            if key not in seen:
+                seen.add(key)
+                candidates.append(point)
+                added += 1
+        if len(candidates) == count or not added:
+            break
+    return candidates
+
+
+def slice_processed(
+    processed: dict[str, pd.DataFrame], start: pd.Timestamp, startup_candles: int
+) -> dict[str, pd.DataFrame]:
+    """
+    :param processed: The populated dataframes of the full timerange, by pair
+    :param start: The start of the slice
+    :param startup_candles: The number of startup candles freqtrade trims before a backtest
+    :return: The dataframes from `startup_candles` candles before the start of the slice.
+    """
+    sliced = {}
+    for pair, df in processed.items():
+        first = int(df["date"].searchsorted(start))
+        sliced[pair] = df.iloc[max(0, first - startup_candles) :].reset_index(drop=True)
+    return sliced
+
+
+class SuccessiveHalvingHyperopt(InProcessHyperopt):
+    """
+    Drives freqtrade's Hyperopt class with successive halving over slices of the timerange.
+    """
+
+    def __init__(
+        self,
+        command_string: str,
+        callbacks: Iterable[EpochCallback] = (),
+        fractions: Sequence[float] = (0.25, 0.5, 1.0),
+        eta: int = 3,
+    ) -> None:
+        """
+        :param command_string: The freqtrade hyperopt command string. The epochs are the number of
+            candidates of the first rung.
+        :param callbacks: Functions that are called with the epochs of the full timerange
+        :param fractions: The increasing fractions of the timerange of each rung, ending with 1
+        :param eta: The halving rate. The best `1 / eta` of the candidates of a rung are promoted.
+        """
+        super().__init__(command_string, callbacks)
+        if not fractions or list(fractions) != sorted(fractions) or fractions[-1] != 1:
+            raise ValueError(f"Fractions must be increasing and end with 1, got {fractions}")
+        if eta < 2:
+            raise ValueError(f"The halving rate must be at least 2, got {eta}")
+        self.fractions = list(fractions)
+        self.eta = eta
+        # The candidates, loss and fraction of every evaluation
+        self.rungs: list[pd.DataFrame] = []
+
+    def run(self) -> pathlib.Path:
+        """
+        Run the hyperopt.
+
+        :return: The results file of the hyperopt
+        :raises HyperoptStoppedError: If the hyperopt was stopped before the candidates were
+            evaluated on the full timerange
+        """
+        args = Arguments(self.command_string.split()).get_parsed_arg()
+        config = setup_optimize_configuration(args, RunMode.HYPEROPT)
+        hyperopt = self.hyperopt = HookedHyperopt(config)
+        self._attach(hyperopt)
+        hyperopt.random_state = hyperopt._set_random_state(config.get("hyperopt_random_state"))
+        hyperopt.init_spaces()
+        hyperopt.prepare_hyperopt_data()
+        release_exchange(hyperopt)
+        jobs = config.get("hyperopt_jobs", -1)
+        hyperopt.opt = hyperopt.get_optimizer(hyperopt.dimensions, jobs)
+        candidates = random_candidates(
+            hyperopt.opt.space, hyperopt.total_epochs, hyperopt.random_state
+        )
+        history: list[list[dict]] = [[] for _ in candidates]
+        results = self._run_rungs(hyperopt, candidates, history, jobs)
+        if results is None:
+            raise HyperoptStoppedError(
+                "Stopped before the candidates were evaluated on the full timerange"
+            )
+        hyperopt.total_epochs = len(results)
+        for epoch, (index, result) in enumerate(sorted(results.items()), start=1):
+            result["current_epoch"] = epoch
+            result["is_initial_point"] = False
+            result["is_random"] = False
+            result["fidelities"] = history[index]
+            result["is_best"] = HyperoptTools.is_best_loss(result, hyperopt.current_best_loss)
+            if result["is_best"]:
+                hyperopt.current_best_loss = result["loss"]
+            hyperopt._save_result(result)
+        return hyperopt.results_file
+
+    def _run_rungs(
+        self, hyperopt: Hyperopt, candidates: list, history: list[list[dict]], jobs: int
+    ) -> Optional[dict[int, dict]]:
+        """
+        Evaluate the candidates on increasing slices of the timerange.
+
+        :return: The results of the full timerange by candidate index or None if the hyperopt was
+            stopped before
+        """
+        processed = load(hyperopt.data_pickle_file)
+        full_pickle = hyperopt.data_pickle_file
+        full_min, full_max = hyperopt.min_date, hyperopt.max_date
+        startup = hyperopt.backtesting.required_startup
+        survivors = list(range(len(candidates)))
+        results: Optional[dict[int, dict]] = None
+        try:
+            with Parallel(n_jobs=jobs) as parallel:
+                for rung, fraction in enumerate(self.fractions):
+                    start = full_max - (full_max - full_min) * fraction
+                    hyperopt.data_pickle_file = full_pickle.with_name(
+                        f"{full_pickle.stem}_rung{rung}{full_pickle.suffix}"
+                    )
+                    dump(slice_processed(processed, start, startup), hyperopt.data_pickle_file)
+                    hyperopt.min_date = start
+                    try:
+                        evaluated = hyperopt.run_optimizer_parallel(
+                            parallel, [candidates[i] for i in survivors]
+                        )
+                    except KeyboardInterrupt:
+                        logger.warning("Stopped before the {:.0%} slice", fraction)
+                        return None
+                    rung_results = dict(zip(survivors, evaluated))
+                    self._record(rung, fraction, start, rung_results, history)
+                    ranked = sorted(rung_results, key=lambda i: rung_results[i]["loss"])
+                    logger.info(
+                        "Rung {} ({:.0%} of the timerange): {} candidates, best loss {:.5f}",
+                        rung,
+                        fraction,
+                        len(ranked),
+                        rung_results[ranked[0]]["loss"],
+                    )
+                    survivors = sorted(ranked[: promoted_count(len(ranked), self.eta)])
+                    results = rung_results
+        finally:
+            for path in full_pickle.parent.glob(f"{full_pickle.stem}_rung*{full_pickle.suffix}"):
+                path.unlink()
+            hyperopt.data_pickle_file = full_pickle
+            hyperopt.min_date = full_min
+        return results
+
+    def _record(
+        self,
+        rung: int,
+        fraction: float,
+        start,
+        results: dict[int, dict],
+        history: list[list[dict]],
+    ) -> None:
+        """
+        Keep the metrics of the candidates of a rung in their history and in `self.rungs`.
+        """
+        rows = []
+        for index, result in results.items():
+            metrics = result["results_metrics"]
+            fidelity = {
+                "fraction": fraction,
+                "start": str(start),
+                "loss": result["loss"],
+                **{key: metrics.get(key) for key in FIDELITY_METRICS},
+            }
+            history[index].append(fidelity)
+            rows.append({"rung": rung, "candidate": index, **fidelity})
+        self.rungs.append(pd.DataFrame(rows))
@@ -1,11 +1,13 @@
 from __future__ import annotations
 
+import os
 import pathlib
-import re
+import shutil
 import time
-from queue import Queue
-from threading import Thread
-from typing import Optional
+from collections import deque
+from queue import Empty, Queue
+from threading import Lock, Thread
+from typing import Iterable, Optional
 
 import pandas as pd
 import rapidjson
@@ -16,6 +18,7 @@ from sqlmodel import Session
 
 from lazyft import (
     downloader,
+    epoch_store,
     hyperopt,
     logger,
     parameter_tools,
@@ -24,21 +27,17 @@ from lazyft import (
     strategy,
 )
 from lazyft.database import engine
+from lazyft.hyperopt.early_stopping import EarlyStoppingPolicy
+from lazyft.hyperopt.evaluation_cache import EvaluationStats, evaluation_cache
+from lazyft.hyperopt.in_process import EpochCallback, EpochEvent, InProcessHyperopt
+from lazyft.hyperopt.multi_fidelity import SuccessiveHalvingHyperopt
+from lazyft.hyperopt.tailer import EpochTailer, parse_epoch_rows
 from lazyft.models.hyperopt import HyperoptReport
 from lazyft.notify import notify_telegram
 from lazyft.reports import get_hyperopt_repo
 from lazyft.space_handler import SpaceHandler
 from lazyft.util import get_last_hyperopt_file_name
 
-EPOCH_LINE_REGEX = re.compile(
-    r"(?P<epoch>[\d/]+)[\s|]+(?P<trades>[\d/]+)[\s|]+"
-    r"(?P<wins_draws_losses>\d+\s+\d+\s+\d+)[\s|]+"
-    r"(?P<average_profit>[\d.-]+%)[\s|]+"
-    r"(?P<profit>[\d.-]+ \w+\s+\([\d.,-]+%\))[\s|]+"
-    r"(?P<average_duration>\d+ \w+ [\d:]+)[\s|]+"
-    r"(?P<max_drawdown>(?:[\d.-]+ (\w+\s+)\([\d.]+%\))?(?:--)?)[\s|]+"
-    r"(?P<objective>[\d.,-]+)"
-)
 logger_exec = logger.bind(type="hyperopt")
 columns = [
     "Epoch",
@@ -52,28 +51,64 @@ columns = [
 ]
 
 
+# Downloads of concurrent hyperopts would write the same data files at the same time
+_download_lock = Lock()
+
+
 class HyperoptManager:
-    def __init__(self, commands: list[hyperopt.HyperoptCommand], autosave: bool = True) -> None:
+    def __init__(
+        self,
+        commands: list[hyperopt.HyperoptCommand],
+        autosave: bool = True,
+        max_concurrent: int = 1,
+        cpu_budget: int = None,
+    ) -> None:
         """
-        Runs multiple instances of HyperoptRunner sequentially.
+        Runs multiple instances of HyperoptRunner, `max_concurrent` at a time.
 
         :param commands: A list of HyperoptCommand objects that will be passed to the runner.
         :param autosave: If True, the results will be saved to the database on completion.
+        :param max_concurrent: The number of hyperopts that run at the same time. Concurrent
+            hyperopts run in isolated workspaces.
+        :param cpu_budget: The number of cores shared by the concurrent hyperopts. Every hyperopt
+            gets `cpu_budget // max_concurrent` job workers. Defaults to the number of CPUs if
+            `max_concurrent` is above 1, otherwise the job workers of the commands are used.
         """
         self.commands = commands
         self.autosave = autosave
+        self.max_concurrent = max(1, max_concurrent)
+        self.cpu_budget = cpu_budget
         self.stop_flag = False
         self.running = False
 
         self.queue = Queue()
         self.reports: list[HyperoptReport] = []
         self.runners: list[HyperoptRunner] = []
-        self.current_runner: Optional[HyperoptRunner] = None
+        self.current_runners: list[HyperoptRunner] = []
         self.failed_runners: list[HyperoptRunner] = []
         self.thread: Optional[Thread] = None
+        isolated = self.max_concurrent > 1
         for c in self.commands:
-            self.queue.put(HyperoptRunner(c, autosave=True))
-            self.runners.append(HyperoptRunner(c))
+            r = HyperoptRunner(c, autosave=True, isolated=isolated)
+            if isolated or cpu_budget:
+                r.params.jobs = self.jobs_per_run
+            self.queue.put(r)
+            self.runners.append(r)
+
+    @property
+    def jobs_per_run(self) -> int:
+        """
+        :return: The number of job workers of every hyperopt.
+        """
+        budget = self.cpu_budget or os.cpu_count() or 1
+        return max(1, budget // self.max_concurrent)
+
+    @property
+    def current_runner(self) -> Optional[HyperoptRunner]:
+        """
+        :return: The first of the running hyperopts.
+        """
+        return self.current_runners[0] if self.current_runners else None
 
     def execute(self):
         """
@@ -89,21 +124,43 @@ class HyperoptManager:
 
     def _runner(self):
         """
-        Runs each HyperoptRunner found in the queue.
+        Runs the HyperoptRunners found in the queue in `max_concurrent` threads.
         """
         self.running = True
-        while not self.queue.empty() and not self.stop_flag:
-            r: HyperoptRunner = self.queue.get(timeout=5)
-            self.current_runner = r
-            # noinspection PyBroadException
+        if self.max_concurrent > 1:
+            logger.info(
+                "Running {} hyperopts at a time with {} job workers each",
+                self.max_concurrent,
+                self.jobs_per_run,
+            )
+        threads = [Thread(target=self._worker) for _ in range(self.max_concurrent)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.running = False
+        notify_telegram("Hyperopt Manager", "Finished hyperopting")
+
+    def _worker(self):
+        """
+        Runs HyperoptRunners from the queue until it is empty or the manager is stopped.
+        """
+        while not self.stop_flag:
+            try:
+                r: HyperoptRunner = self.queue.get_nowait()
+            except Empty:
+                return
+            self.current_runners.append(r)
             try:
                 r.execute()
-
+            except Exception as e:
+                # e.g. a hyperopt id of another strategy, the queue goes on with the next runner
+                logger.exception(e)
+                r.exception = e
+                r.error = True
             finally:
-                self.on_finished(r)
-        self.running = False
-        self.current_runner = None
-        notify_telegram("Hyperopt Manager", "Finished hyperopting")
+                self.current_runners.remove(r)
+            self.on_finished(r)
 
     def on_finished(self, runner: "HyperoptRunner"):
         """
@@ -116,10 +173,16 @@ class HyperoptManager:
             logger.error("Failed while hyperopting {}", runner.strategy)
             logger.error(runner.output[-300:])
             self.failed_runners.append(runner)
-        else:
-            logger.info("Hyperopt finished {}", runner.strategy)
-            if self.autosave:
+            return
+        logger.info("Hyperopt finished {}", runner.strategy)
+        if self.autosave:
+            try:
                 runner.save()
+            except Exception as e:
+                logger.exception(e)
+                logger.error("Failed to save the hyperopt of {}", runner.strategy)
+                runner.exception = e
+                self.failed_runners.append(runner)
 
     def stop(self):
         """
@@ -128,9 +191,11 @@ class HyperoptManager:
         :return: None
         """
         # clear queue
+        self.stop_flag = True
         while not self.queue.empty():
             self.queue.get(block=False)
-        self.current_runner.stop()
+        for r in list(self.current_runners):
+            r.stop()
 
     # def generate_reports(self):
     #     for r in self.runners:
@@ -149,6 +214,10 @@ class HyperoptRunner(runner.Runner):
         autosave=False,
         notify: bool = True,
         verbose: bool = False,
+        isolated: bool = False,
+        in_process: bool = False,
+        epoch_callbacks: Iterable[EpochCallback] = (),
+        seed_epochs: Iterable[dict] = (),
     ) -> None:
         """
         Runs a single instance of HyperoptRunner.
@@ -157,11 +226,34 @@ class HyperoptRunner(runner.Runner):
         :param autosave: If True, the results will be saved to the database on completion.
         :param notify: If True, a notification will be sent on finish.
         :param verbose: If True, more output will be printed to the console.
+        :param isolated: If True, the hyperopt runs in a temporary copy of the strategy folder
+            with its own results folder, so it can run at the same time as other hyperopts.
+        :param in_process: If True, freqtrade's Hyperopt runs in this process instead of a
+            `freqtrade hyperopt` subprocess and the epochs are collected as `EpochEvent`s.
+        :param epoch_callbacks: Functions that are called with the `EpochEvent` of every epoch.
+            Requires `in_process`.
+        :param seed_epochs: Epochs of earlier hyperopts to warm start the optimizer with, see
+            `lazyft.hyperopt.warm_start`. Requires `in_process`.
         """
         super().__init__(command, verbose)
         self.verbose = verbose or command.verbose
         self.notify = notify
         self.autosave = autosave
+        self.isolated = isolated
+        # early stopping needs the epochs as they arrive, the evaluation cache and successive
+        # halving the optimizer
+        self.in_process = (
+            in_process
+            or bool(command.params.early_stopping)
+            or command.params.evaluation_cache
+            or bool(command.params.multi_fidelity)
+        )
+        self.epoch_callbacks: list[EpochCallback] = list(epoch_callbacks)
+        self.seed_epochs = list(seed_epochs)
+        if self.epoch_callbacks and not self.in_process:
+            raise ValueError("Epoch callbacks require an in-process hyperopt")
+        if self.seed_epochs and not self.in_process:
+            raise ValueError("Warm starts require an in-process hyperopt")
 
         self.command.params.logfile = self.log_path
 
@@ -171,6 +263,10 @@ class HyperoptRunner(runner.Runner):
         self.exception: Optional[Exception] = None
         self.hyperopt_result_path: Optional[pathlib.Path] = None
         self.status = "not ready"
+        self.epochs: list[EpochEvent] = []
+        self.hyperopt_driver: Optional[InProcessHyperopt] = None
+        self.stopped_early: Optional[EarlyStoppingPolicy] = None
+        self.tailer = EpochTailer(self.log_path)
 
     @property
     def report(self) -> HyperoptReport:
@@ -187,30 +283,52 @@ class HyperoptRunner(runner.Runner):
     def output(self):
         return self.log_path.read_text()
 
+    @property
+    def results_dir(self) -> pathlib.Path:
+        """
+        Returns the folder freqtrade writes the results of this hyperopt to.
+        """
+        if self.isolated and self.tmp_strategy_path:
+            return self.tmp_strategy_path / "hyperopt_results"
+        return paths.HYPEROPT_RESULTS_DIR
+
     def pre_execute(self, load_strategy: bool = False) -> None:
         """
         Initializes the HyperoptRunner.
         """
-        if HyperoptRunner.lock:
+        if HyperoptRunner.lock and not self.isolated:
             raise RuntimeError("Hyperopt is already running")
         logger.debug(f"Preparing to hyperopt {self.strategy}")
         self.reset()
         if self.params.download_data:
-            downloader.download_data_for_strategy(self.strategy, self.config, self.params)
-        # set or remove parameter file in strategy directory
+            with _download_lock:
+                downloader.download_data_for_strategy(self.strategy, self.config, self.params)
         if self.command.hyperopt_id:
             assert (
                 get_hyperopt_repo().get(self.command.hyperopt_id).strategy == self.strategy
             ), f"Hyperopt id {self.command.id} does not match strategy {self.strategy}"
-            parameter_tools.set_params_file(self.command.hyperopt_id)
+        if self.isolated:
+            # like below, the backed up strategy is only used when it is asked for
+            self.create_isolated_workspace(use_backup=load_strategy)
+            if not (load_strategy and self.hyperopt_id):
+                self.strategy_hash = strategy.save_strategy_text_to_database(self.strategy)
+            # the results folder is private, other runs would overwrite the last result
+            results_dir = self.tmp_strategy_path / "hyperopt_results"
+            if results_dir.is_symlink():
+                results_dir.unlink()
+            results_dir.mkdir(exist_ok=True)
         else:
-            parameter_tools.remove_params_file(self.strategy, self.command.config.path)
-        if not (load_strategy and self.hyperopt_id):
-            self.strategy_hash = strategy.save_strategy_text_to_database(self.strategy)
-        else:
-            # check to see if the report with hyperopt id has a strategy hash
-            report = get_hyperopt_repo().get(self.hyperopt_id)
-            self.export_backup_strategy(report)
+            # set or remove parameter file in strategy directory
+            if self.command.hyperopt_id:
+                parameter_tools.set_params_file(self.command.hyperopt_id)
+            else:
+                parameter_tools.remove_params_file(self.strategy, self.command.config.path)
+            if not (load_strategy and self.hyperopt_id):
+                self.strategy_hash = strategy.save_strategy_text_to_database(self.strategy)
+            else:
+                # check to see if the report with hyperopt id has a strategy hash
+                report = get_hyperopt_repo().get(self.hyperopt_id)
+                self.export_backup_strategy(report)
         # update spaces file
         if self.params.custom_spaces or self.params.custom_settings:
             self.update_spaces()
@@ -224,7 +342,8 @@ class HyperoptRunner(runner.Runner):
             self.command.hyperopt_id or None,
         )
 
-        HyperoptRunner.lock = True
+        if not self.isolated:
+            HyperoptRunner.lock = True
         self.start_time = time.time()
         self.status = "ready"
 
@@ -238,6 +357,9 @@ class HyperoptRunner(runner.Runner):
         """
         # validate run
         self.pre_execute(load_strategy)
+        if self.in_process:
+            self._execute_in_process(background)
+            return
 
         # Execute VIA sh
         try:
@@ -269,41 +391,135 @@ class HyperoptRunner(runner.Runner):
             self.exception = e
             self.error = True
 
+    def _execute_in_process(self, background: bool) -> None:
+        """
+        Runs the hyperopt with freqtrade's Hyperopt class in this process.
+
+        :param background: If True, the hyperopt runs in a separate thread.
+        """
+        logger.debug("Executing Hyperopt in process")
+        self.status = "running"
+        self.running = True
+        self.write_worker.start()
+        self.stopped_early = None
+        for policy in self.params.early_stopping:
+            policy.reset()
+        callbacks = [self.epochs.append, self._check_early_stopping, *self.epoch_callbacks]
+        if self.params.multi_fidelity:
+            # the slices change the losses, earlier epochs and cached epochs do not apply
+            self.hyperopt_driver = SuccessiveHalvingHyperopt(
+                self.command.command_string,
+                callbacks,
+                fractions=self.params.multi_fidelity,
+                eta=self.params.halving_rate,
+            )
+        else:
+            self.hyperopt_driver = InProcessHyperopt(
+                self.command.command_string,
+                callbacks,
+                seed_epochs=self.seed_epochs,
+                evaluation_cache=evaluation_cache if self.params.evaluation_cache else None,
+            )
+        if background:
+            Thread(target=self._run_in_process).start()
+        else:
+            self._run_in_process()
+
+    def _run_in_process(self) -> None:
+        success = True
+        try:
+            self.hyperopt_driver.run()
+        except Exception as e:
+            logger.exception(e)
+            self.exception = e
+            success = False
+        self.on_finished(None, success, None)
+
+    def _check_early_stopping(self, event: EpochEvent) -> None:
+        """Stops the hyperopt when one of the early stopping policies triggers"""
+        if self.stopped_early:
+            return
+        for policy in self.params.early_stopping:
+            if policy.update(event):
+                logger.info("Stopping hyperopt early after epoch {}: {}", event.epoch, policy)
+                self.stopped_early = policy
+                self.hyperopt_driver.stop()
+                return
+
+    @property
+    def evaluation_stats(self) -> Optional[EvaluationStats]:
+        """
+        :return: The evaluation cache lookups of an in-process hyperopt that uses the cache.
+        """
+        return self.hyperopt_driver.evaluation_stats if self.hyperopt_driver else None
+
+    def add_epoch_callback(self, callback: EpochCallback) -> None:
+        """
+        Register a function that is called with the `EpochEvent` of every epoch of an in-process
+        hyperopt.
+
+        :param callback: The function
+        """
+        if not self.in_process:
+            raise ValueError("Epoch callbacks require an in-process hyperopt")
+        self.epoch_callbacks.append(callback)
+        if self.hyperopt_driver:
+            self.hyperopt_driver.add_callback(callback)
+
     def stop(self):
-        super().stop()
+        if self.hyperopt_driver:
+            if not self.running:
+                logger.warning("The command is not currently running")
+                return False
+            self.manually_stopped = True
+            self.hyperopt_driver.stop()
+            return True
+        return super().stop()
 
     def join(self):
         while self.running or not self.write_queue.empty():
             time.sleep(1)
 
-    def live_output(self):
-        """Use rich lib to display an updatable table with epoch information"""
+    def live_output(self, max_rows: int = 100):
+        """
+        Use rich lib to display an updatable table with epoch information. Only the epochs that
+        were added since the last update are parsed.
+
+        :param max_rows: The number of the latest epochs shown in the table
+        """
+        # the rows are kept by the table, the tailer only has to parse them
+        tailer = EpochTailer(self.log_path, max_epochs=0)
+        rows = deque(maxlen=max_rows)
+        shown = 0
         table = _Printer.create_new_table()
         with Live(table, refresh_per_second=4, console=self.console) as live:
             try:
                 while self.running:
                     time.sleep(0.4)
-                    live.update(self._get_results_as_table())
+                    if self.in_process:
+                        new_rows = [e.as_row() for e in self.epochs[shown:]]
+                        shown += len(new_rows)
+                    else:
+                        new_rows = tailer.poll()
+                    overflow = len(rows) + len(new_rows) > max_rows
+                    rows.extend(new_rows)
+                    if overflow:
+                        table = _Printer.create_new_table(rows)
+                        live.update(table)
+                    else:
+                        for row in new_rows:
+                            table.add_row(*row)
             except KeyboardInterrupt:
                 pass
         if self.error:
             logger.error("\n".join(self.error_list[-5:]))
 
-    def _get_results_as_table(self):
-        """Generates tables for live_output"""
-
-        data = EPOCH_LINE_REGEX.findall(self.output)
-        table = _Printer.create_new_table()
-        for d in data:
-            table.add_row(*d)
-
-        return table
-
     def on_finished(self, _, success, _2):
         """The callback for the sh command in execute()"""
         self.status = "finished"
-        HyperoptRunner.lock = False
-        parameter_tools.remove_params_file(self.strategy, self.command.config.path)
+        if not self.isolated:
+            HyperoptRunner.lock = False
+            parameter_tools.remove_params_file(self.strategy, self.command.config.path)
         try:
             if not success:
                 logger.error("Finished with errors")
@@ -352,6 +568,7 @@ class HyperoptRunner(runner.Runner):
                 report = self.report.new_report_from_epoch(epoch)
             if tag:
                 report.tag = tag
+            report.update_summary()
             session.add(report)
             session.commit()
             session.refresh(report)
@@ -384,18 +601,50 @@ class HyperoptRunner(runner.Runner):
 
     def generate_report(self):
         """Creates a report that can saved later on."""
+        if self.isolated:
+            result_path = self._move_isolated_result()
+        else:
+            result_path = paths.HYPEROPT_RESULTS_DIR / get_last_hyperopt_file_name()
         self._report = HyperoptReport.from_hyperopt_result(
-            paths.HYPEROPT_RESULTS_DIR / get_last_hyperopt_file_name(),
+            result_path,
             exchange=self.config["exchange"]["name"],
         )
         self._report.epoch = self._report.get_best_epoch()
         self._report.strategy_hash = self.strategy_hash
         self._report.tag = self.command.params.tag
+        try:
+            epoch_store.export_epochs(self._report.hyperopt_file)
+        except Exception as e:
+            logger.warning("Could not export the epochs of {}: {}", self._report.hyperopt_file, e)
         return self._report
 
+    def _move_isolated_result(self) -> pathlib.Path:
+        """
+        Move the results file of an isolated hyperopt to the shared results folder. The file gets
+        a unique name, hyperopts of the same strategy that started in the same second would
+        otherwise use the same name.
+
+        :return: The new path of the results file
+        """
+        last_result = self.results_dir / paths.LAST_HYPEROPT_RESULTS_FILE.name
+        name = rapidjson.loads(last_result.read_text())["latest_hyperopt"]
+        source = self.results_dir / pathlib.Path(name).name
+        target = paths.HYPEROPT_RESULTS_DIR / f"{source.stem}_{self.report_id[:8]}{source.suffix}"
+        shutil.move(str(source), str(target))
+        return target
+
     def get_results(self) -> pd.DataFrame:
-        """Scrapes the hyperopt epoch information using regex and returns a DataFrame"""
-        data = EPOCH_LINE_REGEX.findall(self.output)
+        """
+        Returns the hyperopt epoch information as a DataFrame. The epochs are parsed from the log
+        incrementally, the whole log is only parsed again if the tailer dropped epochs.
+        """
+        if self.in_process:
+            return pd.DataFrame([e.as_row() for e in self.epochs], columns=columns)
+        self.tailer.poll()
+        if self.tailer.complete:
+            data = list(self.tailer.epochs)
+        else:
+            data = parse_epoch_rows(self.output)
         return pd.DataFrame(data, columns=columns)
 
     def sub_process_log(self, text="", out=False, error=False):
@@ -427,7 +676,7 @@ class HyperoptRunner(runner.Runner):
 
 class _Printer:
     @staticmethod
-    def create_new_table():
+    def create_new_table(rows: Iterable[tuple[str, ...]] = ()):
         table = Table(
             *columns,
             show_header=True,
@@ -435,4 +684,6 @@ class _Printer:
             show_lines=True,
             expand=True,
         )
+        for row in rows:
+            table.add_row(*row)
         return table
@@ -0,0 +1,91 @@
+"""
+Parses the epoch lines of a hyperopt log file incrementally.
+
+Only the part of the log that was written since the last poll is read, so polling a log file costs
+the same at the first and at the five thousandth epoch.
+"""
+from __future__ import annotations
+
+import pathlib
+import re
+from collections import deque
+from typing import Deque
+
+EPOCH_LINE_REGEX = re.compile(
+    r"(?P<epoch>[\d/]+)[\s|]+(?P<trades>[\d/]+)[\s|]+"
+    r"(?P<wins_draws_losses>\d+\s+\d+\s+\d+)[\s|]+"
+    r"(?P<average_profit>[\d.-]+%)[\s|]+"
+    r"(?P<profit>[\d.-]+ \w+\s+\([\d.,-]+%\))[\s|]+"
+    r"(?P<average_duration>\d+ \w+ [\d:]+)[\s|]+"
+    r"(?P<max_drawdown>(?:[\d.-]+ (?:\w+\s+)\([\d.]+%\))?(?:--)?)[\s|]+"
+    r"(?P<objective>[\d.,-]+)"
+)
+EPOCH_FIELDS = tuple(EPOCH_LINE_REGEX.groupindex)
+EpochRow = tuple[str, ...]
+
+
+def parse_epoch_rows(text: str) -> list[EpochRow]:
+    """
+    :param text: Hyperopt output
+    :return: The epoch rows in the text with the values of `EPOCH_FIELDS`.
+    """
+    return [m.group(*EPOCH_FIELDS) for m in EPOCH_LINE_REGEX.finditer(text)]
+
+
+class EpochTailer:
+    """
+    Follows a hyperopt log file and parses the epoch rows that were appended to it.
+    """
+
+    def __init__(self, path: pathlib.Path, max_epochs: int = 10000) -> None:
+        """
+        :param path: The log file
+        :param max_epochs: The number of the latest epoch rows that are kept in memory
+        """
+        self.path = path
+        self.epochs: Deque[EpochRow] = deque(maxlen=max_epochs)
+        self.count = 0
+        self._offset = 0
+        self._partial = b""
+
+    @property
+    def complete(self) -> bool:
+        """
+        :return: True if no parsed epoch row was dropped from `epochs`.
+        """
+        return self.count == len(self.epochs)
+
+    def poll(self) -> list[EpochRow]:
+        """
+        Parse the lines that were appended to the log file since the last poll.
+
+        :return: The new epoch rows
+        """
+        try:
+            if self.path.stat().st_size < self._offset:
+                # the file was replaced or truncated
+                self.reset()
+            with self.path.open("rb") as f:
+                f.seek(self._offset)
+                data = f.read()
+        except FileNotFoundError:
+            return []
+        if not data:
+            return []
+        self._offset += len(data)
+        lines = (self._partial + data).split(b"\n")
+        # the last line is parsed once it is complete
+        self._partial = lines.pop()
+        rows = parse_epoch_rows(b"\n".join(lines).decode(errors="replace"))
+        self.epochs.extend(rows)
+        self.count += len(rows)
+        return rows
+
+    def reset(self) -> None:
+        """
+        Forget the parsed epochs and start over at the beginning of the file.
+        """
+        self.epochs.clear()
+        self.count = 0
+        self._offset = 0
+        self._partial = b""
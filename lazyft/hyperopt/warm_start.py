@@ -0,0 +1,74 @@
+"""
+Seeds the optimizer of a hyperopt with the epochs of earlier hyperopts.
+
+The optimizer is told the parameters and losses of the earlier epochs before it proposes the first
+point, so it skips the random initial points it was told about and starts in the regions that were
+already known to be good. The losses are only comparable if the earlier hyperopts used the same
+loss function.
+"""
+from __future__ import annotations
+
+from typing import Iterable
+
+from lazyft import logger
+from lazyft.reports import get_hyperopt_repo
+
+
+def warm_start_epochs(
+    report_ids: Iterable[int], top_k: int = None, timerange: str = None
+) -> list[dict]:
+    """
+    Collect the epochs of earlier hyperopts.
+
+    :param report_ids: The ids of the hyperopt reports
+    :param top_k: Only keep the epochs with the k lowest losses
+    :param timerange: Skip reports that were not hyperopted over this timerange
+    :return: The parameters and the loss of the epochs, sorted by loss
+    """
+    epochs = []
+    for report_id in report_ids:
+        report = get_hyperopt_repo().get(report_id)
+        if timerange and report.timerange != timerange:
+            logger.info(
+                "Not warm starting from hyperopt {}: timerange {} differs from {}",
+                report_id,
+                report.timerange,
+                timerange,
+            )
+            continue
+        epochs.extend(
+            {"params_dict": e["params_dict"], "loss": e["loss"]} for e in report.all_epochs
+        )
+    epochs.sort(key=lambda e: e["loss"])
+    if top_k:
+        epochs = epochs[:top_k]
+    return epochs
+
+
+def seed_points(dimensions: list, epochs: Iterable[dict]) -> tuple[list[list], list[float]]:
+    """
+    Convert epochs to points of the search space of a hyperopt.
+
+    :param dimensions: The dimensions of the hyperopt
+    :param epochs: Epochs with "params_dict" and "loss"
+    :return: The points and their losses. Epochs that miss a parameter of the space or have a value
+        outside of it are skipped, so are repeated points.
+    """
+    points = []
+    losses = []
+    seen = set()
+    for epoch in epochs:
+        params = epoch["params_dict"]
+        try:
+            point = [params[d.name] for d in dimensions]
+        except KeyError:
+            continue
+        if not all(value in d for value, d in zip(point, dimensions)):
+            continue
+        key = tuple(point)
+        if key in seen:
+            continue
+        seen.add(key)
+        points.append(point)
+        losses.append(float(epoch["loss"]))
+    return points, losses
@@ -0,0 +1,248 @@
+"""
+A persistent cache of populated indicator frames.
+
+Populating the indicators is usually the most expensive step of a backtest, but its result only
+depends on the strategy code, the parameter values of the strategy and the candles of the pair.
+Settings that only change the simulation, like the ROI table, the stoploss or the stake, do not
+change the indicators.
+
+Every populated frame is stored as a Feather file in `CACHE_DIR/indicators`. The file name is a
+hash of:
+
+* the source of the strategy file and its space handler settings,
+* the values of all hyperoptable parameters of the strategy,
+* the pair, the timeframe and the candle type,
+* a fingerprint of the candles the indicators are populated from.
+
+Modules the strategy imports and informative data that it loads through the data provider are not
+part of the key. A changed indicator helper or repaired informative candles would return stale
+frames, so the cache is opt-in with `cache_indicators`. Clear it after changing either. The total
+size of the cache is bounded and the least recently used files are removed first.
+"""
+from __future__ import annotations
+
+import hashlib
+import inspect
+import os
+import threading
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Optional
+
+import pandas as pd
+import pyarrow as pa
+from loguru import logger
+
+from lazyft import paths, settings, util
+
+if TYPE_CHECKING:
+    from freqtrade.strategy import IStrategy
+
+CACHE_VERSION = 1
+CACHE_SUFFIX = ".feather"
+CANDLE_COLUMNS = ["date", "open", "high", "low", "close", "volume"]
+
+
+def candle_fingerprint(dataframe: pd.DataFrame) -> str:
+    """
+    :param dataframe: A dataframe with OHLCV candles
+    :return: A hash of the candles in the dataframe.
+    """
+    columns = [c for c in CANDLE_COLUMNS if c in dataframe.columns]
+    hashed = pd.util.hash_pandas_object(dataframe[columns], index=False)
+    return hashlib.sha1(hashed.values.tobytes()).hexdigest()
+
+
+def strategy_source_hash(strategy: "IStrategy") -> Optional[str]:
+    """
+    :param strategy: A loaded freqtrade strategy
+    :return: A hash of the strategy file and its space handler settings or None if the file of
+        the strategy can not be found.
+    """
+    try:
+        source_file = Path(inspect.getsourcefile(type(strategy)))
+        text = source_file.read_text()
+    except (TypeError, OSError):
+        return None
+    settings_file = source_file.with_name(f"{source_file.stem}.sh.json")
+    if settings_file.exists():
+        text += settings_file.read_text()
+    return util.hash(text)
+
+
+def parameter_values(strategy: "IStrategy") -> dict:
+    """
+    :param strategy: A loaded freqtrade strategy
+    :return: The current value of every hyperoptable parameter of the strategy.
+    """
+    return {
+        f"{param.category}.{name}": param.value for name, param in strategy.enumerate_parameters()
+    }
+
+
+class IndicatorCache:
+    """
+    Stores the result of `IStrategy.advise_indicators` on disk.
+    """
+
+    def __init__(self, directory: Path, max_bytes: int) -> None:
+        """
+        :param directory: The directory the frames are stored in
+        :param max_bytes: The maximum total size of the stored frames. A value of 0 disables the
+            cache.
+        """
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def attach(self, strategy: "IStrategy") -> None:
+        """
+        Make a strategy populate its indicators through this cache. `advise_all_indicators` and
+        `advise_indicators` of the strategy will load frames from the cache when possible.
+
+        :param strategy: A loaded freqtrade strategy
+        """
+        if not self.max_bytes or getattr(strategy, "_lft_indicator_cache", None) is self:
+            return
+        source_hash = strategy_source_hash(strategy)
+        if not source_hash:
+            logger.debug("Source of {} not found, not caching indicators", type(strategy).__name__)
+            return
+        advise_indicators = strategy.advise_indicators
+
+        def cached_advise_indicators(dataframe: pd.DataFrame, metadata: dict) -> pd.DataFrame:
+            key = self.key(strategy, source_hash, dataframe, metadata["pair"])
+            return self.get_or_populate(key, dataframe, metadata, advise_indicators)
+
+        strategy.advise_indicators = cached_advise_indicators
+        strategy._lft_indicator_cache = self
+
+    def key(
+        self, strategy: "IStrategy", source_hash: str, dataframe: pd.DataFrame, pair: str
+    ) -> str:
+        """
+        :param strategy: A loaded freqtrade strategy
+        :param source_hash: The hash of the strategy source
+        :param dataframe: The candles the indicators are populated from
+        :param pair: The pair of the candles
+        :return: The key of the populated frame.
+        """
+        return util.hash(
+            (
+                CACHE_VERSION,
+                source_hash,
+                sorted((k, repr(v)) for k, v in parameter_values(strategy).items()),
+                pair,
+                strategy.timeframe,
+                str(strategy.config.get("candle_type_def", "")),
+                candle_fingerprint(dataframe),
+            )
+        )
+
+    def path(self, key: str) -> Path:
+        """
+        :param key: The key of a populated frame
+        :return: The path the frame is stored at.
+        """
+        return self.directory / f"{key}{CACHE_SUFFIX}"
+
+    def get_or_populate(
+        self,
+        key: str,
+        dataframe: pd.DataFrame,
+        metadata: dict,
+        advise_indicators: Callable[[pd.DataFrame, dict], pd.DataFrame],
+    ) -> pd.DataFrame:
+        """
+        Load a populated frame from the cache or populate and store it.
+
+        :param key: The key of the populated frame
+        :param dataframe: The candles to populate
+        :param metadata: The metadata passed to `advise_indicators`
+        :param advise_indicators: The function that populates the indicators
+        :return: The populated frame
+        """
+        path = self.path(key)
+        cached = self._read(path)
+        if cached is not None and len(cached) == len(dataframe):
+            self.hits += 1
+            logger.debug("Loaded cached indicators of {}", metadata["pair"])
+            cached.index = dataframe.index
+            return cached
+        self.misses += 1
+        index = dataframe.index
+        populated = advise_indicators(dataframe, metadata)
+        if populated.index.equals(index):
+            self._write(path, populated)
+        return populated
+
+    def clear(self) -> None:
+        """
+        Remove all stored frames.
+        """
+        with self._lock:
+            for path in self._files():
+                path.unlink(missing_ok=True)
+
+    @property
+    def size(self) -> int:
+        """
+        :return: The total size of the stored frames in bytes.
+        """
+        return sum(path.stat().st_size for path in self._files())
+
+    def _files(self) -> list[Path]:
+        if not self.directory.exists():
+            return []
+        return list(self.directory.glob(f"*{CACHE_SUFFIX}"))
+
+    def _read(self, path: Path) -> Optional[pd.DataFrame]:
+        try:
+            df = pd.read_feather(path)
+        except FileNotFoundError:
+            return None
+        except (OSError, pa.ArrowException) as e:
+            logger.warning("Could not read cached indicators {}: {}", path.name, e)
+            path.unlink(missing_ok=True)
+            return None
+        # the modification time is used to find the least recently used files
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return df
+
+    def _write(self, path: Path, populated: pd.DataFrame) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        try:
+            populated.reset_index(drop=True).to_feather(tmp_path)
+            tmp_path.replace(path)
+        except (ValueError, TypeError, OSError, pa.ArrowException) as e:
+            logger.debug("Could not cache indicators: {}", e)
+            tmp_path.unlink(missing_ok=True)
+            return
+        self._evict()
+
+    def _evict(self) -> None:
+        """Remove the least recently used files until the cache is within its size budget"""
+        with self._lock:
+            files = []
+            for path in self._files():
+                try:
+                    files.append((path.stat(), path))
+                except FileNotFoundError:
+                    continue
+            total = sum(stat.st_size for stat, _ in files)
+            for stat, path in sorted(files, key=lambda f: f[0].st_mtime_ns):
+                if total <= self.max_bytes:
+                    break
+                path.unlink(missing_ok=True)
+                total -= stat.st_size
+                logger.debug("Evicted cached indicators {}", path.name)
+
+
+indicator_cache = IndicatorCache(
+    paths.CACHE_DIR / "indicators", max_bytes=settings.indicator_cache_max_bytes
+)
@@ -8,6 +8,14 @@ from pathlib import Path
 
 class LftSettings(BaseModel):
     base_config_path: Path = None
+    # The on-disk size of result files that may be kept parsed in memory
+    result_cache_max_bytes: int = 512 * 1024 * 1024
+    # The on-disk size of the populated indicator frames cache
+    indicator_cache_max_bytes: int = 2 * 1024 * 1024 * 1024
+    # The memory that replayable backtest signals may use
+    signal_cache_max_bytes: int = 1024 * 1024 * 1024
+    # The on-disk size of the evaluated hyperopt epochs cache
+    evaluation_cache_max_bytes: int = 1024 * 1024 * 1024
 
     def save(self):
         paths.LAZYFT_SETTINGS_PATH.write_text(self.json(indent=2))
@@ -0,0 +1,125 @@
+"""
+Lightweight schema migrations for the lazyft database.
+
+`SQLModel.metadata.create_all` only creates missing tables. Columns and indexes that were added to
+an existing model are created here, and the report summary columns of existing rows are backfilled.
+"""
+from __future__ import annotations
+
+from typing import Iterable, Type
+
+from loguru import logger
+from sqlalchemy import Index, inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError, OperationalError
+from sqlmodel import Session, SQLModel, select
+
+from lazyft.database import engine as default_engine
+
+
+def add_missing_columns(engine: Engine, model: Type[SQLModel]) -> list[str]:
+    """
+    Add the columns of a model that do not exist in its table yet.
+
+    :param engine: The database engine
+    :param model: The SQLModel table class
+    :return: The names of the added columns
+    """
+    table = model.__table__
+    inspector = inspect(engine)
+    if not inspector.has_table(table.name):
+        return []
+    existing = {c["name"] for c in inspector.get_columns(table.name)}
+    added = []
+    with engine.begin() as conn:
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            column_type = column.type.compile(dialect=engine.dialect)
+            conn.execute(
+                text(f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {column_type}')
+            )
+            added.append(column.name)
+    if added:
+        logger.info("Added columns {} to table {}", ", ".join(added), table.name)
+    return added
+
+
+def create_missing_indexes(engine: Engine, model: Type[SQLModel]) -> None:
+    """
+    Create the indexes of a model that do not exist in its table yet.
+
+    Unique indexes that can not be created because the table contains duplicates are replaced by a
+    non-unique index on the same columns, so lookups stay indexed until the duplicates are removed.
+
+    :param engine: The database engine
+    :param model: The SQLModel table class
+    """
+    for index in list(model.__table__.indexes):
+        try:
+            index.create(bind=engine, checkfirst=True)
+        except IntegrityError as e:
+            if not index.unique:
+                logger.warning("Could not create index {}: {}", index.name, e)
+                continue
+            logger.warning(
+                "Table {} contains duplicate values in {}. Creating a non-unique index instead. "
+                "Remove the duplicate rows and restart to enforce uniqueness.",
+                model.__table__.name,
+                ", ".join(c.name for c in index.columns),
+            )
+            fallback = Index(f"{index.name}_nonunique", *index.columns)
+            fallback.create(bind=engine, checkfirst=True)
+        except OperationalError as e:
+            logger.warning("Could not create index {}: {}", index.name, e)
+
+
+def backfill_summary_columns(
+    model: Type[SQLModel], engine: Engine = default_engine, only_missing: bool = True
+) -> int:
+    """
+    Fill the summary columns of saved reports from their result files.
+
+    :param model: BacktestReport or HyperoptReport
+    :param engine: The database engine
+    :param only_missing: Only update reports that have never been summarized
+    :return: The number of updated reports
+    """
+    updated = 0
+    with Session(engine) as session:
+        statement = select(model)
+        if only_missing:
+            statement = statement.where(model.strategy_name == None)  # noqa: E711
+        reports = session.exec(statement).all()
+        if not reports:
+            return 0
+        logger.info("Backfilling summary columns of {} {} rows", len(reports), model.__name__)
+        for report in reports:
+            try:
+                report.update_summary()
+            except Exception as e:
+                logger.warning(
+                    "Could not backfill {} #{}: {}", model.__name__, report.id, repr(e)
+                )
+                continue
+            session.add(report)
+            updated += 1
+        session.commit()
+    logger.info("Backfilled {} {} rows", updated, model.__name__)
+    return updated
+
+
+def migrate(models: Iterable[Type[SQLModel]], engine: Engine = default_engine) -> None:
+    """
+    Bring the tables of the given models up to date and backfill new report summary columns.
+
+    :param models: The SQLModel table classes to migrate
+    :param engine: The database engine
+    """
+    from lazyft.models.base import SUMMARY_COLUMNS, ReportBase
+
+    for model in models:
+        added = add_missing_columns(engine, model)
+        create_missing_indexes(engine, model)
+        if issubclass(model, ReportBase) and set(added) & set(SUMMARY_COLUMNS):
+            backfill_summary_columns(model, engine, only_missing=False)
@@ -3,6 +3,7 @@ from __future__ import annotations
 from sqlmodel import SQLModel
 
 from lazyft.database import engine
+from lazyft.migrations import migrate
 
 from .base import PerformanceBase, ReportBase
 from .backtest import BacktestPerformance, BacktestReport
@@ -10,6 +11,7 @@ from .hyperopt import HyperoptPerformance, HyperoptReport
 from .strategy import StrategyBackup
 
 SQLModel.metadata.create_all(engine)
+migrate([BacktestReport, HyperoptReport, StrategyBackup])
 
 
 __all__ = [
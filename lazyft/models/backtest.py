@@ -10,7 +10,7 @@ from freqtrade.commands import Arguments, start_plot_dataframe
 from loguru import logger
 from sqlmodel import Field, Relationship, Session, SQLModel
 
-from lazyft import paths
+from lazyft import paths, trades_store
 from lazyft.command_parameters import BacktestParameters
 from lazyft.config import Config
 from lazyft.database import engine
@@ -23,8 +23,59 @@ from lazyft.loss_functions import (
 from lazyft.models import PerformanceBase
 from lazyft.models.base import ReportBase
 from lazyft.models.hyperopt import HyperoptReport
+from lazyft.result_cache import result_cache
 from lazyft.util import calculate_win_ratio
 
+CATEGORICAL_TRADE_COLUMNS = ("pair", "exit_reason", "sell_reason", "enter_tag", "buy_tag")
+TRADE_DTYPES = {
+    "stake_amount": "float64",
+    "amount": "float64",
+    "open_rate": "float64",
+    "close_rate": "float64",
+    "profit_ratio": "float64",
+    "profit_abs": "float64",
+    "min_rate": "float64",
+    "max_rate": "float64",
+    "stop_loss_abs": "float64",
+    "initial_stop_loss_abs": "float64",
+    "fee_open": "float32",
+    "fee_close": "float32",
+    "stop_loss_ratio": "float32",
+    "initial_stop_loss_ratio": "float32",
+    "leverage": "float32",
+    "trade_duration": "int32",
+    "open_timestamp": "int64",
+    "close_timestamp": "int64",
+    "is_open": "bool",
+    "is_short": "bool",
+}
+
+
+def trades_frame(trades: list[dict]) -> pd.DataFrame:
+    """
+    Create a typed dataframe from the trade list of a backtest result.
+
+    Text columns with few distinct values are categorical, rates and profits are float64, fees and
+    ratios are float32 and the dates are parsed from the millisecond timestamps.
+
+    :param trades: The trades of a backtest result
+    :return: A dataframe with one row per trade
+    """
+    df = pd.DataFrame.from_records(trades)
+    if df.empty:
+        return df
+    dtypes = {c: t for c, t in TRADE_DTYPES.items() if c in df.columns and not df[c].isna().any()}
+    df = df.astype(dtypes)
+    for column in CATEGORICAL_TRADE_COLUMNS:
+        if column in df.columns:
+            df[column] = df[column].astype("category")
+    for column in ("open", "close"):
+        if f"{column}_timestamp" in df.columns:
+            df[f"{column}_date"] = pd.to_datetime(df[f"{column}_timestamp"], unit="ms", utc=True)
+        else:
+            df[f"{column}_date"] = pd.to_datetime(df[f"{column}_date"], utc=True)
+    return df
+
 
 class BacktestPerformance(PerformanceBase):
     """
@@ -79,7 +130,7 @@ class BacktestReport(ReportBase, table=True):
     """
 
     id: Optional[int] = Field(default=None, primary_key=True)
-    hash: str
+    hash: str = Field(index=True, unique=True)
     session_id: Optional[str]
     ensemble: Optional[str]
 
@@ -89,6 +140,8 @@ class BacktestReport(ReportBase, table=True):
     backtest_file_str: str = Field(default="")
     strategy_hash: str = Field(default="")
     exchange: str = Field(default="")
+    # summary column, see ReportBase
+    sortino: Optional[float] = None
 
     # region Properties
     @property
@@ -110,13 +163,15 @@ class BacktestReport(ReportBase, table=True):
     @property
     def load_data(self) -> dict:
         """
-        Get the backtest data from the backtest_results directory
+        Get the backtest data from the backtest_results directory.
+        The parsed file is shared through the process-wide result cache, so it is only parsed
+        again when the file changes. The returned dictionary must not be mutated.
 
         :return: The backtest data
         :rtype: dict
         """
 
-        return rapidjson.loads(Path(paths.BACKTEST_RESULTS_DIR, self.backtest_file_str).read_text())
+        return result_cache.load_file(Path(paths.BACKTEST_RESULTS_DIR, self.backtest_file_str))
 
         # with Session(engine) as session:
         #     return rapidjson.loads(session.get(BacktestData, self.data_id).text)
@@ -179,7 +234,7 @@ class BacktestReport(ReportBase, table=True):
         :return: A summarized performance object of the backtest.
         :rtype: BacktestPerformance
         """
-        totals = self.backtest_data["results_per_pair"].pop()
+        totals = dict(self.backtest_data["results_per_pair"][-1])
         totals.pop("key")
         totals["start_date"] = self.backtest_data["backtest_start"]
         totals["end_date"] = self.backtest_data["backtest_end"]
@@ -205,7 +260,7 @@ class BacktestReport(ReportBase, table=True):
         df: pd.DataFrame = trades.loc[trades.profit_ratio > 0]
         # df.set_index('pair', inplace=True)
         return (
-            df.groupby(df["pair"])
+            df.groupby(df["pair"], observed=True)
             .aggregate(
                 profit_total=pd.NamedAgg(column="profit_abs", aggfunc="sum"),
                 profit_total_pct=pd.NamedAgg(column="profit_ratio", aggfunc="sum"),
@@ -253,6 +308,17 @@ class BacktestReport(ReportBase, table=True):
 
         return df
 
+    def update_summary(self) -> None:
+        """
+        Copy the key metrics of the report into its summary columns, including the sortino loss.
+        """
+        super().update_summary()
+        try:
+            self.sortino = self.sortino_loss
+        except Exception as e:
+            logger.debug("Could not calculate the sortino loss of report {}: {}", self.id, e)
+            self.sortino = None
+
     @property
     def sortino_loss(self) -> float:
         return sortino_daily(
@@ -298,10 +364,19 @@ class BacktestReport(ReportBase, table=True):
 
     @property
     def trades(self) -> pd.DataFrame:
-        df = pd.DataFrame(self.backtest_data["trades"])
-        df.open_date = pd.to_datetime(df.open_date)
-        df.close_date = pd.to_datetime(df.close_date)
-        return df
+        """
+        The typed trades of the backtest. The frame is built once per result file and a copy is
+        returned, so it can be modified.
+
+        :return: A dataframe with one row per trade.
+        :rtype: pd.DataFrame
+        """
+        df = result_cache.load_file(
+            Path(paths.BACKTEST_RESULTS_DIR, self.backtest_file_str),
+            loader=lambda _: trades_frame(self.backtest_data["trades"]),
+            namespace=f"trades:{self.strategy}",
+        )
+        return df.copy()
 
     @property
     def pairlist(self) -> list[str]:
@@ -400,8 +475,8 @@ class BacktestReport(ReportBase, table=True):
             name += ".csv"
 
         df_trades = self.trades
-        df_trades.open_date = df_trades.open_date.apply(lambda d: d.strftime("%x %X"))
-        df_trades.close_date = df_trades.close_date.apply(lambda d: d.strftime("%x %X"))
+        df_trades.open_date = df_trades.open_date.dt.strftime("%x %X")
+        df_trades.close_date = df_trades.close_date.dt.strftime("%x %X")
         csv = df_trades.to_csv(path.joinpath(name), index=False)
         logger.info(f"Exported trades for backtest #{self.id} to -> {path.joinpath(name)}")
         return csv
@@ -416,6 +491,7 @@ class BacktestReport(ReportBase, table=True):
         # data = session.get(BacktestData, self.data_id)
         # session.delete(data)
         # self.log_file.unlink(missing_ok=True)
+        trades_store.remove_report(self)
 
     def plot(self):
         """
@@ -455,7 +531,7 @@ class BacktestReport(ReportBase, table=True):
         import plotly.express as px
 
         trades_df = self.trades
-        trades_df = trades_df.resample("M", on="close_date").sum()
+        trades_df = trades_df.resample("M", on="close_date").sum(numeric_only=True)
         trades_df["profit_abs"] = trades_df["profit_abs"].round(2)
         fig = px.line(
             trades_df,
@@ -482,7 +558,7 @@ class BacktestReport(ReportBase, table=True):
         import plotly.express as px
 
         trades_df = self.trades
-        trades_df = trades_df.resample("W", on="close_date").sum()
+        trades_df = trades_df.resample("W", on="close_date").sum(numeric_only=True)
         trades_df["profit_abs"] = trades_df["profit_abs"].round(2)
         fig = px.line(
             trades_df,
@@ -508,7 +584,7 @@ class BacktestReport(ReportBase, table=True):
         import plotly.express as px
 
         trades_df = self.trades
-        trades_df = trades_df.resample("D", on="close_date").sum()
+        trades_df = trades_df.resample("D", on="close_date").sum(numeric_only=True)
         trades_df["profit_abs"] = trades_df["profit_abs"].round(2)
         fig = px.line(
             trades_df,
@@ -81,11 +81,59 @@ class PerformanceBase(BaseModel):
         return (self.wins + self.draws) / max(self.wins + self.draws + self.losses, 1)
 
 
+SUMMARY_COLUMNS = (
+    "strategy_name",
+    "interval",
+    "start_date",
+    "end_date",
+    "profit_total_pct",
+    "profit_mean",
+    "trade_count",
+    "wins",
+    "draws",
+    "losses",
+    "max_drawdown",
+    "loss_value",
+    "profit_total_abs",
+    "avg_duration",
+    "n_pairlist",
+    "max_open_trades_value",
+    "stake_amount_value",
+    "starting_balance_value",
+    "sortino",
+)
+
+
 class ReportBase(SQLModel):
     id: Optional[int]
     date: datetime = Field(default_factory=datetime.now)
     tag: str = ""
 
+    # region Summary columns
+    # Denormalized copies of the report's performance. They are filled by `update_summary` when the
+    # report is saved so that reports can be sorted and filtered without loading result files.
+    strategy_name: Optional[str] = Field(default=None, index=True)
+    interval: Optional[str] = Field(default=None, index=True)
+    start_date: Optional[datetime] = Field(default=None, index=True)
+    end_date: Optional[datetime] = Field(default=None, index=True)
+    profit_total_pct: Optional[float] = Field(default=None, index=True)
+    profit_mean: Optional[float] = Field(default=None, index=True)
+    trade_count: Optional[int] = Field(default=None, index=True)
+    wins: Optional[int] = None
+    draws: Optional[int] = None
+    losses: Optional[int] = None
+    max_drawdown: Optional[float] = Field(default=None, index=True)
+    loss_value: Optional[float] = Field(default=None, index=True)
+    profit_total_abs: Optional[float] = None
+    avg_duration: Optional[str] = None
+    n_pairlist: Optional[int] = None
+    # -1 means unlimited
+    max_open_trades_value: Optional[int] = None
+    # -1 means unlimited
+    stake_amount_value: Optional[float] = None
+    starting_balance_value: Optional[float] = None
+    # endregion
+
     @property
     @abstractmethod
     def performance(self) -> "Union[HyperoptPerformance, BacktestPerformance]":
@@ -133,6 +181,51 @@ class ReportBase(SQLModel):
         df.balance = df.balance.astype(int)
         return df
 
+    @property
+    def summary_days(self) -> int:
+        """
+        The number of days between the stored start and end dates. Mirrors `PerformanceBase.days`.
+
+        :return: The number of days, at least 1.
+        :rtype: int
+        """
+        if not (self.start_date and self.end_date):
+            return 1
+        return max((self.end_date - self.start_date).days, 1)
+
+    # noinspection PyUnresolvedReferences
+    def update_summary(self) -> None:
+        """
+        Copy the key metrics of the report's performance into its summary columns.
+        """
+        performance = self.performance
+        self.strategy_name = self.strategy
+        self.interval = self.timeframe
+        self.start_date = performance.start_date
+        self.end_date = performance.end_date
+        self.profit_total_pct = performance.profit_total_pct
+        self.profit_mean = performance.profit_ratio
+        self.trade_count = performance.trades
+        self.wins = performance.wins
+        self.draws = performance.draws
+        self.losses = performance.losses
+        self.max_drawdown = performance.drawdown
+        self.loss_value = getattr(performance, "loss", None)
+        self.profit_total_abs = performance.profit
+        self.avg_duration = str(performance.avg_duration)
+        try:
+            self.n_pairlist = len(self.pairlist.split(","))
+        except AttributeError:
+            self.n_pairlist = len(self.pairlist)
+        max_open_trades = self.max_open_trades
+        if max_open_trades is None or max_open_trades < 0 or max_open_trades == float("inf"):
+            self.max_open_trades_value = -1
+        else:
+            self.max_open_trades_value = int(max_open_trades)
+        stake_amount = self.stake_amount
+        self.stake_amount_value = -1.0 if stake_amount == "unlimited" else float(stake_amount)
+        self.starting_balance_value = float(self.starting_balance)
+
     def save(self):
         """
         Save the current state of the object to the database
@@ -141,6 +234,7 @@ class ReportBase(SQLModel):
         :return: The saved report.
         :rtype: ReportBase
         """
+        self.update_summary()
         with Session(engine) as session:
             session.add(self)
             session.commit()
@@ -8,7 +8,6 @@ from typing import Optional
 
 import pandas as pd
 import rapidjson
-from _operator import itemgetter
 from diskcache import Index
 from freqtrade.misc import deep_merge_dicts
 from freqtrade.optimize import optimize_reports
@@ -16,9 +15,11 @@ from freqtrade.optimize.hyperopt_tools import HyperoptTools
 from loguru import logger
 from sqlmodel import Field, SQLModel
 
-from lazyft import paths, util
+from lazyft import epoch_store, paths, util
 from lazyft.database import engine
+from lazyft.epoch_index import EpochIndex, get_epoch_index
 from lazyft.models import PerformanceBase, ReportBase
+from lazyft.result_cache import result_cache
 from lazyft.strategy import get_file_name
 from lazyft.util import calculate_win_ratio, get_last_hyperopt_file_name, remove_cache
 
@@ -42,6 +43,27 @@ def create_cache() -> tuple[Index, Index]:
 
 cache, tmp_cache = create_cache()
 
+# The columns of the epoch store used by `HyperoptTools.prepare_trials_columns`
+HYPEROPT_LIST_COLUMNS = [
+    "current_epoch",
+    "loss",
+    "is_initial_point",
+    "is_random",
+    "is_best",
+    "results_metrics.total_trades",
+    "results_metrics.wins",
+    "results_metrics.draws",
+    "results_metrics.losses",
+    "results_metrics.profit_mean",
+    "results_metrics.profit_total_abs",
+    "results_metrics.profit_total",
+    "results_metrics.holding_avg",
+    "results_metrics.holding_avg_s",
+    "results_metrics.max_drawdown",
+    "results_metrics.max_drawdown_account",
+    "results_metrics.max_drawdown_abs",
+]
+
 
 class HyperoptPerformance(PerformanceBase):
     wins: int
@@ -82,18 +104,26 @@ class HyperoptReport(ReportBase, table=True):
     hyperopt_file_str: str = Field(default="", description="The hyperopt file name")
     strategy_hash: str = Field(default="", description="The strategy hash used for integrity")
     exchange: str = Field(default="", description="The exchange used for the backtest")
+    session_id: Optional[str] = Field(
+        default=None, index=True, description="The id of the session that created the report"
+    )
 
     # region properties
     @property
     def filtered_results(self) -> tuple[list, int]:
         """
-        Return filtered results.
+        Return filtered results. The results are parsed once per process and shared, they must not
+        be mutated.
 
         :return: A tuple of the filtered results and the number of results.
         :rtype: tuple[list, int]
         """
         config = {"user_data_dir": paths.USER_DATA_DIR}
-        return HyperoptTools.load_filtered_results(self.hyperopt_file, config)
+        return result_cache.load_file(
+            self.hyperopt_file,
+            loader=lambda path: HyperoptTools.load_filtered_results(path, config),
+            namespace="hyperopt_results",
+        )
 
     @property
     def result_dict(self) -> dict:
@@ -115,7 +145,7 @@ class HyperoptReport(ReportBase, table=True):
             return self.result_dict
         logger.info("Loading and caching hyperopt results for id {}...", self.id)
         try:
-            data = self.all_epochs[self.epoch]
+            data = self.epoch_index.read(self.epoch)
         except IndexError:
             logger.error("Epoch {} not found in hyperopt results for {}", self.epoch, self.id)
             logger.info("Available epochs: {}", self.total_epochs)
@@ -125,6 +155,14 @@ class HyperoptReport(ReportBase, table=True):
         _cache[self.hyperopt_file_str, self.epoch] = data
         return data
 
+    @property
+    def epoch_index(self) -> EpochIndex:
+        """
+        :return: The byte offset index of the epochs in the hyperopt file.
+        :rtype: EpochIndex
+        """
+        return get_epoch_index(self.hyperopt_file)
+
     @property
     def all_epochs(self) -> list[dict]:
         """
@@ -141,7 +179,7 @@ class HyperoptReport(ReportBase, table=True):
         :return: The total number of epochs of the hyperopt run.
         :rtype: int
         """
-        return self.filtered_results[1]
+        return len(self.epoch_index)
 
     @property
     def backtest_data(self) -> dict:
@@ -344,16 +382,18 @@ class HyperoptReport(ReportBase, table=True):
     def hyperopt_list_to_df(self) -> pd.DataFrame:
         """
         Convert the hyperopt list into a dataframe of performances.
+        Only the needed columns are loaded from the columnar epoch store.
 
         :return: A dataframe with the hyperopt list.
         :rtype: pd.DataFrame
         """
-        trials = pd.json_normalize(self.all_epochs, max_level=1)
+        trials = epoch_store.read_epochs(self.hyperopt_file, HYPEROPT_LIST_COLUMNS)
+        holding_avg_s = trials["results_metrics.holding_avg_s"].to_numpy()
         trials = HyperoptTools.prepare_trials_columns(
             trials,
             "results_metrics.max_drawdown_abs" in trials.columns
             or "results_metrics.max_drawdown_account" in trials.columns,
-        )
+        ).copy()
         trials.drop(
             columns=["is_initial_point", "is_best", "Best"],
             inplace=True,
@@ -361,12 +401,9 @@ class HyperoptReport(ReportBase, table=True):
         )
         trials.set_index("Epoch", inplace=True)
         # "Avg duration" is a column with values the format of HH:MM:SS.
-        # We want to turn this into hours
-        avg_duration_hours = trials["Avg duration"].apply(
-            lambda s: util.duration_string_to_timedelta(s).total_seconds() / 3600,
-        )
-        # insert avg_duration_seconds in the seventh position
-        trials.insert(6, "Avg duration hours", avg_duration_hours)
+        # The store also has the duration in seconds, which we turn into hours
+        # insert avg_duration_hours in the seventh position
+        trials.insert(6, "Avg duration hours", holding_avg_s / 3600)
         # strip each column name
         trials.columns = [c.strip() for c in trials.columns]
         return trials
@@ -380,7 +417,7 @@ class HyperoptReport(ReportBase, table=True):
         :type epoch: int
         """
         if epoch:
-            result = self.all_epochs[epoch - 1]
+            result = self.epoch_index.read(epoch - 1)
         else:
             result = self.result_dict
         optimize_reports.show_backtest_result(
@@ -417,8 +454,7 @@ class HyperoptReport(ReportBase, table=True):
 
         :return: The epoch number of the best epoch.
         """
-        sorted_epochs = sorted(self.all_epochs, key=itemgetter("loss"))
-        return self.all_epochs.index(sorted_epochs[0])
+        return self.epoch_index.best_epoch()
 
     @classmethod
     def from_last_result(cls, epoch=0, exchange="kucoin"):
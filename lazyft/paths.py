@@ -22,5 +22,6 @@ BACKTEST_LOG_PATH = LOG_DIR.joinpath("backtest_logs/")
 BACKTEST_LOG_PATH.mkdir(exist_ok=True)
 PAIR_DATA_DIR = USER_DATA_DIR.joinpath("data")
 CACHE_DIR = pathlib.Path(app.user_cache_dir)
+TRADES_STORE_DIR = USER_DATA_DIR.joinpath("trades_store")
 SETTINGS_DIR = pathlib.Path(app.user_config_dir)
 LAZYFT_SETTINGS_PATH = USER_DATA_DIR / "lft.json"
@@ -1,7 +1,7 @@
 import datetime
 from abc import ABCMeta, abstractmethod
 from collections import UserList
-from typing import Any, Callable, Iterable, TypeVar, Union
+from typing import Any, Callable, Iterable, Optional, TypeVar, Union
 
 import pandas as pd
 from dateutil.parser import parse
@@ -13,10 +13,12 @@ from freqtrade.optimize.optimize_reports import (
     text_table_periodic_breakdown,
     text_table_tags,
 )
+from sqlalchemy import Integer, cast, func
+from sqlalchemy.sql.elements import ColumnElement
 from sqlmodel import Session
-from sqlmodel.sql.expression import select
+from sqlmodel.sql.expression import Select, select
 
-from lazyft import logger
+from lazyft import logger, trades_store
 from lazyft.database import engine
 from lazyft.errors import IdNotFoundError
 from lazyft.models.backtest import BacktestReport
@@ -42,16 +44,192 @@ AbstractReport = Union[BacktestReport, HyperoptReport]
 T = TypeVar("T")
 
 
+def _nulls_last(value: Any, descending: bool) -> tuple:
+    """
+    A sort key that places reports without a stored value after all other reports.
+    """
+    if value is None:
+        return not descending, 0
+    return descending, value
+
+
+def _ppd(report: AbstractReport) -> Optional[float]:
+    """Profit per day computed from the summary columns"""
+    if report.profit_total_pct is None:
+        return None
+    return report.profit_total_pct / report.summary_days
+
+
+def _score(report: AbstractReport) -> Optional[float]:
+    """`PerformanceBase.score` computed from the summary columns"""
+    if report.profit_mean is None or report.trade_count is None:
+        return None
+    return report.profit_mean * report.trade_count / report.summary_days * 100
+
+
+def _days_expression(model: type) -> ColumnElement:
+    """The SQL equivalent of `ReportBase.summary_days`"""
+    days = cast(func.julianday(model.end_date) - func.julianday(model.start_date), Integer)
+    return func.max(func.coalesce(days, 1), 1)
+
+
+def _as_list(values: Union[str, int, Iterable]) -> list:
+    """Turn a single value or an iterable of values into a list"""
+    if isinstance(values, (str, int)):
+        return [values]
+    return list(values)
+
+
+def _as_date(value: Union[datetime.datetime, datetime.date, str]) -> datetime.datetime:
+    if isinstance(value, str):
+        return parse(value)
+    if not isinstance(value, datetime.datetime):
+        return datetime.datetime.combine(value, datetime.time())
+    return value
+
+
 class RepoExplorer(UserList[T], metaclass=ABCMeta):
     """
     A database API used to query, sort, filter, and delete reports.
+
+    The explorer is lazy. Filters, sorts, `head` and `tail` are collected into a single SQL
+    statement and rows are only loaded from the database once the explorer is iterated. Operations
+    that happen after the rows were loaded, or after a limit was applied, run on the loaded list.
     """
 
+    model: type = None
+    # The columns of `dataframe` and the summary columns they are read from
+    frame_columns: tuple[tuple[str, str], ...] = (
+        ("id", "id"),
+        ("strategy", "strategy_name"),
+        ("date", "date"),
+        ("exchange", "exchange"),
+        ("m_o_t", "max_open_trades_value"),
+        ("stake", "stake_amount_value"),
+        ("balance", "starting_balance_value"),
+        ("n_pairlist", "n_pairlist"),
+        ("avg_profit_pct", "profit_mean"),
+        ("avg_duration", "avg_duration"),
+        ("wins", "wins"),
+        ("losses", "losses"),
+        ("drawdown", "max_drawdown"),
+        ("total_profit_pct", "profit_total_pct"),
+        ("total_profit", "profit_total_abs"),
+        ("trades", "trade_count"),
+        ("start_date", "start_date"),
+        ("end_date", "end_date"),
+        ("tag", "tag"),
+    )
+
     def __init__(self) -> None:
+        self._statement: Optional[Select] = None
+        self._limit: Optional[int] = None
+        self._offset = 0
+        self._data: Optional[list[T]] = None
         super().__init__()
         self.reset()
         self.df = self.dataframe
 
+    # region Query state
+    @property
+    def data(self) -> list[T]:
+        """
+        The reports of the explorer. Accessing this property runs the pending query.
+        """
+        if self._data is None:
+            with Session(engine) as session:
+                self._data = list(session.exec(self._build_statement()).all())
+        return self._data
+
+    @data.setter
+    def data(self, value: Iterable[T]) -> None:
+        self._data = list(value)
+
+    @property
+    def loaded(self) -> bool:
+        """
+        :return: True if the rows have been loaded from the database.
+        """
+        return self._data is not None
+
+    @property
+    def _can_push_down(self) -> bool:
+        """Whether the next operation can still be added to the SQL statement"""
+        return not self.loaded and self._limit is None and not self._offset
+
+    def _reset_query(self) -> None:
+        self._statement = select(self.model)
+        self._limit = None
+        self._offset = 0
+        self._data = None
+
+    def _copy(self) -> "RepoExplorer":
+        """An explorer with the same pending query or loaded reports"""
+        explorer = self.__class__()
+        explorer._statement = self._statement
+        explorer._limit = self._limit
+        explorer._offset = self._offset
+        explorer._data = None if self._data is None else list(self._data)
+        return explorer
+
+    def _build_statement(self) -> Select:
+        statement = self._statement
+        if self._offset:
+            statement = statement.offset(self._offset)
+        if self._limit is not None:
+            statement = statement.limit(self._limit)
+        return statement
+
+    def _where(self, clause: ColumnElement, predicate: Callable[[T], bool]) -> "RepoExplorer":
+        """
+        Filter the reports with a SQL clause, or with the equivalent predicate if the
+        rows are already loaded.
+        """
+        if self._can_push_down:
+            self._statement = self._statement.where(clause)
+        else:
+            self.data = [r for r in self.data if predicate(r)]
+        return self
+
+    def _order_by(
+        self, expression: ColumnElement, key: Callable[[T], Any], descending: bool
+    ) -> "RepoExplorer":
+        """
+        Sort the reports with a SQL expression, or with the equivalent key if the rows are already
+        loaded. Reports without a value are placed last.
+        """
+        if self._can_push_down:
+            self._statement = self._statement.order_by(None).order_by(
+                expression.is_(None),
+                expression.desc() if descending else expression.asc(),
+                self.model.id.desc(),
+            )
+        else:
+            self.data = sorted(
+                self.data, key=lambda r: _nulls_last(key(r), descending), reverse=descending
+            )
+        return self
+
+    def __len__(self) -> int:
+        if self.loaded:
+            return len(self._data)
+        statement = select(func.count()).select_from(self._build_statement().subquery())
+        with Session(engine) as session:
+            return session.exec(statement).one()
+
+    def _fetch_at(self, index: int) -> T:
+        """Load a single row of the pending query"""
+        if self._limit is not None and index >= self._limit:
+            raise IndexError("list index out of range")
+        statement = self._statement.offset(self._offset + index).limit(1)
+        with Session(engine) as session:
+            row = session.exec(statement).first()
+        if row is None:
+            raise IndexError("list index out of range")
+        return row
+
+    # endregion
+
     @abstractmethod
     def reset(self) -> "RepoExplorer":
         """
@@ -72,10 +250,20 @@ class RepoExplorer(UserList[T], metaclass=ABCMeta):
         :return: The report with the given id.
         :rtype: ReportBase
         """
+        if not self._can_push_down:
+            try:
+                return [r for r in self if str(r.id) == str(id)][0]
+            except IndexError:
+                raise IdNotFoundError("Could not find report with id %s" % id)
         try:
-            return [r for r in self if str(r.id) == str(id)][0]
-        except IndexError:
+            statement = self._statement.where(self.model.id == int(id))
+        except (TypeError, ValueError):
             raise IdNotFoundError("Could not find report with id %s" % id)
+        with Session(engine) as session:
+            report = session.exec(statement).first()
+        if report is None:
+            raise IdNotFoundError("Could not find report with id %s" % id)
+        return report
 
     def get_strategy_id_pairs(self) -> Iterable[tuple[str, int]]:
         """
@@ -124,7 +312,10 @@ class RepoExplorer(UserList[T], metaclass=ABCMeta):
         :return: RepoExplorer with the first n reports.
         :rtype: RepoExplorer
         """
-        self.data = self.data[:n]
+        if self.loaded:
+            self.data = self.data[:n]
+        else:
+            self._limit = n if self._limit is None else min(self._limit, n)
         return self
 
     def tail(self, n: int) -> "RepoExplorer":
@@ -136,7 +327,13 @@ class RepoExplorer(UserList[T], metaclass=ABCMeta):
         :return: RepoExplorer with the last n reports.
         :rtype: RepoExplorer
         """
-        self.data = self.data[-n:]
+        if self.loaded:
+            self.data = self.data[-n:]
+        else:
+            total = len(self)
+            skip = max(total - n, 0)
+            self._offset += skip
+            self._limit = total - skip
         return self
 
     def sort_by_date(self, ascending=False) -> "RepoExplorer":
@@ -148,8 +345,7 @@ class RepoExplorer(UserList[T], metaclass=ABCMeta):
         :return: RepoExplorer with the sorted reports.
         :rtype: RepoExplorer
         """
-        self.data = sorted(self.data, key=lambda r: r.date, reverse=not ascending)
-        return self
+        return self._order_by(self.model.date, lambda r: r.date, not ascending)
 
     def sort_by_profit(self, ascended=False) -> "RepoExplorer":
         """
@@ -160,12 +356,9 @@ class RepoExplorer(UserList[T], metaclass=ABCMeta):
         :return: RepoExplorer with the sorted reports.
         :rtype: RepoExplorer
         """
-        self.data = sorted(
-            self.data,
-            key=lambda r: r.performance.profit_percent,
-            reverse=not ascended,
+        return self._order_by(
+            self.model.profit_total_pct, lambda r: r.profit_total_pct, not ascended
         )
-        return self
 
     def sort_by_ppd(self, ascended=False) -> "RepoExplorer":
         """
@@ -176,8 +369,8 @@ class RepoExplorer(UserList[T], metaclass=ABCMeta):
         :return: RepoExplorer with the sorted reports.
         :rtype: RepoExplorer
         """
-        self.data = sorted(self.data, key=lambda r: r.performance.ppd, reverse=not ascended)
-        return self
+        expression = self.model.profit_total_pct / _days_expression(self.model)
+        return self._order_by(expression, _ppd, not ascended)
 
     def sort_by_score(self, ascending=False) -> "RepoExplorer":
         """
@@ -189,10 +382,12 @@ class RepoExplorer(UserList[T], metaclass=ABCMeta):
         :return: RepoExplorer with the sorted reports.
         :rtype: RepoExplorer
         """
-        self.data = sorted(self.data, key=lambda r: r.performance.score, reverse=not ascending)
-        return self
+        expression = (
+            self.model.profit_mean * self.model.trade_count / _days_expression(self.model) * 100
+        )
+        return self._order_by(expression, _score, not ascending)
 
-    def filter_by_id(self, ids: Iterable[int]) -> "RepoExplorer":
+    def filter_by_id(self, ids: Union[int, Iterable[int]]) -> "RepoExplorer":
         """
         Filters the list of reports by ids.
 
@@ -201,10 +396,10 @@ class RepoExplorer(UserList[T], metaclass=ABCMeta):
         :return: RepoExplorer with the filtered reports.
         :rtype: RepoExplorer
         """
-        self.data = [r for r in self if r.id in ids]
-        return self
+        ids = [int(i) for i in _as_list(ids)]
+        return self._where(self.model.id.in_(ids), lambda r: r.id in ids)
 
-    def filter_by_tag(self, tags: Iterable[str]) -> "RepoExplorer":
+    def filter_by_tag(self, tags: Union[str, Iterable[str]]) -> "RepoExplorer":
         """
         Filters the list of reports by tags.
 
@@ -213,12 +408,22 @@ class RepoExplorer(UserList[T], metaclass=ABCMeta):
         :return: RepoExplorer with the filtered reports.
         :rtype: RepoExplorer
         """
-        matched = []
-        for r in self:
-            if r.tag in tags:
-                matched.append(r)
-        self.data = matched
-        return self
+        tags = _as_list(tags)
+        return self._where(self.model.tag.in_(tags), lambda r: r.tag in tags)
+
+    def filter_by_session(self, session_ids: Union[str, Iterable[str]]) -> "RepoExplorer":
+        """
+        Filters the list of reports by the session that created them.
+
+        :param session_ids: The session ids to filter by.
+        :type session_ids: Iterable[str]
+        :return: RepoExplorer with the filtered reports.
+        :rtype: RepoExplorer
+        """
+        session_ids = _as_list(session_ids)
+        return self._where(
+            self.model.session_id.in_(session_ids), lambda r: r.session_id in session_ids
+        )
 
     def filter_by_profitable(self) -> "RepoExplorer":
         """
@@ -227,10 +432,9 @@ class RepoExplorer(UserList[T], metaclass=ABCMeta):
         :return: RepoExplorer with the filtered reports.
         :rtype: RepoExplorer
         """
-        self.data = [r for r in self if r.performance.profit > 0]
-        return self
+        return self._where(self.model.profit_total_pct > 0, lambda r: (r.profit_total_pct or 0) > 0)
 
-    def filter_by_strategy(self, strategies: Iterable[str]) -> "RepoExplorer":
+    def filter_by_strategy(self, strategies: Union[str, Iterable[str]]) -> "RepoExplorer":
         """
         Filters the list of reports by strategies.
 
@@ -239,16 +443,10 @@ class RepoExplorer(UserList[T], metaclass=ABCMeta):
         :return: RepoExplorer with the filtered reports.
         :rtype: RepoExplorer
         """
-        new_data = []
-        for r in self:
-            try:
-                if r.strategy in strategies:
-                    new_data.append(r)
-            except IndexError as e:
-                logger.warning(f"Could not find strategy {r.strategy} in {strategies}: {e}")
-                continue
-        self.data = new_data
-        return self
+        strategies = _as_list(strategies)
+        return self._where(
+            self.model.strategy_name.in_(strategies), lambda r: r.strategy_name in strategies
+        )
 
     def filter_by_exchange(self, exchange: str) -> "RepoExplorer":
         """
@@ -259,7 +457,27 @@ class RepoExplorer(UserList[T], metaclass=ABCMeta):
         :return: RepoExplorer with the filtered reports.
         :rtype: RepoExplorer
         """
-        self.data = [r for r in self if r.exchange == exchange]
+        return self._where(self.model.exchange == exchange, lambda r: r.exchange == exchange)
+
+    def filter_by_date_range(
+        self,
+        start_date: Union[datetime.datetime, str] = None,
+        end_date: Union[datetime.datetime, str] = None,
+    ) -> "RepoExplorer":
+        """
+        Filters the list of reports by the date they were created.
+
+        :param start_date: Only keep reports created on or after this date.
+        :param end_date: Only keep reports created before this date.
+        :return: RepoExplorer with the filtered reports.
+        :rtype: RepoExplorer
+        """
+        if start_date:
+            start_date = _as_date(start_date)
+            self._where(self.model.date >= start_date, lambda r: r.date >= start_date)
+        if end_date:
+            end_date = _as_date(end_date)
+            self._where(self.model.date < end_date, lambda r: r.date < end_date)
         return self
 
     def first(self) -> T:
@@ -269,7 +487,9 @@ class RepoExplorer(UserList[T], metaclass=ABCMeta):
         :return: The first report.
         :rtype: ReportBase
         """
-        return self.data[0]
+        if self.loaded:
+            return self.data[0]
+        return self._fetch_at(0)
 
     def last(self) -> T:
         """
@@ -278,42 +498,81 @@ class RepoExplorer(UserList[T], metaclass=ABCMeta):
         :return: The last report.
         :rtype: ReportBase
         """
-        return self.data[-1]
+        if self.loaded:
+            return self.data[-1]
+        return self._fetch_at(len(self) - 1)
 
     def dataframe(self) -> pd.DataFrame:
         """
         Returns a dataframe of the reports.
 
+        The table is built in one pass from the stored summary columns. Only reports that were
+        never summarized are built from their result files.
+
         :return: A dataframe of the reports.
         :rtype: pd.DataFrame
         """
-        frames = []
-        for r in self:
-            try:
-                frames.append(r.df)
-            except Exception as e:
-                logger.exception("Failed to create dataframe for report: %s", r)
-                logger.debug(e)
-        if not len(frames):
+        frame = self._summary_frame()
+        missing = frame.strategy.isna() | frame.balance.isna()
+        if missing.any():
+            frames = [frame.loc[~missing]]
+            for r in self._reports_by_id(frame.id[missing]):
+                try:
+                    frames.append(r.df)
+                except Exception as e:
+                    logger.exception("Failed to create dataframe for report: %s", r)
+                    logger.debug(e)
+            frames = [f for f in frames if len(f)] or [frame.iloc[:0]]
+            frame = pd.concat(frames, ignore_index=True)
+        if not len(frame):
             print("No dataframes created")
             return pd.DataFrame()
-        frame = pd.DataFrame(pd.concat(frames, ignore_index=True))
+        frame = pd.DataFrame(frame)
         frame.set_index("id", inplace=True)
+        frame["balance"] = frame["balance"].astype(int)
+        frame["stake"] = frame["stake"].astype(object)
         frame.loc[frame.stake == -1.0, "stake"] = "unlimited"
         frame["avg_profit_pct"] = frame["avg_profit_pct"] * 100
         frame.sort_values(by="id", ascending=False, inplace=True)
         return frame
 
-    def delete(self, ids: Iterable[int]) -> None:
+    def _summary_frame(self) -> pd.DataFrame:
+        """
+        Build the report table from the summary columns. If the rows are not loaded yet, only the
+        needed columns are selected from the database.
+        """
+        names = [name for name, _ in self.frame_columns]
+        columns = [getattr(self.model, c) for _, c in self.frame_columns]
+        if self.loaded:
+            rows = [tuple(getattr(r, c) for _, c in self.frame_columns) for r in self.data]
+        else:
+            statement = self._build_statement().with_only_columns(*columns)
+            with Session(engine) as session:
+                rows = session.execute(statement).all()
+        df = pd.DataFrame.from_records(rows, columns=names)
+        start_date = pd.to_datetime(df.pop("start_date"))
+        end_date = pd.to_datetime(df.pop("end_date"))
+        days = (end_date - start_date).dt.days.fillna(1).clip(lower=1).astype(int)
+        df.insert(df.columns.get_loc("tag"), "days", days)
+        df["total_profit"] = df["total_profit"].round(2)
+        df["date"] = pd.to_datetime(df["date"]).dt.strftime("%x %X")
+        return df
+
+    def _reports_by_id(self, ids: Iterable[int]) -> list[T]:
+        ids = set(ids)
+        if self.loaded:
+            return [r for r in self.data if r.id in ids]
+        with Session(engine) as session:
+            return list(session.exec(select(self.model).where(self.model.id.in_(ids))).all())
+
+    def delete(self, ids: Union[int, Iterable[int]]) -> None:
         """
         Deletes reports by ids.
 
-        :param ids: The ids to delete.
-        :type ids: Iterable[int]
-        :return: RepoExplorer with the deleted reports.
-        :rtype: RepoExplorer
+        :param ids: The id or ids to delete.
+        :type ids: Union[int, Iterable[int]]
         """
-        reports = self.filter_by_id(*ids)
+        reports = list(self.filter_by_id(ids))
         with Session(engine) as session:
             for report in reports:
                 report.delete(session)
@@ -344,30 +603,86 @@ class RepoExplorer(UserList[T], metaclass=ABCMeta):
 
 
 class BacktestRepoExplorer(RepoExplorer[BacktestReport], BacktestReportList):
-    def reset(self) -> "BacktestRepoExplorer":
-        with Session(engine) as session:
-            statement = select(BacktestReport)
-            results = session.exec(statement)
-            self.data = results.fetchall()
+    model = BacktestReport
+    frame_columns = (
+        *RepoExplorer.frame_columns[:2],
+        ("hyperopt_id", "hyperopt_id"),
+        *RepoExplorer.frame_columns[2:12],
+        ("sortino", "sortino"),
+        *RepoExplorer.frame_columns[12:],
+    )
 
+    def reset(self) -> "BacktestRepoExplorer":
+        self._reset_query()
         return self.sort_by_date()
 
     @staticmethod
     def get_hashes():
-        with Session(engine) as session:
-            statement = select(BacktestReport)
-            results = session.exec(statement)
-            return [r.hash for r in results.all()]
-
-    def get_using_hash(self, hash: str):
-        return [r for r in self if r.hash == hash].pop()
-
-    def get_top_strategies(self, n=3):
-        return (
-            self.df()
-            .sort_values("td", ascending=False)
-            .drop_duplicates(subset=["strategy"])
-            .head(n)
+        return BacktestExplorer.get_hashes()
+
+    def get_using_hash(self, hash: str) -> BacktestReport:
+        """
+        Returns the report of the explorer with the given hash.
+
+        :param hash: The hash of the backtest
+        :raises IdNotFoundError: If no report of the explorer has the hash
+        :return: The report with the given hash.
+        """
+        if not self._can_push_down:
+            report = next((r for r in self if r.hash == hash), None)
+        else:
+            with Session(engine) as session:
+                statement = self._statement.where(BacktestReport.hash == hash)
+                report = session.exec(statement).first()
+        if report is None:
+            raise IdNotFoundError("Could not find report with hash %s" % hash)
+        return report
+
+    def filter_by_hyperopt_id(self, ids: Union[str, int, Iterable]) -> "BacktestRepoExplorer":
+        """
+        Filters the list of reports by the id of the hyperopt report their parameters came from.
+
+        :param ids: The hyperopt ids to filter by.
+        :return: BacktestRepoExplorer with the filtered reports.
+        :rtype: BacktestRepoExplorer
+        """
+        ids = [str(i) for i in _as_list(ids)]
+        return self._where(
+            BacktestReport.hyperopt_id.in_(ids), lambda r: str(r.hyperopt_id) in ids
+        )
+
+    def get_top_strategies(self, n=3) -> pd.DataFrame:
+        """
+        Returns the most profitable report of each of the top n strategies.
+
+        :param n: The number of strategies to return.
+        :return: A dataframe of the reports sorted by total profit.
+        """
+        top: dict[str, BacktestReport] = {}
+        for r in self._copy().sort_by_profit():
+            top.setdefault(r.strategy_name, r)
+            if len(top) >= n:
+                break
+        explorer = self._copy()
+        explorer.data = list(top.values())
+        return explorer.dataframe().sort_values("total_profit_pct", ascending=False)
+
+    def read_trades(self, columns: list[str] = None, **filters) -> pd.DataFrame:
+        """
+        Read the trades of the reports in this explorer from the trades store.
+        Reports that were saved before the store existed are added to it first.
+
+        :param columns: The columns to read. Reads all columns if None.
+        :param filters: Extra filters passed to `trades_store.read_trades`
+        :return: A dataframe with the trades of all reports.
+        """
+        reports = list(self)
+        trades_store.ensure_reports(reports)
+        return trades_store.read_trades(
+            report_ids=[r.id for r in reports],
+            strategies={r.strategy_name or r.strategy for r in reports},
+            columns=columns,
+            **filters,
         )
 
     def get_results_from_date_range(
@@ -375,40 +690,62 @@ class BacktestRepoExplorer(RepoExplorer[BacktestReport], BacktestReportList):
         start_date: Union[datetime.datetime, str],
         end_date: Union[datetime.datetime, str] = None,
     ) -> pd.DataFrame:
-        data = []
+        """
+        Summarize the trades of each report that were opened after `start_date` and on or before
+        `end_date`.
+
+        :param start_date: Exclusive start date
+        :param end_date: Inclusive end date
+        :return: A dataframe with one row per report that has trades in the range
+        """
         if isinstance(start_date, str):
             start_date = parse(start_date).date()
         if isinstance(end_date, str):
             end_date = parse(end_date).date()
-        for report in self:
-            df_trades = report.trades
-            mask = (df_trades["open_date"].dt.date > start_date) & (
-                not end_date or df_trades["open_date"].dt.date <= end_date
-            )
-            df_range = df_trades.loc[mask]
-            if not len(df_range):
-                continue
-            totals_dict = dict(
-                strategy=report.strategy,
-                id=report.id,
-                h_id=report.hyperopt_id,
-                starting_balance=report.starting_balance,
-                stake_amount=report.stake_amount,
-                # total_profit=df_range.profit_abs.sum(),
-                # profit_per_trade=df_range.profit_abs.mean(),
-                avg_profit_pct=df_range.profit_ratio.mean() * 100,
-                total_profit_pct=df_range.profit_ratio.sum(),
-                trades=len(df_range),
-                wins=len(df_range[df_range.profit_abs > 0]),
-                draws=len(df_range[df_range.profit_abs == 0]),
-                losses=len(df_range[df_range.profit_abs < 0]),
+        reports = {r.id: r for r in self}
+        df_range = self.read_trades(
+            columns=["report_id", "profit_ratio", "profit_abs"],
+            start_date=pd.Timestamp(start_date).normalize() + pd.Timedelta(days=1),
+            end_date=(
+                pd.Timestamp(end_date).normalize() + pd.Timedelta(days=1) if end_date else None
+            ),
+        )
+        df_range["wins"] = df_range.profit_abs > 0
+        df_range["draws"] = df_range.profit_abs == 0
+        df_range["losses"] = df_range.profit_abs < 0
+        grouped = df_range.groupby("report_id")
+        data = pd.DataFrame(
+            dict(
+                avg_profit_pct=grouped.profit_ratio.mean() * 100,
+                total_profit_pct=grouped.profit_ratio.sum(),
+                trades=grouped.size(),
+                wins=grouped.wins.sum(),
+                draws=grouped.draws.sum(),
+                losses=grouped.losses.sum(),
             )
-            data.append(totals_dict)
-        return pd.DataFrame(data).set_index("id")
+        )
+        data.index.name = "id"
+        report_data = pd.DataFrame(
+            [
+                dict(
+                    id=report.id,
+                    strategy=report.strategy_name,
+                    h_id=report.hyperopt_id,
+                    starting_balance=report.starting_balance,
+                    stake_amount=report.stake_amount,
+                )
+                for report_id, report in reports.items()
+                if report_id in data.index
+            ],
+            columns=["id", "strategy", "h_id", "starting_balance", "stake_amount"],
+        ).set_index("id")
+        return report_data.join(data)
 
     def get_pair_totals(self, sort_by="profit_total_pct"):
         """Get trades from all saved reports and summarize them."""
-        all_trades = pd.concat([r.trades for r in self])
+        all_trades = self.read_trades(
+            columns=["pair", "profit_abs", "profit_ratio", "stake_amount"]
+        )
         df = all_trades.groupby(all_trades["pair"]).aggregate(
             profit_total=pd.NamedAgg(column="profit_abs", aggfunc="sum"),
             profit_total_pct=pd.NamedAgg(column="profit_ratio", aggfunc="sum"),
@@ -420,35 +757,39 @@ class BacktestRepoExplorer(RepoExplorer[BacktestReport], BacktestReportList):
         df.profit_pct = df.profit_pct * 100
         return df.sort_values(sort_by, ascending=False)
 
+    def get_exit_reason_totals(self, sort_by="count"):
+        """Get trades from all saved reports and summarize them by exit reason."""
+        all_trades = self.read_trades(columns=["exit_reason", "profit_abs", "profit_ratio"])
+        df = all_trades.groupby(all_trades["exit_reason"]).aggregate(
+            profit_total=pd.NamedAgg(column="profit_abs", aggfunc="sum"),
+            profit_total_pct=pd.NamedAgg(column="profit_ratio", aggfunc="sum"),
+            profit_pct=pd.NamedAgg(column="profit_ratio", aggfunc="mean"),
+            count=pd.NamedAgg(column="exit_reason", aggfunc="count"),
+        )
+        df["wins"] = (all_trades.profit_abs > 0).groupby(all_trades["exit_reason"]).sum()
+        df["losses"] = (all_trades.profit_abs < 0).groupby(all_trades["exit_reason"]).sum()
+        df.profit_total_pct = df.profit_total_pct * 100
+        df.profit_pct = df.profit_pct * 100
+        return df.sort_values(sort_by, ascending=False)
+
 
 class HyperoptRepoExplorer(RepoExplorer[HyperoptReport], HyperoptReportList):
-    def reset(self):
-        with Session(engine) as session:
-            statement = select(HyperoptReport)
-            results = session.exec(statement)
-            self.data = results.fetchall()
+    model = HyperoptReport
 
-        return self.sort(lambda r: r.id)
+    def reset(self):
+        self._reset_query()
+        return self._order_by(HyperoptReport.id, lambda r: r.id, True)
 
     def get_by_param_id(self, id: str):
         """Get the report with the uuid or the first report in the repo"""
-        try:
-            return [r for r in self if str(r.id) == str(id)][0]
-        except IndexError:
-            raise IdNotFoundError("Could not find report with id %s" % id)
+        return self.get(id)
 
     def get_by_param_ids(self, *ids: str):
         """Get the report with the uuid or the first report in the repo"""
-        self.data = [r for r in self if r.id in ids]
-        return self
+        return self.filter_by_id(ids)
 
     def sort_by_loss(self, reverse=False):
-        self.data = sorted(
-            self.data,
-            key=lambda r: r.performance.loss,
-            reverse=reverse,
-        )
-        return self
+        return self._order_by(HyperoptReport.loss_value, lambda r: r.loss_value, reverse)
 
 
 def get_backtest_repo():
@@ -469,16 +810,39 @@ class BacktestExplorer:
     @staticmethod
     def get_hashes():
         with Session(engine) as session:
-            statement = select(BacktestReport)
-            results = session.exec(statement)
-            return [r.hash for r in results.fetchall()]
+            statement = select(BacktestReport.hash)
+            return list(session.exec(statement).all())
+
+    @staticmethod
+    def exists(hash: str) -> bool:
+        """
+        Checks if a backtest report with the given hash is saved in the database.
+
+        :param hash: The hash of the backtest command
+        :return: True if a report with the hash exists
+        """
+        with Session(engine) as session:
+            statement = select(BacktestReport.id).where(BacktestReport.hash == hash).limit(1)
+            return session.exec(statement).first() is not None
+
+    @staticmethod
+    def get_by_hash(hash: str) -> Optional[BacktestReport]:
+        """
+        Returns the backtest report with the given hash.
+
+        :param hash: The hash of the backtest command
+        :return: The report or None if no report with the hash exists
+        """
+        with Session(engine) as session:
+            statement = select(BacktestReport).where(BacktestReport.hash == hash).limit(1)
+            return session.exec(statement).first()
 
     @classmethod
     def get_using_hash(cls, hash):
-        with Session(engine) as session:
-            statement = select(BacktestReport).where(BacktestReport.hash == hash)
-            results = session.exec(statement)
-            return results.one()
+        report = cls.get_by_hash(hash)
+        if report is None:
+            raise IdNotFoundError("Could not find report with hash %s" % hash)
+        return report
 
 
 def backtest_results_as_text(
@@ -0,0 +1,159 @@
+"""
+A process-wide, size-bounded LRU cache for parsed result files.
+
+Entries are keyed by the file's resolved path, modification time and size, so a rewritten file is
+always parsed again while unchanged files are only ever parsed once per process.
+"""
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Hashable, Optional, Union
+
+import rapidjson
+from loguru import logger
+
+from lazyft import settings
+
+FileKey = tuple[str, int, int]
+
+
+def file_key(path: Union[str, Path]) -> FileKey:
+    """
+    Create a cache key for a file from its path, modification time and size.
+
+    :param path: The path to the file
+    :return: A tuple of (resolved path, mtime in nanoseconds, size in bytes)
+    """
+    path = Path(path).resolve()
+    stat = path.stat()
+    return str(path), stat.st_mtime_ns, stat.st_size
+
+
+class ResultCache:
+    """
+    An LRU cache with a byte budget.
+
+    The cost of an entry is supplied by the caller when it is added. For parsed files this is the
+    size of the file on disk, which keeps the accounting cheap and deterministic.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        """
+        :param max_bytes: The maximum total cost of all entries before the least recently used
+            entries are evicted. A value of 0 disables the cache.
+        """
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[Hashable, tuple[Any, int]] = OrderedDict()
+        self._keys_by_path: dict[tuple[str, str], Hashable] = {}
+        self._size = 0
+        self._lock = threading.RLock()
+
+    @property
+    def size(self) -> int:
+        """
+        :return: The total cost of all cached entries.
+        """
+        return self._size
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Return a cached value and mark it as the most recently used.
+
+        :param key: The key of the entry
+        :param default: The value to return if the key is not cached
+        :return: The cached value or `default`
+        """
+        with self._lock:
+            try:
+                value, _ = self._entries[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any, cost: int) -> None:
+        """
+        Add a value to the cache, evicting the least recently used entries if the byte budget
+        is exceeded. Values larger than the whole budget are not cached.
+
+        :param key: The key of the entry
+        :param value: The value to cache
+        :param cost: The cost of the entry in bytes
+        """
+        if cost > self.max_bytes:
+            return
+        with self._lock:
+            self._discard(key)
+            self._entries[key] = (value, cost)
+            self._size += cost
+            while self._size > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._discard(oldest)
+
+    def load_file(
+        self,
+        path: Union[str, Path],
+        loader: Callable[[Path], Any] = None,
+        namespace: str = "json",
+    ) -> Any:
+        """
+        Return the parsed contents of a file, parsing it only if the file is not cached or has
+        changed since it was cached.
+
+        The returned object is shared between all callers and must not be mutated.
+
+        :param path: The path to the file
+        :param loader: A function that parses the file. Defaults to parsing JSON.
+        :param namespace: Separates entries created by different loaders for the same file
+        :return: The parsed contents of the file
+        """
+        loader = loader or (lambda p: rapidjson.loads(p.read_text()))
+        f_key = file_key(path)
+        key = (namespace, *f_key)
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        value = loader(Path(path))
+        with self._lock:
+            # drop any stale entry of the same file that was cached before it changed
+            stale_key = self._keys_by_path.get((namespace, f_key[0]))
+            if stale_key is not None and stale_key != key:
+                self._discard(stale_key)
+            self.put(key, value, f_key[2])
+            if key in self._entries:
+                self._keys_by_path[(namespace, f_key[0])] = key
+        return value
+
+    def clear(self) -> None:
+        """
+        Remove all entries from the cache.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_path.clear()
+            self._size = 0
+        logger.debug("Cleared result cache")
+
+    def _discard(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return None
+        self._size -= entry[1]
+        return entry[0]
+
+
+_MISSING = object()
+
+result_cache = ResultCache(max_bytes=settings.result_cache_max_bytes)
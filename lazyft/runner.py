@@ -143,3 +143,29 @@ class Runner(abc.ABC, metaclass=ABCMeta):
         self.params.user_data_dir = new_folder
         self.tmp_strategy_path = new_folder
         logger.info(f"Using strategy hash {sb.hash} in backup: {new_folder}")
+
+    def create_isolated_workspace(self, use_backup: bool = True) -> pathlib.Path:
+        """
+        Move the run into a temporary folder with its own copy of the strategy, parameters and
+        space settings. Runs in isolated workspaces can execute at the same time without
+        overwriting each other's files.
+
+        :param use_backup: Use the backed up strategy of the hyperopt id instead of the current
+            strategy file, if the report has one
+        :return: The path to the workspace
+        """
+        if self.hyperopt_id and use_backup:
+            from lazyft.reports import get_hyperopt_repo
+
+            report = get_hyperopt_repo().get(self.hyperopt_id)
+            if report.strategy_hash:
+                self.export_backup_strategy(report)
+                return self.tmp_strategy_path
+        new_folder = strategy.create_temp_folder_for_strategy(
+            self.strategy, self.params.strategy_path, self.hyperopt_id
+        )
+        self.params.strategy_path = new_folder
+        self.params.user_data_dir = new_folder
+        self.tmp_strategy_path = new_folder
+        logger.info(f"Using isolated workspace: {new_folder}")
+        return new_folder
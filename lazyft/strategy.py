@@ -271,20 +271,55 @@ def create_temp_folder_for_strategy_and_params_from_backup(
     logger_exec.info(f"Exported strategy backup {strategy_backup.name} to {path}")
     if hyperopt_id:
         parameter_tools.set_params_file(hyperopt_id, export_path=path.with_suffix(".json"))
-    hyperopt_data_dir = paths.USER_DATA_DIR / "hyperopt_results"
-    backtest_data_dir = paths.USER_DATA_DIR / "backtest_results"
-    # create a link in tmp folder to hyperopt_data_dir and backtest_data_dir
-    os.symlink(str(hyperopt_data_dir.resolve()), str((tmp_dir / "hyperopt_results/").resolve()))
-    os.symlink(str(backtest_data_dir.resolve()), str((tmp_dir / "backtest_results/").resolve()))
-    # create a link in tmp folder to the data dir
-    os.symlink(
-        str(paths.USER_DATA_DIR.joinpath("data").resolve()),
-        str((tmp_dir / "data/").resolve()),
-    )
+    _link_user_data(tmp_dir)
+    return tmp_dir
+
+
+def create_temp_folder_for_strategy(
+    strategy_name: str, strategy_dir: Path, hyperopt_id: int = None
+) -> Path:
+    """
+    Creates a temporary folder with a private copy of a strategy and its space settings, so that
+    runs executing at the same time can not overwrite each other's parameter or space files. The
+    other files of the strategy directory are linked. If a hyperopt_id is provided, the parameters
+    of the id will be exported to the folder.
+
+    :param strategy_name: The name of the strategy
+    :param strategy_dir: The directory the strategy is loaded from
+    :param hyperopt_id: The hyperopt parameters to load and save to the json file
+    :return: The path to the new folder
+    """
+    strategy_dir = Path(strategy_dir)
+    file_name = get_file_name(strategy_name)
+    stem = file_name.replace(".py", "")
+    tmp_dir = Path(tempfile.mkdtemp(prefix=f"lazyft-{strategy_name}_"))
+    for path in strategy_dir.iterdir():
+        if path.name in (file_name, f"{stem}.sh.json"):
+            shutil.copy2(path, tmp_dir / path.name)
+        elif path.name != f"{stem}.json":
+            os.symlink(str(path.resolve()), str(tmp_dir / path.name))
+    if hyperopt_id:
+        parameter_tools.set_params_file(hyperopt_id, export_path=tmp_dir / f"{stem}.json")
+    _link_user_data(tmp_dir)
+    logger_exec.info(f"Created temporary folder {tmp_dir} for strategy {strategy_name}")
+    return tmp_dir
+
+
+def _link_user_data(tmp_dir: Path) -> None:
+    """Link the shared result and data directories of user_data into a temporary folder"""
+    links = {
+        "hyperopt_results": paths.USER_DATA_DIR / "hyperopt_results",
+        "backtest_results": paths.USER_DATA_DIR / "backtest_results",
+        "data": paths.USER_DATA_DIR.joinpath("data"),
+    }
+    for name, target in links.items():
+        link = tmp_dir / name
+        if link.exists() or link.is_symlink():
+            link.unlink()
+        os.symlink(str(target.resolve()), str(link.resolve()))
     logger_exec.info(
         f"Created user_data symlink's to hyperopt_results, backtest_results, and data in {tmp_dir}"
     )
-    return tmp_dir
 
 
 def delete_temporary_strategy_backup_dir(tmp_dir: Path) -> None:
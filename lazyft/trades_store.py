@@ -0,0 +1,197 @@
+"""
+A columnar store with the trades of all saved backtests.
+
+The trades of each saved backtest report are written to one Parquet file in a hive partitioned
+directory tree::
+
+    trades_store/strategy=<strategy>/exchange=<exchange>/report_<id>.parquet
+
+All files share `TRADE_SCHEMA`, so the whole store can be scanned as one table. Filters on the
+strategy and exchange prune whole directories and filters on the report id and the open date are
+pushed down into the Parquet reader. Files are read through memory mapping.
+"""
+from __future__ import annotations
+
+import datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable, Optional, Union
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from loguru import logger
+from pyarrow import fs
+
+from lazyft import paths
+
+if TYPE_CHECKING:
+    from lazyft.models.backtest import BacktestReport
+
+TRADE_SCHEMA = pa.schema(
+    [
+        ("report_id", pa.int64()),
+        ("pair", pa.string()),
+        ("open_date", pa.timestamp("us", tz="UTC")),
+        ("close_date", pa.timestamp("us", tz="UTC")),
+        ("open_rate", pa.float64()),
+        ("close_rate", pa.float64()),
+        ("amount", pa.float64()),
+        ("stake_amount", pa.float64()),
+        ("profit_ratio", pa.float64()),
+        ("profit_abs", pa.float64()),
+        ("trade_duration", pa.int64()),
+        ("exit_reason", pa.string()),
+        ("enter_tag", pa.string()),
+        ("is_short", pa.bool_()),
+        ("leverage", pa.float64()),
+    ]
+)
+PARTITION_SCHEMA = pa.schema([("strategy", pa.string()), ("exchange", pa.string())])
+# Older freqtrade versions used these names in the trade list
+RENAMED_COLUMNS = {"sell_reason": "exit_reason", "buy_tag": "enter_tag"}
+
+
+def report_path(report: "BacktestReport", root: Path = None) -> Path:
+    """
+    :param report: A saved backtest report
+    :param root: The root directory of the store
+    :return: The path of the file with the trades of the report.
+    """
+    root = root or paths.TRADES_STORE_DIR
+    return root.joinpath(
+        f"strategy={report.strategy_name or report.strategy}",
+        f"exchange={report.exchange or 'unknown'}",
+        f"report_{report.id}.parquet",
+    )
+
+
+def trades_to_table(trades: list[dict], report_id: int) -> pa.Table:
+    """
+    Convert the trade list of a backtest result to a table with the `TRADE_SCHEMA`.
+
+    :param trades: The trades of a backtest result
+    :param report_id: The id of the report the trades belong to
+    :return: A pyarrow table
+    """
+    df = pd.DataFrame(trades).rename(columns=RENAMED_COLUMNS)
+    df["report_id"] = report_id
+    for column in TRADE_SCHEMA.names:
+        if column not in df.columns:
+            df[column] = pd.Series([None] * len(df), index=df.index, dtype=object)
+    df = df[TRADE_SCHEMA.names]
+    for column in ("open_date", "close_date"):
+        df[column] = pd.to_datetime(df[column], utc=True)
+    return pa.Table.from_pandas(df, schema=TRADE_SCHEMA, preserve_index=False)
+
+
+def write_report(report: "BacktestReport", root: Path = None) -> Path:
+    """
+    Write the trades of a saved backtest report to the store.
+
+    :param report: A saved backtest report
+    :param root: The root directory of the store
+    :return: The path of the written file
+    """
+    if report.id is None:
+        raise ValueError("Only saved reports can be added to the trades store")
+    path = report_path(report, root)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    table = trades_to_table(report.backtest_data["trades"], report.id)
+    # files starting with a dot are ignored by dataset discovery
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    pq.write_table(table, tmp_path)
+    tmp_path.replace(path)
+    logger.debug("Stored {} trades of backtest report {}", table.num_rows, report.id)
+    return path
+
+
+def ensure_reports(reports: Iterable["BacktestReport"], root: Path = None) -> None:
+    """
+    Add reports that are not in the store yet, like reports saved before the store existed.
+
+    :param reports: Saved backtest reports
+    :param root: The root directory of the store
+    """
+    for report in reports:
+        if report_path(report, root).exists():
+            continue
+        try:
+            write_report(report, root)
+        except Exception as e:
+            logger.warning("Could not store the trades of report {}: {}", report.id, repr(e))
+
+
+def remove_report(report: "BacktestReport", root: Path = None) -> None:
+    """
+    Remove the trades of a backtest report from the store.
+
+    :param report: A saved backtest report
+    :param root: The root directory of the store
+    """
+    root = root or paths.TRADES_STORE_DIR
+    for path in root.glob(f"strategy=*/exchange=*/report_{report.id}.parquet"):
+        path.unlink(missing_ok=True)
+
+
+def dataset(root: Path = None) -> ds.Dataset:
+    """
+    :param root: The root directory of the store
+    :return: A pyarrow dataset over all stored trades. Files are memory mapped.
+    """
+    root = root or paths.TRADES_STORE_DIR
+    root.mkdir(parents=True, exist_ok=True)
+    return ds.dataset(
+        str(root),
+        schema=pa.unify_schemas([TRADE_SCHEMA, PARTITION_SCHEMA]),
+        format="parquet",
+        partitioning=ds.partitioning(PARTITION_SCHEMA, flavor="hive"),
+        filesystem=fs.LocalFileSystem(use_mmap=True),
+        exclude_invalid_files=True,
+    )
+
+
+def read_trades(
+    report_ids: Iterable[int] = None,
+    strategies: Iterable[str] = None,
+    exchanges: Iterable[str] = None,
+    start_date: Union[datetime.datetime, str] = None,
+    end_date: Union[datetime.datetime, str] = None,
+    columns: Optional[list[str]] = None,
+    root: Path = None,
+) -> pd.DataFrame:
+    """
+    Read stored trades. All filters are optional and combined.
+
+    :param report_ids: Only read trades of these reports
+    :param strategies: Only read trades of these strategies
+    :param exchanges: Only read trades of these exchanges
+    :param start_date: Only read trades opened on or after this date
+    :param end_date: Only read trades opened before this date
+    :param columns: The columns to read. Reads all columns if None.
+    :param root: The root directory of the store
+    :return: A dataframe of the matching trades
+    """
+    expression = None
+    filters = []
+    if report_ids is not None:
+        filters.append(ds.field("report_id").isin([int(i) for i in report_ids]))
+    if strategies is not None:
+        filters.append(ds.field("strategy").isin(list(strategies)))
+    if exchanges is not None:
+        filters.append(ds.field("exchange").isin(list(exchanges)))
+    if start_date is not None:
+        filters.append(ds.field("open_date") >= _timestamp(start_date))
+    if end_date is not None:
+        filters.append(ds.field("open_date") < _timestamp(end_date))
+    for f in filters:
+        expression = f if expression is None else expression & f
+    table = dataset(root).to_table(columns=columns, filter=expression)
+    return table.to_pandas()
+
+
+def _timestamp(value: Union[datetime.datetime, datetime.date, str]) -> pa.Scalar:
+    value = pd.Timestamp(value)
+    if value.tzinfo is None:
+        value = value.tz_localize("UTC")
+    return pa.scalar(value.to_pydatetime(), type=pa.timestamp("us", tz="UTC"))
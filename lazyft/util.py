@@ -102,7 +102,9 @@ def duration_string_to_timedelta(delta_string: str):
     return delta
 
 
-def store_backtest_stats(recordfilename: Path, stats: dict[str, DataFrame]) -> Path:
+def store_backtest_stats(
+    recordfilename: Path, stats: dict[str, DataFrame], suffix: str = ""
+) -> Path:
     """
     Stores backtest results
 
@@ -110,17 +112,18 @@ def store_backtest_stats(recordfilename: Path, stats: dict[str, DataFrame]) -> P
     Filenames will be appended with a timestamp right before the suffix
     while for directories, <directory>/backtest-result-<datetime>.json will be used as filename
     :param stats: Dataframe containing the backtesting statistics
+    :param suffix: Appended to the timestamp to keep the names of results that are stored in the
+    same second unique
 
     :return: Path object pointing to the file where the statistics were stored
     """
+    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S") + (f"-{suffix}" if suffix else "")
     if recordfilename.is_dir():
-        filename = (
-            recordfilename / f'backtest-result-{datetime.now().strftime("%Y-%m-%d_%H-%M-%S")}.json'
-        )
+        filename = recordfilename / f"backtest-result-{timestamp}.json"
     else:
         filename = Path.joinpath(
             recordfilename.parent,
-            f'{recordfilename.stem}-{datetime.now().strftime("%Y-%m-%d_%H-%M-%S")}',
+            f"{recordfilename.stem}-{timestamp}",
         ).with_suffix(recordfilename.suffix)
     file_dump_json(filename, stats)
 
@@ -0,0 +1,382 @@
+"""
+Walk-forward testing.
+
+A long timerange is split into windows that consist of a training period followed by a test
+period. The strategy is hyperopted on the training period of every window and the best parameters
+are backtested on the test period that follows it. The windows are processed at the same time,
+each hyperopt runs in an isolated workspace and the backtests run in a process pool.
+
+All reports of a walk-forward run share a session id. The backtest of a window is linked to the
+hyperopt of the window through its hyperopt id and both are tagged with `wf-<session>-<window>`.
+The trades of the backtests are stitched together into one out-of-sample equity curve.
+"""
+from __future__ import annotations
+
+import datetime
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from copy import deepcopy
+from typing import Optional, Union
+
+import attr
+import pandas as pd
+from loguru import logger
+
+from lazyft import downloader
+from lazyft.backtest.commands import BacktestCommand
+from lazyft.backtest.runner import BacktestMultiRunner
+from lazyft.command_parameters import BacktestParameters, HyperoptParameters
+from lazyft.hyperopt import HyperoptCommand, HyperoptRunner
+from lazyft.models.backtest import BacktestReport
+from lazyft.models.hyperopt import HyperoptReport
+from lazyft.reports import get_backtest_repo, get_hyperopt_repo
+
+DATE_FORMAT = "%Y%m%d"
+
+
+@attr.s(frozen=True)
+class WalkForwardWindow:
+    """
+    A training period and the test period that follows it.
+    """
+
+    index: int = attr.ib()
+    train_start: datetime.date = attr.ib()
+    train_end: datetime.date = attr.ib()
+    test_start: datetime.date = attr.ib()
+    test_end: datetime.date = attr.ib()
+
+    @property
+    def hyperopt_timerange(self) -> str:
+        return f"{self.train_start:{DATE_FORMAT}}-{self.train_end:{DATE_FORMAT}}"
+
+    @property
+    def backtest_timerange(self) -> str:
+        return f"{self.test_start:{DATE_FORMAT}}-{self.test_end:{DATE_FORMAT}}"
+
+
+def split_timerange(
+    timerange: str,
+    train_days: int,
+    test_days: int,
+    step_days: int = None,
+    anchored: bool = False,
+) -> list[WalkForwardWindow]:
+    """
+    Split a timerange into walk-forward windows.
+
+    :param timerange: A timerange like "20220101-20230101". An open end uses today.
+    :param train_days: The length of the training periods
+    :param test_days: The length of the test periods
+    :param step_days: The number of days the windows move forward. Defaults to `test_days`, which
+        makes the test periods follow each other without gaps.
+    :param anchored: If True, all training periods start at the start of the timerange and grow
+        with every window. Otherwise they have a fixed length and roll forward.
+    :return: The windows that fit into the timerange
+    """
+    start_text, end_text = timerange.split("-")
+    start = datetime.datetime.strptime(start_text, DATE_FORMAT).date()
+    end = (
+        datetime.datetime.strptime(end_text, DATE_FORMAT).date()
+        if end_text
+        else datetime.date.today()
+    )
+    step = step_days or test_days
+    windows = []
+    while True:
+        offset = len(windows) * step
+        train_start = start if anchored else start + datetime.timedelta(days=offset)
+        train_end = start + datetime.timedelta(days=offset + train_days)
+        test_end = train_end + datetime.timedelta(days=test_days)
+        if test_end > end:
+            break
+        windows.append(
+            WalkForwardWindow(len(windows), train_start, train_end, train_end, test_end)
+        )
+    if not windows:
+        raise ValueError(
+            f"Timerange {timerange} is too short for {train_days} training and {test_days} "
+            f"test days"
+        )
+    return windows
+
+
+def stitch_equity_curve(reports: list[BacktestReport]) -> pd.DataFrame:
+    """
+    Stitch the trades of consecutive backtests into one equity curve. The balance starts at the
+    starting balance of the first backtest and the absolute profits of all trades are added in
+    the order they were closed.
+
+    Test periods overlap when the windows move forward by less than a test period. The
+    overlapping days belong to the later test period, a backtest only keeps the trades it opened
+    before the next test period starts, so no day is counted twice.
+
+    :param reports: The backtest reports of the test periods
+    :return: A dataframe with one row per trade
+    """
+    reports = sorted(reports, key=_start_date)
+    if not reports:
+        return pd.DataFrame(columns=["window", "pair", "close_date", "profit_abs", "balance"])
+    frames = []
+    for window, report in enumerate(reports):
+        trades = report.trades[
+            ["pair", "open_date", "close_date", "profit_ratio", "profit_abs"]
+        ].copy()
+        if window + 1 < len(reports):
+            next_start = _start_date(reports[window + 1])
+            trades = trades[pd.to_datetime(trades["open_date"], utc=True) < next_start]
+        trades = trades.drop(columns="open_date")
+        trades.insert(0, "window", window)
+        trades["report_id"] = report.id
+        frames.append(trades.sort_values("close_date"))
+    curve = pd.concat(frames, ignore_index=True)
+    curve["pair"] = curve["pair"].astype(str)
+    starting_balance = reports[0].starting_balance
+    curve["balance"] = starting_balance + curve["profit_abs"].cumsum()
+    curve["profit_total_ratio"] = curve["balance"] / starting_balance - 1
+    return curve
+
+
+def _start_date(report: BacktestReport) -> pd.Timestamp:
+    """The start of the test period of a backtest in UTC"""
+    start = pd.Timestamp(report.start_date or report.performance.start_date)
+    return start.tz_localize("UTC") if start.tzinfo is None else start.tz_convert("UTC")
+
+
+class WalkForward:
+    """
+    Hyperopts and backtests a strategy on a series of walk-forward windows.
+    """
+
+    def __init__(
+        self,
+        strategy: str,
+        hyperopt_parameters: HyperoptParameters,
+        windows: list[WalkForwardWindow],
+        backtest_parameters: BacktestParameters = None,
+        workers: int = None,
+    ) -> None:
+        """
+        :param strategy: The name of the strategy
+        :param hyperopt_parameters: The parameters of the hyperopts. The timerange is replaced by
+            the training period of each window.
+        :param windows: The windows, see `split_timerange`
+        :param backtest_parameters: The parameters of the backtests. The timerange is replaced by
+            the test period of each window. Defaults to the backtest settings of the hyperopt
+            parameters.
+        :param workers: The number of windows to process at the same time. Defaults to the
+            number of windows or cores, whichever is lower. The cores are divided between the
+            hyperopts of the windows.
+        """
+        self.strategy = strategy
+        self.hyperopt_parameters = hyperopt_parameters
+        self.backtest_parameters = backtest_parameters
+        self.windows = windows
+        self.workers = workers or max(min(len(windows), os.cpu_count() or 1), 1)
+        self.session_id = str(uuid.uuid4())
+
+        self.hyperopt_reports: dict[int, HyperoptReport] = {}
+        self.backtest_reports: dict[int, BacktestReport] = {}
+        self.errors: list[tuple[WalkForwardWindow, Union[Exception, str]]] = []
+
+    def tag(self, window: WalkForwardWindow) -> str:
+        """
+        :param window: A window of this run
+        :return: The tag of the reports of the window.
+        """
+        return f"wf-{self.session_id[:8]}-{window.index}"
+
+    def execute(self) -> "WalkForward":
+        """
+        Hyperopt and backtest all windows and save the reports.
+
+        :return: self
+        """
+        logger.info(
+            "Walk-forward of {} over {} windows with {} workers, session {}",
+            self.strategy,
+            len(self.windows),
+            self.workers,
+            self.session_id,
+        )
+        self.errors.clear()
+        self._download_data()
+        self._run_hyperopts()
+        self._run_backtests()
+        if self.errors:
+            logger.warning("Walk-forward finished with {} errors", len(self.errors))
+        return self
+
+    def _download_data(self) -> None:
+        """Download the data of all windows at once, the workers do not download"""
+        if not self.hyperopt_parameters.download_data:
+            return
+        params = deepcopy(self.hyperopt_parameters)
+        params.timerange = (
+            f"{self.windows[0].train_start:{DATE_FORMAT}}-{self.windows[-1].test_end:{DATE_FORMAT}}"
+        )
+        downloader.download_data_for_strategy(self.strategy, params.config, params)
+
+    # region Hyperopt
+    def _run_hyperopts(self) -> None:
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = {executor.submit(self._hyperopt_window, w): w for w in self.windows}
+            for future in as_completed(futures):
+                window = futures[future]
+                try:
+                    self.hyperopt_reports[window.index] = future.result()
+                except Exception as e:
+                    logger.exception(e)
+                    self.errors.append((window, e))
+                else:
+                    logger.info("Hyperopt of window {} finished", window.index)
+
+    def _hyperopt_window(self, window: WalkForwardWindow) -> HyperoptReport:
+        runner = HyperoptRunner(self._hyperopt_command(window), notify=False, isolated=True)
+        runner.execute()
+        if runner.error or not runner.report:
+            raise RuntimeError(
+                f"Hyperopt of window {window.index} failed: " + "".join(runner.error_list[-5:])
+            )
+        runner.report.session_id = self.session_id
+        return runner.save(tag=self.tag(window))
+
+    def _hyperopt_command(self, window: WalkForwardWindow) -> HyperoptCommand:
+        params = deepcopy(self.hyperopt_parameters)
+        params.timerange = window.hyperopt_timerange
+        params.tag = self.tag(window)
+        params.download_data = False
+        if params.jobs == -1:
+            params.jobs = max((os.cpu_count() or 1) // self.workers, 1)
+        return HyperoptCommand(self.strategy, params=params)
+
+    # endregion
+
+    # region Backtest
+    def _run_backtests(self) -> None:
+        windows = [w for w in self.windows if w.index in self.hyperopt_reports]
+        if not windows:
+            return
+        commands = [
+            BacktestCommand(
+                self.strategy,
+                params=self._backtest_parameters(w),
+                id=str(self.hyperopt_reports[w.index].id),
+            )
+            for w in windows
+        ]
+        multi_runner = BacktestMultiRunner(commands)
+        multi_runner.session_id = self.session_id
+        multi_runner.execute(workers=min(self.workers, len(commands)))
+        multi_runner.save()
+        for window, runner in zip(windows, multi_runner.runners):
+            if runner.report:
+                self.backtest_reports[window.index] = runner.report
+            else:
+                self.errors.append((window, runner.exception or "Backtest failed"))
+
+    def _backtest_parameters(self, window: WalkForwardWindow) -> BacktestParameters:
+        if self.backtest_parameters:
+            params = deepcopy(self.backtest_parameters)
+        else:
+            hyperopt_parameters = deepcopy(self.hyperopt_parameters)
+            params = BacktestParameters(
+                **{
+                    f.name: getattr(hyperopt_parameters, f.name)
+                    for f in attr.fields(BacktestParameters)
+                    if f.name not in ("cache", "timerange", "tag")
+                },
+                timerange=window.backtest_timerange,
+                tag=self.tag(window),
+            )
+        params.timerange = window.backtest_timerange
+        params.tag = self.tag(window)
+        params.download_data = False
+        return params
+
+    # endregion
+
+    # region Results
+    def equity_curve(self) -> pd.DataFrame:
+        """
+        :return: The stitched out-of-sample equity curve of the test periods.
+        """
+        return stitch_equity_curve(list(self.backtest_reports.values()))
+
+    def summary(self) -> pd.DataFrame:
+        """
+        :return: A dataframe with the hyperopt and backtest results of every window.
+        """
+        rows = []
+        for window in self.windows:
+            hyperopt_report = self.hyperopt_reports.get(window.index)
+            backtest_report = self.backtest_reports.get(window.index)
+            rows.append(
+                {
+                    "window": window.index,
+                    "train": window.hyperopt_timerange,
+                    "test": window.backtest_timerange,
+                    "hyperopt_id": hyperopt_report.id if hyperopt_report else None,
+                    "train_profit_pct": (
+                        hyperopt_report.profit_total_pct if hyperopt_report else None
+                    ),
+                    "backtest_id": backtest_report.id if backtest_report else None,
+                    "test_profit_pct": (
+                        backtest_report.profit_total_pct if backtest_report else None
+                    ),
+                    "test_trades": backtest_report.trade_count if backtest_report else None,
+                }
+            )
+        return pd.DataFrame(rows)
+
+    @staticmethod
+    def load_session(session_id: str) -> tuple[list[HyperoptReport], list[BacktestReport]]:
+        """
+        Load the saved reports of a walk-forward run.
+
+        :param session_id: The session id of the run
+        :return: The hyperopt reports and the backtest reports of the run
+        """
+        hyperopt_reports = get_hyperopt_repo().filter_by_session(session_id).data
+        backtest_reports = get_backtest_repo().filter_by_session(session_id).data
+        return list(hyperopt_reports), sorted(
+            backtest_reports, key=lambda r: r.start_date or r.performance.start_date
+        )
+
+    # endregion
+
+
+def walk_forward(
+    strategy: str,
+    hyperopt_parameters: HyperoptParameters,
+    timerange: str,
+    train_days: int,
+    test_days: int,
+    step_days: int = None,
+    anchored: bool = False,
+    workers: int = None,
+    backtest_parameters: Optional[BacktestParameters] = None,
+) -> WalkForward:
+    """
+    Split a timerange into windows and run a walk-forward test over them.
+
+    :param strategy: The name of the strategy
+    :param hyperopt_parameters: The parameters of the hyperopts
+    :param timerange: The full timerange
+    :param train_days: The length of the training periods
+    :param test_days: The length of the test periods
+    :param step_days: The number of days the windows move forward
+    :param anchored: Whether the training periods all start at the start of the timerange
+    :param workers: The number of windows to process at the same time
+    :param backtest_parameters: The parameters of the backtests
+    :return: The executed WalkForward
+    """
+    windows = split_timerange(timerange, train_days, test_days, step_days, anchored)
+    return WalkForward(
+        strategy,
+        hyperopt_parameters,
+        windows,
+        backtest_parameters=backtest_parameters,
+        workers=workers,
+    ).execute()
@@ -86,3 +86,28 @@ def test_multi_runner():
     assert any(mr.reports)
     for r in mr.reports:
         assert isinstance(r, lazyft.models.backtest.BacktestReport)
+
+
+def test_multi_runner_parallel():
+    commands = get_commands(STRATEGIES)
+    for c in commands:
+        c.params.tag = "parallel"
+    mr = backtest.BacktestMultiRunner(commands)
+    mr.execute(workers=2)
+    assert not mr.errors
+    assert len(mr.reports) == len(commands)
+    mr.save()
+    assert all(r.id for r in mr.reports)
+
+
+def test_replay_signals():
+    from lazyft.backtest.signal_cache import signal_cache
+
+    signal_cache.clear()
+    cp = get_parameters(STRATEGIES)
+    first = cp.run("TestStrategy", reuse_signals=True)
+    cp.max_open_trades = 1
+    second = cp.run("TestStrategy", reuse_signals=True)
+    assert first.signal_hash == second.signal_hash
+    assert first.hash != second.hash
+    assert len(signal_cache) == 1
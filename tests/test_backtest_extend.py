@@ -0,0 +1,38 @@
+from types import SimpleNamespace
+
+import pandas as pd
+
+from lazyft.backtest.extend import resume_point, saved_trades
+
+
+def trades_frame(rows):
+    df = pd.DataFrame(rows, columns=["open_date", "close_date", "is_open"])
+    for column in ("open_date", "close_date"):
+        df[column] = pd.to_datetime(df[column], utc=True)
+    return df
+
+
+def test_resume_point_without_open_trades():
+    trades = trades_frame([("2022-01-01", "2022-01-02", False)])
+    end = pd.Timestamp("2022-02-01", tz="UTC")
+    assert resume_point(trades, end) == end
+
+
+def test_resume_point_without_trades():
+    trades = saved_trades(SimpleNamespace(backtest_data={"trades": []}))
+    end = pd.Timestamp("2022-02-01", tz="UTC")
+    assert resume_point(trades, end) == end
+    assert trades["profit_abs"].sum() == 0
+
+
+def test_resume_point_moves_before_spanning_trades():
+    trades = trades_frame(
+        [
+            ("2022-01-01", "2022-01-02", False),
+            ("2022-01-05", "2022-01-20", False),
+            ("2022-01-10", "2022-02-01", True),
+        ]
+    )
+    end = pd.Timestamp("2022-02-01", tz="UTC")
+    # the second trade is still open when the force exited trade was entered
+    assert resume_point(trades, end) == pd.Timestamp("2022-01-05", tz="UTC")
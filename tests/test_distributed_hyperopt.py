@@ -0,0 +1,91 @@
+import math
+import os
+import time
+from types import SimpleNamespace
+
+from lazyft.hyperopt.distributed import DistributedHyperopt, EpochStore, _replace_arg, _set_arg
+
+
+def test_claims_expire(tmp_path):
+    store = EpochStore(tmp_path)
+    run_id = store.create_run({"strategy": "TestStrategy", "command": "hyperopt"}, [])
+    ids = store.propose(run_id, [[1, 0.5], [2, 0.1]], [True, False])
+    assert ids == ["0000000", "0000001"]
+
+    assert store.claim(run_id, "a", lease=60) == ("0000000", [1, 0.5])
+    assert store.claim(run_id, "b", lease=60) == ("0000001", [2, 0.1])
+    assert store.claim(run_id, "c", lease=60) is None
+
+    # worker "a" left, its claim expires and another worker takes the point
+    claim = store.run_dir(run_id) / "claims" / "0000000"
+    old = time.time() - 120
+    os.utime(claim, (old, old))
+    assert store.claim(run_id, "c", lease=60) == ("0000000", [1, 0.5])
+
+    store.put_result(run_id, "0000001", {"loss": 0.3})
+    assert store.results(run_id, ids) == {"0000001": {"loss": 0.3}}
+    assert not store.is_finished(run_id)
+    store.finish(run_id)
+    assert store.is_finished(run_id)
+
+
+def test_claims_skip_evaluated_points(tmp_path):
+    store = EpochStore(tmp_path)
+    run_id = store.create_run({"strategy": "TestStrategy", "command": "hyperopt"}, [])
+    ids = store.propose(run_id, [[1], [2], [3]], [True, True, True])
+    store.put_result(run_id, ids[0], {"loss": 0.1})
+    store.put_result(run_id, ids[2], {"loss": 0.3})
+    assert store.claim(run_id, "a", lease=60) == (ids[1], [2])
+    # the cursor only moves past the evaluated points at the start
+    assert store._claim_cursors[run_id] == 1
+    assert store.claim(run_id, "b", lease=60) is None
+    assert store.propose(run_id, [[4]], [False]) == ["0000003"]
+
+
+class FakeHyperopt:
+    total_epochs = 4
+    current_best_loss = math.inf
+
+    def __init__(self, coordinator):
+        self.coordinator = coordinator
+        self.opt = SimpleNamespace(tell=lambda points, losses: None)
+        self.saved = []
+
+    def get_asked_points(self, n_points):
+        points = [[i] for i in range(n_points)]
+        # a worker evaluates the first point and leaves, then the run is stopped
+        self.coordinator.store.put_result(self.coordinator.run_id, "0000000", {"loss": 0.5})
+        self.coordinator.stop()
+        return points, [True] * n_points
+
+    def _save_result(self, result):
+        self.saved.append(result)
+
+
+def test_stop_does_not_wait_for_workers(tmp_path):
+    coordinator = DistributedHyperopt.__new__(DistributedHyperopt)
+    coordinator.store = EpochStore(tmp_path)
+    coordinator.batch_size = 2
+    coordinator.poll_interval = 0
+    coordinator.stop_requested = False
+    coordinator.run_id = coordinator.store.create_run({"command": "hyperopt"}, [])
+    hyperopt = FakeHyperopt(coordinator)
+    coordinator._optimize(hyperopt)
+    assert [r["current_epoch"] for r in hyperopt.saved] == [1]
+
+
+def test_set_arg():
+    args = "hyperopt -c a.json -c b.json --logfile x.log -s Strat".split()
+    assert _set_arg(args, "--logfile", None) == "hyperopt -c a.json -c b.json -s Strat".split()
+    assert _set_arg(args, "--timerange", "20220101-") == args + ["--timerange", "20220101-"]
+
+
+def test_replace_arg():
+    args = "hyperopt -c a.json -c b.json -s Strat".split()
+    assert _replace_arg(args, "-c", "c.json") == "hyperopt -c c.json -c b.json -s Strat".split()
+    assert (
+        _replace_arg(args, "-c", "s.json", occurrence=1)
+        == "hyperopt -c a.json -c s.json -s Strat".split()
+    )
+    single = "hyperopt -c a.json".split()
+    assert _replace_arg(single, "-c", "s.json", occurrence=1) == single + ["-c", "s.json"]
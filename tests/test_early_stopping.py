@@ -0,0 +1,28 @@
+from lazyft.hyperopt.early_stopping import NoImprovement, RelativeImprovement
+from lazyft.hyperopt.in_process import EpochEvent
+
+
+def events(losses):
+    for epoch, loss in enumerate(losses, start=1):
+        yield EpochEvent(epoch, len(losses), {}, {}, loss, is_best=False)
+
+
+def first_stop(policy, losses):
+    for event in events(losses):
+        if policy.update(event):
+            return event.epoch
+    return None
+
+
+def test_no_improvement():
+    losses = [1.0, 0.5, 0.6, 0.7, 0.4, 0.9, 0.9, 0.9]
+    assert first_stop(NoImprovement(3), losses) == 8
+    assert first_stop(NoImprovement(4), losses) is None
+
+
+def test_relative_improvement():
+    losses = [-1.0, -2.0, -2.01, -2.01, -2.01, -2.01]
+    policy = RelativeImprovement(window=3, epsilon=0.01)
+    assert first_stop(policy, losses) == 5
+    policy.reset()
+    assert first_stop(policy, losses[:4]) is None
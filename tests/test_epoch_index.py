@@ -0,0 +1,34 @@
+import rapidjson
+
+from lazyft.epoch_index import EpochIndex
+
+
+def write_epochs(path, losses, mode="w"):
+    with path.open(mode) as f:
+        for i, loss in enumerate(losses):
+            epoch = {"loss": loss, "results_metrics": {"profit_total": -loss, "total_trades": i}}
+            f.write(rapidjson.dumps(epoch) + "\n")
+
+
+def test_read_and_best_epoch(tmp_path):
+    path = tmp_path / "results.fthypt"
+    write_epochs(path, [3.0, 1.0, 2.0])
+    index = EpochIndex.load(path)
+    assert len(index) == 3
+    assert index.best_epoch() == 1
+    assert index.read(2)["loss"] == 2.0
+    assert index.index_path.exists()
+
+
+def test_appended_epochs_are_indexed(tmp_path):
+    path = tmp_path / "results.fthypt"
+    write_epochs(path, [3.0, 1.0])
+    index = EpochIndex.load(path)
+    write_epochs(path, [0.5], mode="a")
+    # a partially written line is not indexed yet
+    with path.open("a") as f:
+        f.write('{"loss": ')
+    index.update()
+    assert len(index) == 3
+    assert index.best_epoch() == 2
+    assert EpochIndex.load(path).offsets == index.offsets
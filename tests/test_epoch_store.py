@@ -0,0 +1,29 @@
+import os
+
+import rapidjson
+
+from lazyft import epoch_store
+
+
+def test_read_epochs_exports_once(tmp_path):
+    path = tmp_path / "results.fthypt"
+    epochs = [
+        {
+            "loss": float(i),
+            "current_epoch": i + 1,
+            "results_metrics": {"total_trades": i, "holding_avg": "1:30:00", "trades": []},
+            "params_dict": {"buy_rsi": 30 + i},
+        }
+        for i in range(3)
+    ]
+    path.write_text("".join(rapidjson.dumps(e) + "\n" for e in epochs))
+    df = epoch_store.read_epochs(path, ["loss", "results_metrics.holding_avg_s", "missing"])
+    assert list(df.columns) == ["loss", "results_metrics.holding_avg_s"]
+    assert df["results_metrics.holding_avg_s"].tolist() == [5400.0] * 3
+    assert epoch_store.is_current(path)
+
+    mtime = os.stat(epoch_store.store_path(path)).st_mtime_ns
+    full = epoch_store.read_epochs(path)
+    assert os.stat(epoch_store.store_path(path)).st_mtime_ns == mtime
+    assert "params_dict.buy_rsi" in full.columns
+    assert "results_metrics.trades" not in full.columns
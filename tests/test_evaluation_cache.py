@@ -0,0 +1,32 @@
+import numpy as np
+from skopt.space import Integer, Real
+
+from lazyft.hyperopt.evaluation_cache import (
+    EvaluationCache,
+    EvaluationStats,
+    config_fingerprint,
+)
+
+
+def test_key_is_canonical():
+    dimensions = [Integer(1, 10, name="buy_rsi"), Real(0.1, 0.5, name="roi_p1")]
+    key = EvaluationCache.key("context", dimensions, [np.int64(5), np.float64(0.25)])
+    assert key == EvaluationCache.key("context", dimensions, [5, 0.25])
+    assert key != EvaluationCache.key("other", dimensions, [5, 0.25])
+
+
+def test_config_fingerprint_ignores_paths():
+    config = {"stake_amount": 10, "exchange": {"name": "binance"}, "user_data_dir": "/tmp/a"}
+    moved = {**config, "user_data_dir": "/tmp/b"}
+    assert config_fingerprint(config) == config_fingerprint(moved)
+    assert config_fingerprint(config) != config_fingerprint({**config, "stake_amount": 20})
+
+
+def test_store_and_stats(tmp_path):
+    cache = EvaluationCache(tmp_path, max_bytes=1024 * 1024)
+    cache.put("key", {"loss": 0.5})
+    assert cache.get("key") == {"loss": 0.5}
+    assert cache.get("missing") is None
+    stats = EvaluationStats(hits=1, misses=3)
+    assert stats.hit_rate == 0.25
+    assert str(stats) == "1/4 cached epochs (25.0%)"
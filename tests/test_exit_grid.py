@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from lazyft.backtest.exit_grid import ExitGridEvaluator, _chain
+
+
+def signal_frame():
+    n = 10
+    df = pd.DataFrame(
+        {
+            "date": pd.date_range("2022-01-01", periods=n, freq="5min", tz="UTC"),
+            "open": [100.0] * n,
+            "high": [100.0] * n,
+            "low": [100.0] * n,
+            "close": [100.0] * n,
+            "enter_long": [1] + [0] * (n - 1),
+            "exit_long": [0] * n,
+        }
+    )
+    df.loc[2, "low"] = 97.0
+    df.loc[3, "high"] = 110.0
+    return df
+
+
+def test_roi_and_stoploss():
+    evaluator = ExitGridEvaluator({"BTC/USDT": signal_frame()}, "5m", fee=0, max_candles=8)
+    roi_trades = evaluator.trades({0: 0.05}, stoploss=-0.1)
+    assert len(roi_trades) == 1
+    assert roi_trades.iloc[0]["exit_reason"] == "roi"
+    assert roi_trades.iloc[0]["profit_ratio"] == pytest.approx(0.05)
+
+    stop_trades = evaluator.trades({0: 0.05}, stoploss=-0.02)
+    assert stop_trades.iloc[0]["exit_reason"] == "stop_loss"
+    assert stop_trades.iloc[0]["profit_ratio"] == pytest.approx(-0.02)
+
+
+def test_evaluate_grid():
+    evaluator = ExitGridEvaluator(
+        {"BTC/USDT": signal_frame()}, "5m", fee=0, max_candles=8, strategy="TestStrategy"
+    )
+    grid = evaluator.evaluate([{0: 0.05}, {0: 0.2}], [-0.02, -0.1])
+    assert len(grid) == 4
+    best = grid.iloc[0]
+    assert best["stoploss"] == -0.1
+    assert best["roi"] == {"0": 0.05}
+    parameters = evaluator.to_parameters(best)
+    assert parameters["params"]["stoploss"] == {"stoploss": -0.1}
+    assert parameters["strategy_name"] == "TestStrategy"
+
+
+def test_chain_skips_entry_on_exit_candle():
+    keys = np.array([0, 3, 4, 8])
+    # the first trade exits on candle 3, the entry on that candle is skipped
+    assert _chain(keys, np.array([3, 5, 6, 9])).tolist() == [0, 2, 3]
+    assert _chain(keys, np.array([2, 5, 6, 9])).tolist() == [0, 1, 3]
@@ -1,6 +1,11 @@
+import pickle
+import threading
+
 from lazyft.command import create_commands
 from lazyft.command_parameters import HyperoptParameters
-from lazyft.hyperopt.runner import HyperoptRunner
+from lazyft.hyperopt.early_stopping import NoImprovement
+from lazyft.hyperopt.in_process import HookedHyperopt
+from lazyft.hyperopt.runner import HyperoptManager, HyperoptRunner
 from lazyft.models import HyperoptPerformance, HyperoptReport
 
 STRATEGY = ["TestStrategy3"]
@@ -54,6 +59,80 @@ def test_hyperopt_with_id():
     assert bool(runner.report)
 
 
+def test_hyperopt_in_process():
+    commands = get_commands(STRATEGY)
+    events = []
+    runner = HyperoptRunner(
+        commands[0], notify=False, in_process=True, epoch_callbacks=[events.append]
+    )
+    runner.execute()
+    assert len(events) == epochs
+    assert [e.epoch for e in events] == list(range(1, epochs + 1))
+    assert any(e.is_best for e in events)
+    assert runner.report.loss == min(e.loss for e in events if e.metrics["total_trades"] >= 1)
+    assert len(runner.get_results()) == epochs
+
+
+def test_hyperopt_in_process_with_job_workers():
+    # the job workers get the Hyperopt instance pickled, the runner behind the hooks holds locks
+    hp = get_parameters("roi", STRATEGY, None)
+    hp.jobs = 2
+    hp.early_stopping = [NoImprovement(epochs)]
+    runner = HyperoptRunner(create_commands(hp)[0], notify=False)
+    runner.execute()
+    assert not runner.error
+    assert len(runner.epochs) == epochs
+
+
+def test_hooks_are_not_pickled():
+    hyperopt = HookedHyperopt.__new__(HookedHyperopt)
+    lock = threading.Lock()
+    hyperopt.total_epochs = epochs
+    hyperopt._save_result = lambda result: lock.acquire()
+    hyperopt.run_optimizer_parallel = lambda parallel, asked: lock.acquire()
+    restored = pickle.loads(pickle.dumps(hyperopt))
+    assert restored.total_epochs == epochs
+    assert "_save_result" not in restored.__dict__
+    assert "run_optimizer_parallel" not in restored.__dict__
+
+
+def test_manager_splits_cpu_budget():
+    commands = get_commands(STRATEGY * 4)
+    manager = HyperoptManager(commands, max_concurrent=4, cpu_budget=64)
+    queued = list(manager.queue.queue)
+    assert manager.jobs_per_run == 16
+    assert all(r.isolated and r.params.jobs == 16 for r in queued)
+    assert queued == manager.runners
+
+
+class FakeRunner:
+    strategy = "TestStrategy3"
+    output = ""
+
+    def __init__(self, fail):
+        self.fail = fail
+        self.error = False
+        self.exception = None
+        self.saved = False
+
+    def execute(self):
+        assert not self.fail, "Hyperopt id does not match strategy"
+
+    def save(self):
+        self.saved = True
+
+
+def test_manager_continues_after_failed_runner():
+    manager = HyperoptManager([], autosave=True)
+    runners = [FakeRunner(fail=True), FakeRunner(fail=False)]
+    for r in runners:
+        manager.queue.put(r)
+    manager._worker()
+    assert manager.failed_runners == [runners[0]]
+    assert isinstance(runners[0].exception, AssertionError)
+    assert runners[1].saved
+
+
 def test_build_command_with_days():
     commands = get_commands(STRATEGY)
     assert any(commands)
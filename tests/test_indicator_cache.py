@@ -0,0 +1,79 @@
+import pandas as pd
+
+from lazyft.indicator_cache import IndicatorCache
+
+
+class Parameter:
+    category = "buy"
+
+    def __init__(self, value):
+        self.value = value
+
+
+class DummyStrategy:
+    timeframe = "5m"
+
+    def __init__(self):
+        self.config = {}
+        self.calls = 0
+        self.length = Parameter(3)
+
+    def enumerate_parameters(self):
+        yield "length", self.length
+
+    def advise_indicators(self, dataframe, metadata):
+        self.calls += 1
+        dataframe["sma"] = dataframe["close"].rolling(self.length.value).mean()
+        return dataframe
+
+    def advise_all_indicators(self, data):
+        return {
+            pair: self.advise_indicators(pair_data.copy(), {"pair": pair}).copy()
+            for pair, pair_data in data.items()
+        }
+
+
+def candles(n=20):
+    return pd.DataFrame(
+        {
+            "date": pd.date_range("2022-01-01", periods=n, freq="5min", tz="UTC"),
+            "open": range(n),
+            "high": range(n),
+            "low": range(n),
+            "close": [float(i) for i in range(n)],
+            "volume": range(n),
+        }
+    )
+
+
+def test_indicators_are_reused(tmp_path):
+    cache = IndicatorCache(tmp_path, max_bytes=10 * 1024 * 1024)
+    strategy = DummyStrategy()
+    cache.attach(strategy)
+    first = strategy.advise_all_indicators({"BTC/USDT": candles()})["BTC/USDT"]
+    second = DummyStrategy()
+    cache.attach(second)
+    cached = second.advise_all_indicators({"BTC/USDT": candles()})["BTC/USDT"]
+    assert second.calls == 0
+    assert cache.hits == 1
+    pd.testing.assert_frame_equal(first, cached)
+
+
+def test_key_changes_with_parameters_and_candles(tmp_path):
+    cache = IndicatorCache(tmp_path, max_bytes=10 * 1024 * 1024)
+    strategy = DummyStrategy()
+    cache.attach(strategy)
+    strategy.advise_all_indicators({"BTC/USDT": candles()})
+    strategy.length.value = 5
+    strategy.advise_all_indicators({"BTC/USDT": candles()})
+    strategy.advise_all_indicators({"BTC/USDT": candles(21)})
+    assert strategy.calls == 3
+    assert cache.hits == 0
+
+
+def test_eviction(tmp_path):
+    cache = IndicatorCache(tmp_path, max_bytes=1)
+    strategy = DummyStrategy()
+    cache.attach(strategy)
+    strategy.advise_all_indicators({"BTC/USDT": candles(), "ETH/USDT": candles(30)})
+    assert cache.size <= 1
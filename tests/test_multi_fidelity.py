@@ -0,0 +1,51 @@
+import pandas as pd
+import pytest
+
+from lazyft.hyperopt.multi_fidelity import (
+    SuccessiveHalvingHyperopt,
+    promoted_count,
+    random_candidates,
+    slice_processed,
+)
+
+
+def test_promoted_count():
+    assert promoted_count(27, 3) == 9
+    assert promoted_count(10, 3) == 4
+    assert promoted_count(2, 3) == 1
+
+
+class ChoiceSpace:
+    def __init__(self, values):
+        self.values = values
+
+    def rvs(self, n_samples, random_state):
+        return [[random_state.choice(self.values)] for _ in range(n_samples)]
+
+
+def test_random_candidates():
+    candidates = random_candidates(ChoiceSpace(range(100)), 20, random_state=1)
+    assert len(candidates) == 20
+    assert len({c[0] for c in candidates}) == 20
+    assert candidates == random_candidates(ChoiceSpace(range(100)), 20, random_state=1)
+    # a small space runs out of distinct points
+    small = random_candidates(ChoiceSpace([1, 2, 3]), 10, random_state=1)
+    assert len({c[0] for c in small}) == len(small) <= 3
+
+
+def test_slice_processed():
+    dates = pd.date_range("2022-01-01", periods=10, freq="1h", tz="UTC")
+    processed = {"BTC/USDT": pd.DataFrame({"date": dates, "close": range(10)})}
+    sliced = slice_processed(processed, dates[6], startup_candles=2)
+    assert sliced["BTC/USDT"]["close"].tolist() == [4, 5, 6, 7, 8, 9]
+    sliced = slice_processed(processed, dates[1], startup_candles=5)
+    assert len(sliced["BTC/USDT"]) == 10
+
+
+def test_invalid_fractions():
+    with pytest.raises(ValueError):
+        SuccessiveHalvingHyperopt("hyperopt", fractions=(0.5, 0.25, 1))
+    with pytest.raises(ValueError):
+        SuccessiveHalvingHyperopt("hyperopt", fractions=(0.25, 0.5))
+    with pytest.raises(ValueError):
+        SuccessiveHalvingHyperopt("hyperopt", eta=1)
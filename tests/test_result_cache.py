@@ -0,0 +1,44 @@
+import os
+
+from lazyft.result_cache import ResultCache
+
+
+def test_load_file_parses_once(tmp_path):
+    path = tmp_path / "result.json"
+    path.write_text('{"strategy": {"TestStrategy": {}}}')
+    cache = ResultCache(max_bytes=1024)
+    calls = []
+
+    def loader(p):
+        calls.append(p)
+        return p.read_text()
+
+    first = cache.load_file(path, loader)
+    second = cache.load_file(path, loader)
+    assert first is second
+    assert len(calls) == 1
+
+
+def test_load_file_reloads_changed_file(tmp_path):
+    path = tmp_path / "result.json"
+    path.write_text('{"a": 1}')
+    cache = ResultCache(max_bytes=1024)
+    assert cache.load_file(path) == {"a": 1}
+    path.write_text('{"a": 22}')
+    os.utime(path, ns=(0, 1))
+    assert cache.load_file(path) == {"a": 22}
+    # the stale entry of the same file is dropped
+    assert len(cache) == 1
+
+
+def test_lru_eviction():
+    cache = ResultCache(max_bytes=10)
+    cache.put("a", 1, 4)
+    cache.put("b", 2, 4)
+    cache.get("a")
+    cache.put("c", 3, 4)
+    assert "a" in cache
+    assert "b" not in cache
+    assert cache.size == 8
+    cache.put("too-big", 4, 11)
+    assert "too-big" not in cache
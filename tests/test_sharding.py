@@ -0,0 +1,96 @@
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+from lazyft.backtest import sharding
+from lazyft.backtest.sharding import compare_reports, merge_shards, split_pairs
+from lazyft.errors import ShardingMismatchError
+
+
+def test_split_pairs():
+    pairs = ["BTC/USDT", "ETH/USDT", "ADA/USDT", "XRP/USDT", "SOL/USDT"]
+    shards = split_pairs(pairs, 2)
+    assert shards == [["BTC/USDT", "ADA/USDT", "SOL/USDT"], ["ETH/USDT", "XRP/USDT"]]
+    assert split_pairs(pairs[:2], 4) == [["BTC/USDT"], ["ETH/USDT"]]
+
+
+def shard(pairs, profits, market_change, start, **counters):
+    trades = pd.DataFrame(
+        {
+            "pair": pairs,
+            "open_date": pd.to_datetime(start, utc=True),
+            "profit_abs": profits,
+        }
+    )
+    content = {
+        "results": trades,
+        "locks": [],
+        "final_balance": 1000 + sum(profits),
+        "backtest_start_time": 10,
+        "backtest_end_time": 20,
+        "run_id": "run",
+        **counters,
+    }
+    return dict(
+        content=content,
+        market_change=market_change,
+        pairs=len(set(pairs)),
+        min_date=pd.Timestamp(start[0], tz="UTC"),
+        max_date=pd.Timestamp(start[-1], tz="UTC"),
+    )
+
+
+def test_merge_shards(monkeypatch):
+    captured = {}
+
+    def generate_strategy_stats(pairs, name, content, min_date, max_date, market_change):
+        captured.update(content=content, market_change=market_change, min_date=min_date)
+        return {}
+
+    monkeypatch.setattr(sharding, "generate_strategy_stats", generate_strategy_stats)
+    monkeypatch.setattr(sharding, "generate_strategy_comparison", lambda bt_stats: [])
+    strategy = SimpleNamespace(get_strategy_name=lambda: "Strategy", config={})
+    bt = SimpleNamespace(
+        strategylist=[strategy],
+        pairlists=SimpleNamespace(whitelist=["A/USDT", "B/USDT", "C/USDT"]),
+    )
+    results = [
+        shard(
+            ["A/USDT", "C/USDT"],
+            [10.0, -4.0],
+            0.1,
+            ["2022-01-02", "2022-01-01"],
+            rejected_signals=2,
+        ),
+        shard(["B/USDT"], [5.0], 0.4, ["2022-01-03"], rejected_signals=1, timedout_entry_orders=3),
+    ]
+    stats = merge_shards(bt, results)
+    content = captured["content"]
+    assert content["final_balance"] == pytest.approx(1011.0)
+    assert content["results"]["pair"].tolist() == ["C/USDT", "A/USDT", "B/USDT"]
+    assert content["rejected_signals"] == 3
+    assert content["timedout_entry_orders"] == 3
+    assert content["timedout_exit_orders"] == 0
+    # weighted by the number of pairs of each shard
+    assert captured["market_change"] == pytest.approx(0.2)
+    assert captured["min_date"] == pd.Timestamp("2022-01-02", tz="UTC")
+    assert list(stats["strategy"]) == ["Strategy"]
+
+
+def report(trades, **summary):
+    data = {"total_trades": len(trades), "profit_total_abs": 15.0, **summary, "trades": trades}
+    return SimpleNamespace(backtest_data=data)
+
+
+def test_compare_reports():
+    trades = [
+        {"pair": "A/USDT", "open_date": "2022-01-01", "profit_abs": 10.0},
+        {"pair": "B/USDT", "open_date": "2022-01-02", "profit_abs": 5.0},
+    ]
+    compare_reports(report(trades), report(list(reversed(trades))))
+    with pytest.raises(ShardingMismatchError, match="profit_total_abs"):
+        compare_reports(report(trades), report(trades, profit_total_abs=14.0))
+    changed = [trades[0], {**trades[1], "profit_abs": 6.0}]
+    with pytest.raises(ShardingMismatchError, match="trades"):
+        compare_reports(report(trades), report(changed))
@@ -0,0 +1,29 @@
+from lazyft.hyperopt.tailer import EPOCH_FIELDS, EpochTailer
+
+LINE = (
+    "| {epoch}/5 |       12 |    7    0    5 |        0.35% |        4.166 USDT    (0.83%) "
+    "| 0 days 05:12:00 |        1.281 USDT    (0.25%) |  -0.2345{epoch} |\n"
+)
+
+
+def test_tailer_parses_appended_lines(tmp_path):
+    log = tmp_path / "hyperopt.log"
+    log.write_text("Starting hyperopt\n" + LINE.format(epoch=1))
+    tailer = EpochTailer(log, max_epochs=2)
+    rows = tailer.poll()
+    assert len(rows) == 1
+    assert len(rows[0]) == len(EPOCH_FIELDS)
+    assert rows[0][0] == "1/5"
+    assert tailer.poll() == []
+
+    # a line is only parsed once it is complete
+    text = LINE.format(epoch=2) + LINE.format(epoch=3)
+    with log.open("a") as f:
+        f.write(text[:40])
+    assert tailer.poll() == []
+    with log.open("a") as f:
+        f.write(text[40:])
+    assert [r[0] for r in tailer.poll()] == ["2/5", "3/5"]
+    assert [r[0] for r in tailer.epochs] == ["2/5", "3/5"]
+    assert tailer.count == 3
+    assert not tailer.complete
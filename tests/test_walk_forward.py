@@ -0,0 +1,54 @@
+import datetime
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+from lazyft.walk_forward import split_timerange, stitch_equity_curve
+
+
+def test_rolling_windows():
+    windows = split_timerange("20220101-20220401", train_days=30, test_days=15)
+    assert len(windows) == 4
+    assert windows[0].hyperopt_timerange == "20220101-20220131"
+    assert windows[0].backtest_timerange == "20220131-20220215"
+    # the test periods follow each other
+    assert windows[1].test_start == windows[0].test_end
+    assert windows[1].train_start == datetime.date(2022, 1, 16)
+
+
+def test_anchored_windows():
+    windows = split_timerange("20220101-20220401", train_days=30, test_days=15, anchored=True)
+    assert all(w.train_start == datetime.date(2022, 1, 1) for w in windows)
+    assert windows[-1].train_end > windows[0].train_end
+
+
+def test_timerange_too_short():
+    with pytest.raises(ValueError):
+        split_timerange("20220101-20220110", train_days=30, test_days=15)
+
+
+def test_stitch_overlapping_test_periods():
+    def report(id, start, trades):
+        frame = pd.DataFrame(trades, columns=["pair", "open_date", "close_date", "profit_abs"])
+        for column in ("open_date", "close_date"):
+            frame[column] = pd.to_datetime(frame[column], utc=True)
+        frame["profit_ratio"] = frame["profit_abs"] / 100
+        return SimpleNamespace(
+            id=id, start_date=datetime.datetime(*start), starting_balance=1000, trades=frame
+        )
+
+    first = report(
+        1,
+        (2022, 1, 1),
+        [("A/USDT", "2022-01-02", "2022-01-03", 10.0), ("A/USDT", "2022-01-10", "2022-01-11", 5.0)],
+    )
+    # the second test period starts on the 8th, the trade of the 10th is in both backtests
+    second = report(
+        2,
+        (2022, 1, 8),
+        [("A/USDT", "2022-01-10", "2022-01-11", 5.0), ("B/USDT", "2022-01-12", "2022-01-13", 3.0)],
+    )
+    curve = stitch_equity_curve([second, first])
+    assert curve["report_id"].tolist() == [1, 2, 2]
+    assert curve["balance"].tolist() == [1010.0, 1015.0, 1018.0]
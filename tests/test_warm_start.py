@@ -0,0 +1,17 @@
+from skopt.space import Categorical, Integer
+
+from lazyft.hyperopt.warm_start import seed_points
+
+
+def test_seed_points():
+    dimensions = [Integer(1, 10, name="buy_rsi"), Categorical([True, False], name="buy_trend")]
+    epochs = [
+        {"params_dict": {"buy_rsi": 5, "buy_trend": True, "sell_rsi": 70}, "loss": -1.0},
+        {"params_dict": {"buy_rsi": 5, "buy_trend": True}, "loss": -0.5},
+        {"params_dict": {"buy_rsi": 20, "buy_trend": False}, "loss": -2.0},
+        {"params_dict": {"buy_rsi": 3}, "loss": -3.0},
+        {"params_dict": {"buy_rsi": 7, "buy_trend": False}, "loss": 0.2},
+    ]
+    points, losses = seed_points(dimensions, epochs)
+    assert points == [[5, True], [7, False]]
+    assert losses == [-1.0, 0.2]